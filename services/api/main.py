@@ -5,8 +5,10 @@ from logging.config import dictConfig
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import operators
-from api.database import connect_db, disconnect_db
+from .routers import operators, analytics, exports
+from api.database import connect_db, disconnect_db, get_db_pool
+from .services.columnar_store import columnar_store
+from .services.search_index import search_index
 
 
 logging.basicConfig(
@@ -21,9 +23,17 @@ async def lifespan(app: FastAPI):
     # Startup: Connect to DB
     logger.info("Application startup...")
     await connect_db()
+    # Optional in-memory copy of the accounting facts (ANALYTICS_IN_MEMORY=true)
+    if columnar_store.enabled:
+        await columnar_store.start(await get_db_pool())
+    # Optional in-memory search index over operadoras (SEARCH_IN_MEMORY=true)
+    if search_index.enabled:
+        await search_index.start(await get_db_pool())
     yield  # Application runs here
     # Shutdown: Disconnect from DB
     logger.info("Application shutdown...")
+    await columnar_store.stop()
+    await search_index.stop()
     await disconnect_db()
 
 
@@ -53,6 +63,8 @@ app.add_middleware(
 
 # Include routers
 app.include_router(operators.router)
+app.include_router(analytics.router)
+app.include_router(exports.router)
 
 
 # Simple root endpoint
@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date
+
+
+class TopExpenseResult(BaseModel):
+    registro_ans: int
+    razao_social: str
+    total_despesa: float = Field(..., description="Sum of VL_SALDO_FINAL over the period")
+
+
+class TopExpensesResponse(BaseModel):
+    period: str = Field(..., description="'quarter' or 'year'")
+    start_date: date = Field(..., description="First day of the period")
+    end_date: date = Field(..., description="First day after the period (exclusive)")
+    account: str
+    dataset_version: int = Field(..., description="Version of the imported data used")
+    results: List[TopExpenseResult]
+
+
+class ExpenseTotal(BaseModel):
+    key: str = Field(..., description="Registro ANS, UF or modalidade")
+    label: Optional[str] = Field(None, description="Operator name for per-operator totals")
+    total: float
+
+
+class ExpenseTotalsResponse(BaseModel):
+    period: str
+    start_date: date
+    end_date: date
+    account: str
+    group_by: str
+    dataset_version: int
+    source: str = Field(..., description="'memory' (in-process columns) or 'database'")
+    results: List[ExpenseTotal]
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import date
+
+
+class FinancialEntry(BaseModel):
+    data: date
+    conta_contabil: str
+    descricao: str
+    vl_saldo_inicial: Optional[float] = None
+    vl_saldo_final: Optional[float] = None
+
+
+class OperatorFinancialsResponse(BaseModel):
+    registro_ans: int
+    results: List[FinancialEntry]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as 'cursor' to fetch the next page; null on the last page"
+    )
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
+from datetime import date
 
 
 class OperatorSearchResult(BaseModel):
@@ -22,3 +23,41 @@ class OperatorSearchResult(BaseModel):
 class OperatorSearchResponse(BaseModel):
     total_count: int
     results: List[OperatorSearchResult]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as 'cursor' to fetch the next page; null on the last page"
+    )
+
+
+class OperatorSuggestion(BaseModel):
+    registro_ans: int
+    razao_social: str
+    nome_fantasia: Optional[str] = None
+    score: float = Field(..., description="Trigram word similarity to the typed text (0-1)")
+
+
+class OperatorSuggestResponse(BaseModel):
+    query: str
+    results: List[OperatorSuggestion]
+
+
+class OperatorDetail(BaseModel):
+    registro_ans: int
+    cnpj: Optional[str] = None
+    razao_social: str
+    nome_fantasia: Optional[str] = None
+    modalidade: Optional[str] = None
+    logradouro: Optional[str] = None
+    numero: Optional[str] = None
+    complemento: Optional[str] = None
+    bairro: Optional[str] = None
+    cidade: Optional[str] = None
+    uf: Optional[str] = None
+    cep: Optional[str] = None
+    ddd: Optional[str] = None
+    telefone: Optional[str] = None
+    fax: Optional[str] = None
+    endereco_eletronico: Optional[str] = None
+    representante: Optional[str] = None
+    cargo_representante: Optional[str] = None
+    regiao_comercializacao: Optional[str] = None
+    data_registro_ans: Optional[date] = None
@@ -0,0 +1,125 @@
+from fastapi import APIRouter, Query, Depends, HTTPException
+from typing import Annotated, Optional, Literal
+import asyncpg
+from logging import getLogger
+
+from ..services.analytics_service import (
+    top_expenses,
+    expense_totals,
+    DEFAULT_ACCOUNT,
+    PERIOD_QUARTER,
+    PERIOD_YEAR,
+)
+from ..models.analytics import TopExpensesResponse, ExpenseTotalsResponse
+from ..database import get_db_pool
+
+logger = getLogger(__name__)
+router = APIRouter(
+    prefix="/api/v1/analytics",
+    tags=["Analytics"],
+)
+
+AccountDep = Annotated[
+    str,
+    Query(
+        min_length=1,
+        description="Account code (CONTA_CONTABIL) or exact account description",
+    ),
+]
+TopNDep = Annotated[int, Query(ge=1, le=100, description="Number of operators to return")]
+YearDep = Annotated[Optional[int], Query(ge=1990, le=2100, description="Calendar year")]
+QuarterDep = Annotated[Optional[int], Query(ge=1, le=4, description="Quarter of the year (1-4)")]
+PoolDep = Annotated[asyncpg.Pool, Depends(get_db_pool)]
+
+
+async def _analytics_response(query, *args, **kwargs):
+    try:
+        return await query(*args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        logger.error(f"Analytics query failed: {e}")
+        raise HTTPException(
+            status_code=500, detail="Internal server error during analytics query."
+        )
+    except Exception as e:
+        logger.exception(f"Unexpected error during analytics query: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred.")
+
+
+@router.get(
+    "/top-expenses/quarter",
+    response_model=TopExpensesResponse,
+    summary="Top Operators by Expense in a Quarter",
+    description="Ranks operators by the summed final balance of an account in a quarter "
+    "(default: the latest loaded quarter). Results are cached until the next import.",
+)
+async def top_expenses_quarter(
+    pool: PoolDep,
+    year: YearDep = None,
+    quarter: QuarterDep = None,
+    account: AccountDep = DEFAULT_ACCOUNT,
+    limit: TopNDep = 10,
+):
+    logger.info(
+        f"Top expenses: period=quarter, year={year}, quarter={quarter}, "
+        f"account='{account}', limit={limit}"
+    )
+    return await _analytics_response(
+        top_expenses, pool, PERIOD_QUARTER, account, limit, year=year, quarter=quarter
+    )
+
+
+@router.get(
+    "/top-expenses/year",
+    response_model=TopExpensesResponse,
+    summary="Top Operators by Expense in a Year",
+    description="Ranks operators by the summed final balance of an account in a calendar year "
+    "(default: the last complete year before the latest loaded quarter). Results are cached "
+    "until the next import.",
+)
+async def top_expenses_year(
+    pool: PoolDep,
+    year: YearDep = None,
+    account: AccountDep = DEFAULT_ACCOUNT,
+    limit: TopNDep = 10,
+):
+    logger.info(f"Top expenses: period=year, year={year}, account='{account}', limit={limit}")
+    return await _analytics_response(top_expenses, pool, PERIOD_YEAR, account, limit, year=year)
+
+
+@router.get(
+    "/totals",
+    response_model=ExpenseTotalsResponse,
+    summary="Account Totals Grouped by Operator, UF or Modalidade",
+    description="Sums an account's final balance over a quarter or a year per operator, UF or "
+    "modalidade, largest first. Served from the in-process columnar copy when "
+    "ANALYTICS_IN_MEMORY is enabled and current, otherwise from Postgres.",
+)
+async def get_expense_totals(
+    pool: PoolDep,
+    period: Annotated[Literal["quarter", "year"], Query(description="Period length")] = "quarter",
+    group_by: Annotated[
+        Literal["operator", "uf", "modalidade"], Query(description="Grouping")
+    ] = "operator",
+    year: YearDep = None,
+    quarter: QuarterDep = None,
+    account: AccountDep = DEFAULT_ACCOUNT,
+    limit: TopNDep = 10,
+):
+    logger.info(
+        f"Expense totals: period={period}, group_by={group_by}, year={year}, "
+        f"quarter={quarter}, account='{account}', limit={limit}"
+    )
+    return await _analytics_response(
+        expense_totals,
+        pool,
+        period,
+        group_by,
+        account,
+        limit,
+        year=year,
+        quarter=quarter if period == PERIOD_QUARTER else None,
+    )
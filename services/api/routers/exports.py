@@ -0,0 +1,88 @@
+from fastapi import APIRouter, Query, Depends, Header
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Optional, Literal
+from datetime import date
+import asyncpg
+from logging import getLogger
+
+from ..services.export_service import (
+    stream_export,
+    demonstracoes_export_query,
+    OPERADORAS_EXPORT_QUERY,
+    MEDIA_TYPES,
+)
+from ..database import get_db_pool
+
+logger = getLogger(__name__)
+router = APIRouter(
+    prefix="/api/v1/exports",
+    tags=["Exports"],
+)
+
+FormatDep = Annotated[Literal["csv", "ndjson"], Query(description="Output format")]
+AcceptEncodingDep = Annotated[Optional[str], Header(include_in_schema=False)]
+PoolDep = Annotated[asyncpg.Pool, Depends(get_db_pool)]
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip().lower() == "gzip":
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0")
+    return False
+
+
+def _export_response(
+    pool: asyncpg.Pool, query: str, args: list, export_format: str, name: str, accept_encoding
+) -> StreamingResponse:
+    compress = _accepts_gzip(accept_encoding)
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(
+        stream_export(pool, query, args, export_format, compress=compress),
+        media_type=MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
+
+@router.get(
+    "/operadoras",
+    summary="Export All Operators",
+    description="Streams the operadoras table as CSV (';'-separated, with header) or NDJSON. "
+    "The body is gzip-compressed on the fly when the client sends Accept-Encoding: gzip.",
+)
+async def export_operadoras(
+    pool: PoolDep,
+    format: FormatDep = "csv",
+    accept_encoding: AcceptEncodingDep = None,
+):
+    logger.info(f"Export: operadoras, format={format}")
+    return _export_response(pool, OPERADORAS_EXPORT_QUERY, [], format, "operadoras", accept_encoding)
+
+
+@router.get(
+    "/demonstracoes",
+    summary="Export Accounting Balances",
+    description="Streams demonstracoes_contabeis rows (with account code and description) as CSV "
+    "or NDJSON, optionally filtered by operator, account and an inclusive date range. Rows are "
+    "read from a server-side cursor, so memory use does not grow with the export size.",
+)
+async def export_demonstracoes(
+    pool: PoolDep,
+    format: FormatDep = "csv",
+    registro_ans: Annotated[Optional[int], Query(ge=1, description="Operator's Registro ANS")] = None,
+    account: Annotated[
+        Optional[str], Query(min_length=1, description="Account code or exact description")
+    ] = None,
+    start_date: Annotated[Optional[date], Query(description="First DATA included")] = None,
+    end_date: Annotated[Optional[date], Query(description="Last DATA included")] = None,
+    accept_encoding: AcceptEncodingDep = None,
+):
+    logger.info(
+        f"Export: demonstracoes, format={format}, registro_ans={registro_ans}, "
+        f"account='{account}', start_date={start_date}, end_date={end_date}"
+    )
+    query, args = demonstracoes_export_query(registro_ans, account, start_date, end_date)
+    return _export_response(pool, query, args, format, "demonstracoes_contabeis", accept_encoding)
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
-from typing import Annotated
+from fastapi import APIRouter, Query, Path, Depends, HTTPException
+from typing import Annotated, Optional
+from datetime import date
 import asyncpg
 from logging import getLogger
 
-from ..services.search_service import search_operators_db
-from ..models.operator import OperatorSearchResponse
+from ..services.search_service import search_operators_cached, suggest_operators
+from ..services.search_cache import search_cache
+from ..services.financials_service import operator_financials_db
+from ..services.operator_service import get_operator_db, get_operator_by_cnpj_db
+from ..models.operator import OperatorSearchResponse, OperatorSuggestResponse, OperatorDetail
+from ..models.financials import OperatorFinancialsResponse
 from ..database import get_db_pool
 
 logger = getLogger(__name__)
@@ -33,28 +38,44 @@ OffsetDep = Annotated[
 ]
 # DB Pool dependency
 PoolDep = Annotated[asyncpg.Pool, Depends(get_db_pool)]
+# Path param 'registro_ans'
+RegistroAnsDep = Annotated[int, Path(ge=1, description="Operator's Registro ANS")]
+# Opaque keyset pagination token returned as 'next_cursor'
+CursorDep = Annotated[
+    Optional[str], Query(description="Cursor from the previous page's next_cursor")
+]
 
 
 @router.get(
     "/search",
     response_model=OperatorSearchResponse,
     summary="Search Registered Operators",
-    description="Performs a full-text search across Operator Name, Trading Name, CNPJ, and City. Returns relevant operators sorted by rank.",
+    description="Performs a full-text search across Operator Name, Trading Name, CNPJ, and City. Returns relevant operators sorted by rank. "
+    "Page with offset, or pass the response's next_cursor as cursor for keyset paging.",
 )
 async def search_operators(
     q: QueryDep,
     pool: PoolDep,
     limit: LimitDep = 20,
     offset: OffsetDep = 0,
+    cursor: CursorDep = None,
 ):
     """
     Searches for registered operators based on a query string.
     # ... (rest of docstring)
     """
-    logger.info(f"Searching operators with query='{q}', limit={limit}, offset={offset}")
+    logger.info(
+        f"Searching operators with query='{q}', limit={limit}, offset={offset}, cursor={cursor}"
+    )
     try:
-        total, results = await search_operators_db(pool, q, limit, offset)
-        return OperatorSearchResponse(total_count=total, results=results)
+        total, results, next_cursor = await search_operators_cached(
+            pool, q, limit, offset, cursor=cursor
+        )
+        return OperatorSearchResponse(
+            total_count=total, results=results, next_cursor=next_cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except RuntimeError as e:
         logger.error(f"Search failed: {e}")
         raise HTTPException(
@@ -63,3 +84,133 @@ async def search_operators(
     except Exception as e:
         logger.exception(f"Unexpected error during search: {e}")
         raise HTTPException(status_code=500, detail="An unexpected error occurred.")
+
+
+@router.get(
+    "/suggest",
+    response_model=OperatorSuggestResponse,
+    summary="Autocomplete Operator Names",
+    description="Returns the operators whose name or trading name starts with, contains or "
+    "resembles the typed text (pg_trgm), prefix matches first. Meant for typeahead.",
+)
+async def suggest(
+    pool: PoolDep,
+    q: Annotated[str, Query(min_length=1, max_length=100, description="Partially typed name")],
+    limit: Annotated[int, Query(ge=1, le=20, description="Number of suggestions")] = 8,
+):
+    try:
+        results = await suggest_operators(pool, q, limit)
+        return OperatorSuggestResponse(query=q, results=results)
+    except RuntimeError as e:
+        logger.error(f"Suggest failed: {e}")
+        raise HTTPException(
+            status_code=500, detail="Internal server error during suggest."
+        )
+    except Exception as e:
+        logger.exception(f"Unexpected error during suggest: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred.")
+
+
+@router.get(
+    "/search/cache-stats",
+    summary="Search Cache Statistics",
+    description="Size, hit/miss counters and dataset version of the in-process search cache.",
+)
+async def search_cache_stats():
+    return search_cache.stats()
+
+
+@router.get(
+    "/{registro_ans}/financials",
+    response_model=OperatorFinancialsResponse,
+    summary="Operator Financial Time Series",
+    description="Returns an operator's accounting balances ordered by date and account, "
+    "optionally filtered by account (code or description) and an inclusive date range. "
+    "Pages are keyset-based: pass the response's next_cursor as cursor.",
+)
+async def get_operator_financials(
+    registro_ans: RegistroAnsDep,
+    pool: PoolDep,
+    cursor: CursorDep = None,
+    account: Annotated[
+        Optional[str], Query(min_length=1, description="Account code or exact description")
+    ] = None,
+    start_date: Annotated[Optional[date], Query(description="First date (inclusive)")] = None,
+    end_date: Annotated[Optional[date], Query(description="Last date (inclusive)")] = None,
+    limit: Annotated[
+        int, Query(ge=1, le=1000, description="Number of rows to return per page")
+    ] = 100,
+):
+    logger.info(
+        f"Fetching financials of operator {registro_ans}: account={account}, "
+        f"start_date={start_date}, end_date={end_date}, limit={limit}, cursor={cursor}"
+    )
+    try:
+        results, next_cursor = await operator_financials_db(
+            pool,
+            registro_ans,
+            limit,
+            cursor=cursor,
+            account=account,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        return OperatorFinancialsResponse(
+            registro_ans=registro_ans, results=results, next_cursor=next_cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        logger.error(f"Financials query failed: {e}")
+        raise HTTPException(
+            status_code=500, detail="Internal server error fetching financials."
+        )
+    except Exception as e:
+        logger.exception(f"Unexpected error fetching financials: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred.")
+
+
+async def _operator_response(lookup, *args):
+    try:
+        return await lookup(*args)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        logger.error(f"Operator lookup failed: {e}")
+        raise HTTPException(
+            status_code=500, detail="Internal server error fetching operator."
+        )
+    except Exception as e:
+        logger.exception(f"Unexpected error fetching operator: {e}")
+        raise HTTPException(status_code=500, detail="An unexpected error occurred.")
+
+
+# Declared after /search and /suggest so those paths are not read as IDs
+@router.get(
+    "/by-cnpj/{cnpj:path}",
+    response_model=OperatorDetail,
+    summary="Get Operator by CNPJ",
+    description="Returns the registration record of the operator with a CNPJ, given as 14 "
+    "digits or formatted (12.345.678/0001-90).",
+)
+async def get_operator_by_cnpj(
+    cnpj: Annotated[str, Path(description="CNPJ, with or without punctuation")],
+    pool: PoolDep,
+):
+    logger.info(f"Fetching operator by CNPJ {cnpj}")
+    return await _operator_response(get_operator_by_cnpj_db, pool, cnpj)
+
+
+@router.get(
+    "/{registro_ans}",
+    response_model=OperatorDetail,
+    summary="Get Operator by Registro ANS",
+    description="Returns the registration record of an operator by its Registro ANS.",
+)
+async def get_operator(registro_ans: RegistroAnsDep, pool: PoolDep):
+    logger.info(f"Fetching operator {registro_ans}")
+    return await _operator_response(get_operator_db, pool, registro_ans)
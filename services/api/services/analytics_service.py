@@ -0,0 +1,224 @@
+import asyncpg
+from datetime import date
+from typing import List, Optional, Tuple
+from logging import getLogger
+from ..models.analytics import (
+    TopExpenseResult,
+    TopExpensesResponse,
+    ExpenseTotal,
+    ExpenseTotalsResponse,
+)
+from .dataset_version import dataset_version
+from .columnar_store import columnar_store, GROUP_OPERATOR, GROUP_UF, GROUP_MODALIDADE
+
+logger = getLogger(__name__)
+
+# --- Analytics Configuration ---
+PERIOD_QUARTER = "quarter"
+PERIOD_YEAR = "year"
+DEFAULT_ACCOUNT = (
+    "EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS  DE ASSISTÊNCIA A SAÚDE MEDICO HOSPITALAR"
+)
+MAX_CACHED_RANKINGS = 256  # Rankings kept per dataset version
+SOURCE_MEMORY = "memory"
+SOURCE_DATABASE = "database"
+# ---
+
+# (key, label) columns per grouping for the SQL path
+GROUP_COLUMNS = {
+    GROUP_OPERATOR: ("st.registro_ans", "op.razao_social"),
+    GROUP_UF: ("op.uf", "op.uf"),
+    GROUP_MODALIDADE: ("op.modalidade", "op.modalidade"),
+}
+
+# Reads the saldos_trimestrais rollup maintained by the importer. The account
+# matches either its code or its description in contas_contabeis (compared
+# upper-cased with single spaces, as the in-memory store does), and
+# the period is a half-open DATA range, so the aggregation is a range scan of
+# the rollup's (CONTA_ID, DATA, REGISTRO_ANS) primary key.
+TOTALS_QUERY = r"""
+    SELECT
+        {key} AS key, {label} AS label,
+        SUM(st.vl_saldo_final) AS total
+    FROM saldos_trimestrais st
+    JOIN operadoras op ON op.registro_ans = st.registro_ans
+    WHERE
+        st.data >= $1 AND st.data < $2
+        AND st.conta_id IN (
+            SELECT conta_id FROM contas_contabeis
+            WHERE conta_contabil = $3
+               OR regexp_replace(upper(descricao), '\s+', ' ', 'g')
+                  = regexp_replace(upper($3), '\s+', ' ', 'g')
+        )
+    GROUP BY 1, 2
+    ORDER BY total DESC, key
+    LIMIT $4;
+"""
+
+# Results of the current dataset version; cleared when the version changes
+_cache = {}
+_cache_version = None
+
+
+def _period_bounds(
+    period: str, latest: date, year: Optional[int], quarter: Optional[int]
+) -> Tuple[date, date]:
+    """
+    Half-open [start, end) range of the requested period. Without year (and
+    quarter) it is the latest loaded quarter, or the last complete year
+    before the latest loaded date, as in sql/03 and sql/04.
+    """
+    if period == PERIOD_YEAR:
+        target_year = year if year is not None else latest.year - 1
+        return date(target_year, 1, 1), date(target_year + 1, 1, 1)
+    if (year is None) != (quarter is None):
+        raise ValueError("year and quarter must be given together.")
+    if year is None:
+        year, quarter = latest.year, (latest.month - 1) // 3 + 1
+    start = date(year, 3 * (quarter - 1) + 1, 1)
+    end = date(year + 1, 1, 1) if quarter == 4 else date(year, start.month + 3, 1)
+    return start, end
+
+
+async def _fetch_totals(
+    pool: asyncpg.Pool,
+    period: str,
+    account: str,
+    group_by: str,
+    limit: int,
+    year: Optional[int],
+    quarter: Optional[int],
+) -> Tuple[date, date, List[Tuple], str]:
+    async with pool.acquire() as connection:
+        latest = await connection.fetchval("SELECT MAX(data) FROM saldos_trimestrais;")
+        if latest is None:
+            raise LookupError("No accounting data has been imported yet.")
+        start, end = _period_bounds(period, latest, year, quarter)
+        key, label = GROUP_COLUMNS[group_by]
+        records = await connection.fetch(
+            TOTALS_QUERY.format(key=key, label=label), start, end, account, limit
+        )
+    rows = [(record["key"], record["label"], float(record["total"] or 0)) for record in records]
+    return start, end, rows, SOURCE_DATABASE
+
+
+async def _compute_totals(
+    pool: asyncpg.Pool,
+    period: str,
+    account: str,
+    group_by: str,
+    limit: int,
+    year: Optional[int],
+    quarter: Optional[int],
+    version: int,
+) -> Tuple[date, date, List[Tuple], str]:
+    """
+    Computes (start, end, [(key, label, total)], source) from the in-memory
+    columns when they hold the current dataset version, else in Postgres.
+    """
+    snapshot = columnar_store.current(version)
+    if snapshot is not None:
+        if snapshot.latest_date is None:
+            raise LookupError("No accounting data has been imported yet.")
+        start, end = _period_bounds(period, snapshot.latest_date, year, quarter)
+        rows = snapshot.aggregate(account, start, end, group_by=group_by, limit=limit)
+        return start, end, rows, SOURCE_MEMORY
+    try:
+        return await _fetch_totals(pool, period, account, group_by, limit, year, quarter)
+    except (ValueError, LookupError):
+        raise
+    except Exception as e:
+        logger.exception(f"Database error computing totals for {account}: {e}")
+        raise RuntimeError(f"Database error during analytics query: {e}")
+
+
+async def _cached(pool: asyncpg.Pool, key: Tuple, compute):
+    """Returns the cached value for key under the current dataset version, computing it on a miss."""
+    global _cache_version
+    version = await dataset_version.current(pool)
+    if version != _cache_version:
+        _cache.clear()
+        _cache_version = version
+
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    value = await compute(version)
+    if len(_cache) >= MAX_CACHED_RANKINGS:
+        _cache.pop(next(iter(_cache)))  # Drop the oldest entry
+    _cache[key] = value
+    return value
+
+
+async def top_expenses(
+    pool: asyncpg.Pool,
+    period: str,
+    account: str = DEFAULT_ACCOUNT,
+    limit: int = 10,
+    year: Optional[int] = None,
+    quarter: Optional[int] = None,
+) -> TopExpensesResponse:
+    """
+    Top operators by the summed final balance of an account over a quarter
+    or a year. Results are cached in-process until the importer bumps the
+    dataset version. Raises ValueError for invalid periods and LookupError
+    when no data was imported; database failures become RuntimeError.
+    """
+    account = account.strip()
+
+    async def compute(version):
+        start, end, rows, _ = await _compute_totals(
+            pool, period, account, GROUP_OPERATOR, limit, year, quarter, version
+        )
+        return TopExpensesResponse(
+            period=period,
+            start_date=start,
+            end_date=end,
+            account=account,
+            dataset_version=version,
+            results=[
+                TopExpenseResult(registro_ans=key, razao_social=label, total_despesa=total)
+                for key, label, total in rows
+            ],
+        )
+
+    return await _cached(pool, ("top", period, account, limit, year, quarter), compute)
+
+
+async def expense_totals(
+    pool: asyncpg.Pool,
+    period: str,
+    group_by: str,
+    account: str = DEFAULT_ACCOUNT,
+    limit: int = 10,
+    year: Optional[int] = None,
+    quarter: Optional[int] = None,
+) -> ExpenseTotalsResponse:
+    """
+    Summed final balance of an account per operator, UF or modalidade over
+    a quarter or a year, largest first. Same caching and errors as
+    top_expenses.
+    """
+    account = account.strip()
+
+    async def compute(version):
+        start, end, rows, source = await _compute_totals(
+            pool, period, account, group_by, limit, year, quarter, version
+        )
+        return ExpenseTotalsResponse(
+            period=period,
+            start_date=start,
+            end_date=end,
+            account=account,
+            group_by=group_by,
+            dataset_version=version,
+            source=source,
+            results=[
+                ExpenseTotal(key=str(key) if key is not None else "", label=label, total=total)
+                for key, label, total in rows
+            ],
+        )
+
+    return await _cached(
+        pool, ("totals", period, group_by, account, limit, year, quarter), compute
+    )
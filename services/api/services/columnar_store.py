@@ -0,0 +1,302 @@
+import os
+import re
+import time
+import asyncio
+import asyncpg
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from logging import getLogger
+from .dataset_version import dataset_version
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; analytics then always run in Postgres
+    np = None
+
+logger = getLogger(__name__)
+
+# --- Columnar Analytics Configuration ---
+ENABLED = os.getenv("ANALYTICS_IN_MEMORY", "false").lower() in ("1", "true", "yes")
+LOAD_BATCH_ROWS = 100000  # Rows fetched per round-trip while loading
+REFRESH_INTERVAL_SECONDS = 30.0  # How often the background task checks the dataset version
+EPOCH = date(1970, 1, 1)  # DATA is stored as int32 days since this date
+GROUP_OPERATOR = "operator"
+GROUP_UF = "uf"
+GROUP_MODALIDADE = "modalidade"
+# ---
+
+LOAD_QUERY = """
+    SELECT
+        (data - DATE '1970-01-01')::int,
+        registro_ans,
+        conta_id,
+        (vl_saldo_inicial * 100)::bigint,
+        (vl_saldo_final * 100)::bigint
+    FROM demonstracoes_contabeis;
+"""
+
+
+def _normalize_description(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip()).upper()
+
+
+def _days(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def _fill_columns(columns: Dict[str, "np.ndarray"], start: int, batch: List[asyncpg.Record]) -> int:
+    """Copies a batch of LOAD_QUERY records into the columns from row start; returns its size."""
+    # NULL balances count as 0, as they do in SQL SUMs
+    block = np.array(
+        [tuple(0 if value is None else value for value in record) for record in batch],
+        dtype=np.int64,
+    )
+    for index, column in enumerate(columns.values()):
+        column[start : start + len(batch)] = block[:, index]
+    return len(batch)
+
+
+class ColumnarSnapshot:
+    """
+    One immutable copy of demonstracoes_contabeis as NumPy columns, sorted by
+    (CONTA_ID, DATA): DATA as int32 days, REGISTRO_ANS and CONTA_ID as int32,
+    balances as int64 cents. An account's rows in a date range are found
+    with two binary searches, so an aggregation only touches those rows.
+    """
+
+    def __init__(self, version, columns, accounts, operators):
+        self.version = version
+        order = np.lexsort((columns["data"], columns["conta_id"]))
+        self.data = columns["data"][order]
+        self.registro_ans = columns["registro_ans"][order]
+        self.conta_id = columns["conta_id"][order]
+        self.saldo_inicial = columns["saldo_inicial"][order]
+        self.saldo_final = columns["saldo_final"][order]
+        self.rows = len(self.data)
+        self.latest_date = EPOCH + timedelta(days=int(self.data.max())) if self.rows else None
+
+        # Row range [start, end) of each account in the sorted columns
+        ids, starts = np.unique(self.conta_id, return_index=True)
+        ends = np.append(starts[1:], self.rows)
+        self._account_rows = {int(i): (int(s), int(e)) for i, s, e in zip(ids, starts, ends)}
+
+        # Account code / normalized description -> CONTA_IDs
+        self._accounts_by_key: Dict[str, List[int]] = {}
+        for conta_id, code, description in accounts:
+            for key in (code.strip(), _normalize_description(description)):
+                self._accounts_by_key.setdefault(key, []).append(conta_id)
+
+        # Per grouping: group code of every REGISTRO_ANS (-1 = unknown operator) and labels
+        max_registro = max(
+            [row[0] for row in operators] + [int(self.registro_ans.max()) if self.rows else 0]
+        )
+        self._groups = {}
+        self._groups[GROUP_OPERATOR] = self._group_codes(
+            max_registro, operators, lambda row: row[0], lambda row: row[1]
+        )
+        for group_by, column in ((GROUP_UF, 2), (GROUP_MODALIDADE, 3)):
+            # Missing values stay None and sort last, like the NULL group in SQL
+            labels = sorted(
+                {row[column] for row in operators}, key=lambda label: (label is None, label or "")
+            )
+            label_codes = {label: code for code, label in enumerate(labels)}
+            self._groups[group_by] = self._group_codes(
+                max_registro,
+                operators,
+                lambda row, column=column: label_codes[row[column]],
+                None,
+                labels,
+            )
+
+    @staticmethod
+    def _group_codes(max_registro, operators, code_of, label_of, labels=None):
+        codes = np.full(max_registro + 1, -1, dtype=np.int64)
+        names = {} if labels is None else dict(enumerate(labels))
+        for row in operators:
+            codes[row[0]] = code_of(row)
+            if label_of is not None:
+                names[code_of(row)] = label_of(row)
+        return codes, names
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            column.nbytes
+            for column in (
+                self.data,
+                self.registro_ans,
+                self.conta_id,
+                self.saldo_inicial,
+                self.saldo_final,
+            )
+        )
+
+    def account_ids(self, account: str) -> List[int]:
+        """CONTA_IDs of an account code or description (compared normalized)."""
+        ids = set(self._accounts_by_key.get(account.strip(), []))
+        ids.update(self._accounts_by_key.get(_normalize_description(account), []))
+        return sorted(ids)
+
+    def aggregate(
+        self,
+        account: str,
+        start: date,
+        end: date,
+        group_by: str = GROUP_OPERATOR,
+        limit: int = 10,
+        measure: str = "saldo_final",
+    ) -> List[Tuple[object, Optional[str], float]]:
+        """
+        Top groups by the summed measure of an account over [start, end):
+        a list of (group key, label, total in reais), largest first.
+        """
+        start_day, end_day = _days(start), _days(end)
+        values = getattr(self, measure)
+        slices = []
+        for conta_id in self.account_ids(account):
+            first, last = self._account_rows.get(conta_id, (0, 0))
+            dates = self.data[first:last]
+            lo = first + int(np.searchsorted(dates, start_day, side="left"))
+            hi = first + int(np.searchsorted(dates, end_day, side="left"))
+            if hi > lo:
+                slices.append(slice(lo, hi))
+        if not slices:
+            return []
+
+        registros = np.concatenate([self.registro_ans[s] for s in slices])
+        amounts = np.concatenate([values[s] for s in slices])
+        codes, names = self._groups[group_by]
+        group_codes = codes[registros]
+        # Operators missing from operadoras are dropped, as by the SQL join
+        present = group_codes >= 0
+        group_codes, amounts = group_codes[present], amounts[present]
+        if not len(group_codes):
+            return []
+
+        # Summed as int64 cents: float64 weights would round totals above 2^53 cents
+        totals = np.zeros(int(group_codes.max()) + 1, dtype=np.int64)
+        np.add.at(totals, group_codes, amounts)
+        has_rows = np.bincount(group_codes) > 0
+        candidates = np.flatnonzero(has_rows)
+        if len(candidates) > limit:
+            # argpartition picks the top `limit` without sorting every group
+            candidates = candidates[np.argpartition(-totals[candidates], limit - 1)[:limit]]
+        ranked = sorted(candidates.tolist(), key=lambda code: (-totals[code], code))
+        labels = [names.get(code) for code in ranked]
+        keys = ranked if group_by == GROUP_OPERATOR else labels
+        return [
+            # int / int is correctly rounded, as float() of the SQL NUMERIC sum is
+            (key, label, int(totals[code]) / 100)
+            for key, label, code in zip(keys, labels, ranked)
+        ]
+
+
+class ColumnarStore:
+    """
+    Holds the current ColumnarSnapshot. A reload builds a complete new
+    snapshot and then swaps the reference, so requests always see one
+    consistent version. A background task reloads when the importer bumps
+    the dataset version.
+    """
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled and np is not None
+        self.snapshot: Optional[ColumnarSnapshot] = None
+        self._load_lock = asyncio.Lock()
+        self._refresh_task = None
+        if enabled and np is None:
+            logger.warning("ANALYTICS_IN_MEMORY is set but numpy is not installed; disabled.")
+
+    def current(self, version: int) -> Optional[ColumnarSnapshot]:
+        """The loaded snapshot if it matches the given dataset version, else None."""
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+        return None
+
+    async def _read(self, pool: asyncpg.Pool):
+        async with pool.acquire() as connection:
+            # One snapshot for the rows, dimensions and version they belong to
+            async with connection.transaction(isolation="repeatable_read", readonly=True):
+                version = await connection.fetchval("SELECT version FROM dataset_version;") or 0
+                row_count = await connection.fetchval(
+                    "SELECT count(*) FROM demonstracoes_contabeis;"
+                )
+                accounts = await connection.fetch(
+                    "SELECT conta_id, conta_contabil, descricao FROM contas_contabeis;"
+                )
+                operators = await connection.fetch(
+                    "SELECT registro_ans, razao_social, uf, modalidade FROM operadoras;"
+                )
+                columns = {
+                    "data": np.empty(row_count, dtype=np.int32),
+                    "registro_ans": np.empty(row_count, dtype=np.int32),
+                    "conta_id": np.empty(row_count, dtype=np.int32),
+                    "saldo_inicial": np.empty(row_count, dtype=np.int64),
+                    "saldo_final": np.empty(row_count, dtype=np.int64),
+                }
+                filled = 0
+                cursor = await connection.cursor(LOAD_QUERY)
+                while filled < row_count:
+                    batch = await cursor.fetch(LOAD_BATCH_ROWS)
+                    if not batch:
+                        break
+                    # Only the fetch runs on the event loop; the per-row conversion does not
+                    filled += await asyncio.to_thread(_fill_columns, columns, filled, batch)
+        columns = {name: column[:filled] for name, column in columns.items()}
+        return version, columns, [tuple(row) for row in accounts], [tuple(row) for row in operators]
+
+    async def load(self, pool: asyncpg.Pool) -> Optional[ColumnarSnapshot]:
+        """Loads a fresh snapshot and swaps it in. Concurrent calls share one load."""
+        if not self.enabled:
+            return None
+        async with self._load_lock:
+            started = time.perf_counter()
+            version, columns, accounts, operators = await self._read(pool)
+            if self.snapshot is not None and self.snapshot.version == version:
+                return self.snapshot
+            # Sorting and indexing run off the event loop
+            snapshot = await asyncio.to_thread(ColumnarSnapshot, version, columns, accounts, operators)
+            self.snapshot = snapshot
+            logger.info(
+                f"Loaded {snapshot.rows} accounting rows into memory "
+                f"({snapshot.nbytes / 1e6:.1f} MB, dataset version {version}) "
+                f"in {time.perf_counter() - started:.1f}s."
+            )
+            return snapshot
+
+    async def _refresh_loop(self, pool: asyncpg.Pool, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                version = await dataset_version.current(pool)
+                if self.current(version) is None:
+                    logger.info(f"Dataset version {version} differs from the loaded one; reloading.")
+                    await self.load(pool)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"In-memory analytics reload failed, keeping the old copy: {e}")
+
+    async def start(self, pool: asyncpg.Pool, interval: float = REFRESH_INTERVAL_SECONDS):
+        """Initial load plus the background refresh task (called from the app lifespan)."""
+        if not self.enabled:
+            return
+        try:
+            await self.load(pool)
+        except Exception as e:
+            logger.exception(f"In-memory analytics load failed; serving from Postgres: {e}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop(pool, interval))
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        self.snapshot = None
+
+
+columnar_store = ColumnarStore()
@@ -0,0 +1,55 @@
+import time
+import asyncio
+import asyncpg
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+# --- Dataset Version Configuration ---
+DATASET_VERSION_TABLE = "dataset_version"  # Bumped by services/database/importer.py
+POLL_INTERVAL_SECONDS = 5.0  # How long a read version is trusted before re-polling
+# ---
+
+
+class DatasetVersion:
+    """
+    Tracks the dataset version the importer bumps after every committed load.
+    The value is polled from the database at most once per poll_interval, so
+    in-process caches keyed on it cost one primary-key lookup every few
+    seconds instead of one query per request.
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.poll_interval = poll_interval
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _fetch(self, pool: asyncpg.Pool) -> int:
+        try:
+            version = await pool.fetchval(f"SELECT version FROM {DATASET_VERSION_TABLE};")
+        except asyncpg.exceptions.UndefinedTableError:
+            logger.warning(
+                f"Table {DATASET_VERSION_TABLE} not found; run the importer to create it. "
+                "Caches keyed on the dataset version will not be invalidated."
+            )
+            version = None
+        return version or 0
+
+    async def current(self, pool: asyncpg.Pool) -> int:
+        """Returns the dataset version, re-reading it once the poll interval elapsed."""
+        if self._version is not None and time.monotonic() - self._checked_at < self.poll_interval:
+            return self._version
+        async with self._lock:
+            # Another request may have refreshed it while we waited
+            if self._version is None or time.monotonic() - self._checked_at >= self.poll_interval:
+                version = await self._fetch(pool)
+                if self._version is not None and version != self._version:
+                    logger.info(f"Dataset version changed: {self._version} -> {version}")
+                self._version = version
+                self._checked_at = time.monotonic()
+        return self._version
+
+
+# Shared by every service that caches query results
+dataset_version = DatasetVersion()
@@ -0,0 +1,131 @@
+import io
+import csv
+import json
+import zlib
+import asyncpg
+from datetime import date
+from decimal import Decimal
+from typing import AsyncIterator, Optional
+from logging import getLogger
+from .financials_service import demonstracoes_filters
+
+logger = getLogger(__name__)
+
+# --- Export Configuration ---
+FORMAT_CSV = "csv"
+FORMAT_NDJSON = "ndjson"
+MEDIA_TYPES = {FORMAT_CSV: "text/csv; charset=utf-8", FORMAT_NDJSON: "application/x-ndjson"}
+FETCH_BATCH_ROWS = 5000  # Rows per round-trip from the server-side cursor
+CHUNK_BYTES = 64 * 1024  # Encoded bytes collected before each chunk is sent
+GZIP_LEVEL = 6
+# ---
+
+OPERADORAS_EXPORT_QUERY = """
+    SELECT
+        registro_ans, cnpj, razao_social, nome_fantasia, modalidade,
+        logradouro, numero, complemento, bairro, cidade, uf, cep, ddd,
+        telefone, fax, endereco_eletronico, representante, cargo_representante,
+        regiao_comercializacao, data_registro_ans
+    FROM operadoras
+    ORDER BY registro_ans;
+"""
+
+
+def demonstracoes_export_query(
+    registro_ans: Optional[int] = None,
+    account: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    """Returns (query, args) for a filtered demonstracoes_contabeis export."""
+    conditions, args = demonstracoes_filters(registro_ans, account, start_date, end_date)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"""
+        SELECT
+            dc.data, dc.registro_ans, cc.conta_contabil, cc.descricao,
+            dc.vl_saldo_inicial, dc.vl_saldo_final
+        FROM demonstracoes_contabeis dc
+        JOIN contas_contabeis cc ON cc.conta_id = dc.conta_id
+        {where};
+    """
+    return query, args
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class _RowEncoder:
+    """Encodes records as CSV (header first) or NDJSON lines into a text buffer."""
+
+    def __init__(self, export_format: str):
+        self.export_format = export_format
+        self.buffer = io.StringIO()
+        self._writer = csv.writer(self.buffer, delimiter=";") if export_format == FORMAT_CSV else None
+        self._header_written = False
+
+    def write(self, record):
+        if self._writer is not None:
+            if not self._header_written:
+                self._writer.writerow(record.keys())
+                self._header_written = True
+            self._writer.writerow(record.values())
+        else:
+            self.buffer.write(
+                json.dumps(
+                    {key: _json_value(value) for key, value in record.items()},
+                    ensure_ascii=False,
+                )
+            )
+            self.buffer.write("\n")
+
+    def take(self) -> bytes:
+        data = self.buffer.getvalue().encode("utf-8")
+        self.buffer.seek(0)
+        self.buffer.truncate(0)
+        return data
+
+
+async def stream_export(
+    pool: asyncpg.Pool,
+    query: str,
+    args: list,
+    export_format: str,
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Streams a query as CSV or NDJSON bytes, optionally gzip-compressed on
+    the fly. Rows come from a server-side cursor inside a read-only
+    transaction, FETCH_BATCH_ROWS at a time, and are sent in ~CHUNK_BYTES
+    chunks, so memory use does not depend on the result size. The pooled
+    connection is held until the stream ends or the client disconnects.
+    """
+    encoder = _RowEncoder(export_format)
+    # wbits=31: zlib stream with a gzip header and trailer
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+    rows = 0
+    try:
+        async with pool.acquire() as connection:
+            async with connection.transaction(readonly=True):
+                async for record in connection.cursor(query, *args, prefetch=FETCH_BATCH_ROWS):
+                    encoder.write(record)
+                    rows += 1
+                    if encoder.buffer.tell() >= CHUNK_BYTES:
+                        data = encoder.take()
+                        data = compressor.compress(data) if compressor else data
+                        if data:
+                            yield data
+        data = encoder.take()
+        if compressor:
+            data = compressor.compress(data) + compressor.flush()
+        if data:
+            yield data
+        logger.info(f"Export finished: {rows} rows ({export_format}, gzip={compress}).")
+    except Exception as e:
+        # Headers are already sent; the client sees a truncated body
+        logger.exception(f"Export aborted after {rows} rows: {e}")
+        raise
@@ -0,0 +1,142 @@
+import asyncpg
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+from logging import getLogger
+from ..models.financials import FinancialEntry
+from .pagination import encode_cursor, decode_cursor
+
+logger = getLogger(__name__)
+
+# --- Financials Configuration ---
+FETCH_BATCH_ROWS = 100  # Rows per round-trip from the server-side cursor
+# ---
+
+
+def demonstracoes_filters(
+    registro_ans: Optional[int] = None,
+    account: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Tuple[List[str], list]:
+    """
+    WHERE conditions (on alias dc) and their positional arguments for the
+    common demonstracoes_contabeis filters: operator, account code or exact
+    description, and an inclusive date range turned into a half-open one.
+    """
+    conditions = []
+    args = []
+
+    def bind(value):
+        args.append(value)
+        return f"${len(args)}"
+
+    if registro_ans is not None:
+        conditions.append(f"dc.registro_ans = {bind(registro_ans)}")
+    if start_date is not None:
+        conditions.append(f"dc.data >= {bind(start_date)}")
+    if end_date is not None:
+        # Half-open bound keeps the predicate a plain range on DATA
+        conditions.append(f"dc.data < {bind(end_date + timedelta(days=1))}")
+    if account:
+        account_param = bind(account.strip())
+        conditions.append(
+            f"""dc.conta_id IN (
+                SELECT conta_id FROM contas_contabeis
+                WHERE conta_contabil = {account_param} OR descricao = {account_param}
+            )"""
+        )
+    return conditions, args
+
+
+async def operator_financials_db(
+    pool: asyncpg.Pool,
+    registro_ans: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    account: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Tuple[List[FinancialEntry], Optional[str]]:
+    """
+    One page of an operator's balances, ordered by (DATA, account).
+    Pages are keyset-based: cursor encodes the (DATA, CONTA_ID, ID) of the
+    previous page's last row and the query seeks past it on
+    idx_demonstracoes_reg_ans (REGISTRO_ANS, DATA, CONTA_ID, ID), so deep
+    pages cost the same as the first. The date range is inclusive; account
+    matches a code or an exact description. Returns (results, next_cursor).
+    Raises ValueError for a malformed cursor and LookupError for an
+    unknown operator.
+    """
+    conditions, args = demonstracoes_filters(registro_ans, account, start_date, end_date)
+
+    def bind(value):
+        args.append(value)
+        return f"${len(args)}"
+
+    if cursor:
+        last_data, last_conta_id, last_id = decode_cursor(cursor, 3)
+        try:
+            last_key = (date.fromisoformat(last_data), int(last_conta_id), int(last_id))
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor.")
+        conditions.append(
+            f"(dc.data, dc.conta_id, dc.id) > ({bind(last_key[0])}, {bind(last_key[1])}, {bind(last_key[2])})"
+        )
+
+    query = f"""
+        SELECT
+            dc.data, cc.conta_contabil, cc.descricao,
+            dc.vl_saldo_inicial, dc.vl_saldo_final,
+            dc.conta_id, dc.id
+        FROM demonstracoes_contabeis dc
+        JOIN contas_contabeis cc ON cc.conta_id = dc.conta_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY dc.data, dc.conta_id, dc.id
+        LIMIT {bind(limit + 1)};
+    """
+
+    try:
+        records = []
+        async with pool.acquire() as connection:
+            # asyncpg cursors need a transaction; rows arrive FETCH_BATCH_ROWS at a time
+            async with connection.transaction():
+                async for record in connection.cursor(query, *args, prefetch=FETCH_BATCH_ROWS):
+                    records.append(record)
+            if not records and not cursor:
+                exists = await connection.fetchval(
+                    "SELECT EXISTS (SELECT 1 FROM operadoras WHERE registro_ans = $1);",
+                    registro_ans,
+                )
+                if not exists:
+                    raise LookupError(f"Operator {registro_ans} not found.")
+    except LookupError:
+        raise
+    except Exception as e:
+        logger.exception(
+            f"Database error fetching financials of operator {registro_ans}: {e}"
+        )
+        raise RuntimeError(f"Database error fetching financials: {e}")
+
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        last = records[-1]
+        next_cursor = encode_cursor([last["data"].isoformat(), last["conta_id"], last["id"]])
+
+    results = [
+        FinancialEntry(
+            data=record["data"],
+            conta_contabil=record["conta_contabil"],
+            descricao=record["descricao"],
+            vl_saldo_inicial=(
+                float(record["vl_saldo_inicial"])
+                if record["vl_saldo_inicial"] is not None
+                else None
+            ),
+            vl_saldo_final=(
+                float(record["vl_saldo_final"]) if record["vl_saldo_final"] is not None else None
+            ),
+        )
+        for record in records
+    ]
+    return results, next_cursor
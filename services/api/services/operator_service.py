@@ -0,0 +1,55 @@
+import re
+import asyncpg
+from logging import getLogger
+from ..models.operator import OperatorDetail
+from .search_cache import search_cache
+
+logger = getLogger(__name__)
+
+# Equality lookups served by the operadoras primary key / CNPJ unique index
+OPERATOR_QUERY = """
+    SELECT
+        registro_ans, cnpj::text AS cnpj, razao_social, nome_fantasia, modalidade,
+        logradouro, numero, complemento, bairro, cidade, uf, cep, ddd,
+        telefone, fax, endereco_eletronico, representante, cargo_representante,
+        regiao_comercializacao, data_registro_ans
+    FROM operadoras
+    WHERE {column} = $1;
+"""
+
+_CNPJ = re.compile(r"^\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}$")
+
+
+def parse_cnpj(text: str) -> int:
+    """CNPJ typed with or without punctuation (12.345.678/0001-90) as stored (BIGINT)."""
+    text = text.strip()
+    if not _CNPJ.match(text):
+        raise ValueError(f"Invalid CNPJ: '{text}'. Expected 14 digits, optionally formatted.")
+    return int(re.sub(r"\D", "", text))
+
+
+async def _operator_by(pool: asyncpg.Pool, column: str, value: int) -> OperatorDetail:
+    async def compute():
+        try:
+            record = await pool.fetchrow(OPERATOR_QUERY.format(column=column), value)
+        except Exception as e:
+            logger.exception(f"Database error fetching operator by {column}={value}: {e}")
+            raise RuntimeError(f"Database error fetching operator: {e}")
+        if record is None:
+            raise LookupError(f"Operator with {column} {value} not found.")
+        return OperatorDetail.model_validate(dict(record))
+
+    return await search_cache.get_or_compute(pool, ("operator", column, value), compute)
+
+
+async def get_operator_db(pool: asyncpg.Pool, registro_ans: int) -> OperatorDetail:
+    """Full registration record of an operator. Raises LookupError when it does not exist."""
+    return await _operator_by(pool, "registro_ans", registro_ans)
+
+
+async def get_operator_by_cnpj_db(pool: asyncpg.Pool, cnpj: str) -> OperatorDetail:
+    """
+    Full registration record of the operator with a CNPJ, formatted or not.
+    Raises ValueError for malformed CNPJs and LookupError when none matches.
+    """
+    return await _operator_by(pool, "cnpj", parse_cnpj(cnpj))
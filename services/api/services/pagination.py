@@ -0,0 +1,22 @@
+import json
+import base64
+import binascii
+from typing import Any, List
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque, URL-safe token for a keyset position (the sort key of the last row)."""
+    payload = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, length: int) -> List[Any]:
+    """Reverses encode_cursor; raises ValueError for tokens not issued by it."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor.")
+    return values
@@ -0,0 +1,94 @@
+import os
+import time
+import asyncpg
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from logging import getLogger
+from .dataset_version import dataset_version
+
+logger = getLogger(__name__)
+
+# --- Search Cache Configuration ---
+MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))  # LRU bound; 0 disables the cache
+TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "600"))  # Upper bound on entry age
+# ---
+
+
+def normalize_term(term: str) -> str:
+    """Case- and whitespace-insensitive form of a search term, as used in cache keys."""
+    return " ".join(term.split()).casefold()
+
+
+class SearchCache:
+    """
+    Bounded in-process cache of search results. Entries are evicted least
+    recently used first once max_entries is reached, expire after ttl
+    seconds, and are all dropped when the importer bumps the dataset
+    version. The version is read through the shared DatasetVersion tracker,
+    so a hit only queries the database when its poll interval has elapsed.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _sync_version(self, version: int):
+        if version != self._version:
+            if self._entries:
+                logger.info(
+                    f"Dataset version {self._version} -> {version}; "
+                    f"dropping {len(self._entries)} cached searches."
+                )
+            self._entries.clear()
+            self._version = version
+
+    async def get_or_compute(
+        self, pool: asyncpg.Pool, key: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Returns the cached value for key, computing and storing it on a miss or expiry."""
+        if self.max_entries <= 0:
+            return await compute()
+        self._sync_version(await dataset_version.current(pool))
+
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        version = self._version
+        value = await compute()
+        if version != self._version:
+            return value  # Data changed while computing; don't cache a stale result
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "dataset_version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by the operator search endpoints
+search_cache = SearchCache()
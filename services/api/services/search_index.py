@@ -0,0 +1,316 @@
+import os
+import re
+import time
+import heapq
+import struct
+import asyncio
+import asyncpg
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+from logging import getLogger
+from .dataset_version import dataset_version
+
+try:
+    import snowballstemmer
+except ImportError:  # snowballstemmer is optional; search then always runs in Postgres
+    snowballstemmer = None
+
+logger = getLogger(__name__)
+
+# --- In-Memory Search Configuration ---
+ENABLED = os.getenv("SEARCH_IN_MEMORY", "false").lower() in ("1", "true", "yes")
+REFRESH_INTERVAL_SECONDS = 30.0  # How often the background task checks the dataset version
+# Field weights of operadoras_trigger() in sql/05_fts_setup.sql, and the
+# values ts_rank_cd gives to the A/B/C labels by default
+WEIGHT_A = 1.0
+WEIGHT_B = 0.4
+WEIGHT_C = 0.2
+INDEXED_FIELDS = (
+    ("razao_social", WEIGHT_A),
+    ("nome_fantasia", WEIGHT_A),
+    ("cnpj", WEIGHT_B),
+    ("cidade", WEIGHT_C),
+)
+# ---
+
+LOAD_QUERY = """
+    SELECT
+        registro_ans, cnpj::text AS cnpj, razao_social, nome_fantasia,
+        modalidade, cidade, uf
+    FROM operadoras;
+"""
+
+# Snowball Portuguese stop words, the list the 'portuguese' text search
+# configuration drops (they still take up a position, as in to_tsvector)
+STOP_WORDS = frozenset(
+    """
+    de a o que e do da em um para com não uma os no se na por mais as dos como
+    mas ao ele das à seu sua ou quando muito nos já eu também só pelo pela até
+    isso ela entre depois sem mesmo aos seus quem nas me esse eles você essa num
+    nem suas meu às minha numa pelos elas qual nós lhe deles essas esses pelas
+    este dele tu te vocês vos lhes meus minhas teu tua teus tuas nosso nossa
+    nossos nossas dela delas esta estes estas aquele aquela aqueles aquelas isto
+    aquilo estou está estamos estão estive esteve estivemos estiveram estava
+    estávamos estavam estivera estivéramos esteja estejamos estejam estivesse
+    estivéssemos estivessem estiver estivermos estiverem hei há havemos hão houve
+    houvemos houveram houvera houvéramos haja hajamos hajam houvesse houvéssemos
+    houvessem houver houvermos houverem houverei houverá houveremos houverão
+    houveria houveríamos houveriam sou somos são era éramos eram fui foi fomos
+    foram fora fôramos seja sejamos sejam fosse fôssemos fossem for formos forem
+    serei será seremos serão seria seríamos seriam tenho tem temos tém tinha
+    tínhamos tinham tive teve tivemos tiveram tivera tivéramos tenha tenhamos
+    tenham tivesse tivéssemos tivessem tiver tivermos tiverem terei terá teremos
+    terão teria teríamos teriam
+    """.split()
+)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def _fold_accents(text: str) -> str:
+    return "".join(
+        char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char)
+    )
+
+
+# Compared accent-folded, so 'sao' is dropped from queries like 'são' is from documents
+_FOLDED_STOP_WORDS = frozenset(_fold_accents(word) for word in STOP_WORDS)
+
+
+def _float4(value: float) -> float:
+    """Rounds to single precision, the type ts_rank_cd returns (keeps cursors comparable)."""
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+
+class Analyzer:
+    """
+    Turns text into (position, lexeme) pairs like to_tsvector('portuguese'):
+    lower-cased words, stop words dropped but counted, alphabetic words
+    Snowball-stemmed. Words and lexemes are also accent-folded, so 'saude'
+    finds 'SAÚDE'.
+    """
+
+    def __init__(self):
+        self._stemmer = snowballstemmer.stemmer("portuguese")
+        self._lexemes: Dict[str, str] = {}
+
+    def _lexeme(self, word: str, remember: bool) -> str:
+        lexeme = self._lexemes.get(word)
+        if lexeme is None:
+            stemmed = self._stemmer.stemWord(word) if word.isalpha() else word
+            lexeme = _fold_accents(stemmed)
+            if remember:
+                self._lexemes[word] = lexeme
+        return lexeme
+
+    def analyze(self, text: Optional[str], remember: bool = True) -> List[Tuple[int, str]]:
+        tokens = []
+        for position, word in enumerate(_WORD.findall((text or "").lower()), start=1):
+            if _fold_accents(word) not in _FOLDED_STOP_WORDS:
+                tokens.append((position, self._lexeme(word, remember)))
+        return tokens
+
+    def query(self, text: str) -> List[str]:
+        """Distinct lexemes of a search text, ANDed as plainto_tsquery does."""
+        # Query words are not memoized, so arbitrary input cannot grow the word cache
+        return list(dict.fromkeys(lexeme for _, lexeme in self.analyze(text, remember=False)))
+
+
+def _rank_cd(occurrences: List[Tuple[int, int, float]], terms: int) -> float:
+    """
+    Cover density rank of one document, as ts_rank_cd with default weights
+    and no normalization. occurrences are the (position, term, weight) of
+    the query terms in the document, sorted by position.
+    """
+    rank = 0.0
+    start = 0
+    count = len(occurrences)
+    while start < count:
+        # Upper bound: first position at which every term has been seen
+        seen = set()
+        end = None
+        for index in range(start, count):
+            seen.add(occurrences[index][1])
+            if len(seen) == terms:
+                end = index
+                break
+        if end is None:
+            break
+        # Lower bound: walking back from it, where every term is seen again
+        seen.clear()
+        begin = end
+        for index in range(end, start - 1, -1):
+            seen.add(occurrences[index][1])
+            if len(seen) == terms:
+                begin = index
+                break
+        inverse_sum = sum(1.0 / occurrences[index][2] for index in range(begin, end + 1))
+        covered = end - begin + 1
+        noise = (occurrences[end][0] - occurrences[begin][0]) - (end - begin)
+        if noise < 0:
+            noise = (end - begin) // 2
+        rank += (covered / inverse_sum) / (1 + noise)
+        start = begin + 1
+    return rank
+
+
+class SearchIndex:
+    """
+    Immutable inverted index over one version of operadoras: lexeme ->
+    {document: [(position, weight)]}, with the positions of all indexed
+    fields laid out as in the fts_document tsvector built by
+    operadoras_trigger() (each field continues after the previous one).
+    """
+
+    def __init__(self, version: int, rows: List[dict]):
+        self.version = version
+        self.analyzer = Analyzer()
+        self.documents = rows
+        self._by_key = {
+            "registro_ans": {row["registro_ans"]: index for index, row in enumerate(rows)},
+            "cnpj": {int(row["cnpj"]): index for index, row in enumerate(rows) if row["cnpj"]},
+        }
+        self._postings: Dict[str, Dict[int, List[Tuple[int, float]]]] = {}
+        for index, row in enumerate(rows):
+            offset = 0
+            for field, weight in INDEXED_FIELDS:
+                last = offset
+                for position, lexeme in self.analyzer.analyze(row[field]):
+                    self._postings.setdefault(lexeme, {}).setdefault(index, []).append(
+                        (offset + position, weight)
+                    )
+                    last = offset + position
+                # tsvector || shifts the right side by the left side's last position
+                offset = last
+
+    @property
+    def lexemes(self) -> int:
+        return len(self._postings)
+
+    def lookup(self, column: str, value: int) -> Optional[dict]:
+        """The operator whose registro_ans or cnpj equals value, if any."""
+        index = self._by_key[column].get(value)
+        return self.documents[index] if index is not None else None
+
+    def search(
+        self,
+        term: str,
+        limit: int,
+        offset: int = 0,
+        after: Optional[Tuple[float, str, int]] = None,
+    ) -> Tuple[int, List[Tuple[dict, float]], bool]:
+        """
+        Documents matching every lexeme of term, ordered by (rank DESC,
+        razao_social, registro_ans). Names are compared by code point, not by
+        the database collation, so rank ties may come in a different order
+        than in the SQL search. after is the (rank, razao_social,
+        registro_ans) keyset of the previous page of this same ordering.
+        Returns (total matches, [(row, rank)], has_more).
+        """
+        terms = self.analyzer.query(term)
+        ranks: Dict[int, float] = {}
+        if terms:
+            postings = [self._postings.get(lexeme, {}) for lexeme in terms]
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates.intersection_update(posting)
+            for document in candidates:
+                occurrences = sorted(
+                    (position, term_index, weight)
+                    for term_index, lexeme in enumerate(terms)
+                    for position, weight in self._postings[lexeme][document]
+                )
+                ranks[document] = _float4(_rank_cd(occurrences, len(terms)))
+
+        def key(document):
+            row = self.documents[document]
+            return (-ranks[document], row["razao_social"], row["registro_ans"])
+
+        matches = ranks
+        if after is not None:
+            after_key = (-after[0], after[1], after[2])
+            matches = [document for document in ranks if key(document) > after_key]
+        page = heapq.nsmallest(offset + limit + 1, matches, key=key)[offset:]
+        results = [(self.documents[document], ranks[document]) for document in page[:limit]]
+        return len(ranks), results, len(page) > limit
+
+
+class SearchIndexStore:
+    """
+    Holds the current SearchIndex. A rebuild indexes a fresh copy of
+    operadoras and then swaps the reference, so searches always see one
+    consistent version. A background task rebuilds when the importer bumps
+    the dataset version.
+    """
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled and snowballstemmer is not None
+        self.index: Optional[SearchIndex] = None
+        self._load_lock = asyncio.Lock()
+        self._refresh_task = None
+        if enabled and snowballstemmer is None:
+            logger.warning("SEARCH_IN_MEMORY is set but snowballstemmer is not installed; disabled.")
+
+    def current(self, version: int) -> Optional[SearchIndex]:
+        """The built index if it matches the given dataset version, else None."""
+        index = self.index
+        if index is not None and index.version == version:
+            return index
+        return None
+
+    async def load(self, pool: asyncpg.Pool) -> Optional[SearchIndex]:
+        """Builds a fresh index and swaps it in. Concurrent calls share one build."""
+        if not self.enabled:
+            return None
+        async with self._load_lock:
+            started = time.perf_counter()
+            async with pool.acquire() as connection:
+                async with connection.transaction(isolation="repeatable_read", readonly=True):
+                    version = await connection.fetchval("SELECT version FROM dataset_version;") or 0
+                    records = await connection.fetch(LOAD_QUERY)
+            if self.index is not None and self.index.version == version:
+                return self.index
+            index = await asyncio.to_thread(SearchIndex, version, [dict(row) for row in records])
+            self.index = index
+            logger.info(
+                f"Indexed {len(index.documents)} operators in memory ({index.lexemes} lexemes, "
+                f"dataset version {version}) in {time.perf_counter() - started:.2f}s."
+            )
+            return index
+
+    async def _refresh_loop(self, pool: asyncpg.Pool, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                version = await dataset_version.current(pool)
+                if self.current(version) is None:
+                    logger.info(f"Dataset version {version} differs from the indexed one; rebuilding.")
+                    await self.load(pool)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"In-memory search rebuild failed, keeping the old index: {e}")
+
+    async def start(self, pool: asyncpg.Pool, interval: float = REFRESH_INTERVAL_SECONDS):
+        """Initial build plus the background refresh task (called from the app lifespan)."""
+        if not self.enabled:
+            return
+        try:
+            await self.load(pool)
+        except Exception as e:
+            logger.exception(f"In-memory search build failed; searching in Postgres: {e}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop(pool, interval))
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        self.index = None
+
+
+search_index = SearchIndexStore()
@@ -1,62 +1,330 @@
+import re
 import asyncpg
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from logging import getLogger
-from ..models.operator import OperatorSearchResult  # Use relative import
+from ..models.operator import OperatorSearchResult, OperatorSuggestion  # Use relative import
+from .pagination import encode_cursor, decode_cursor
+from .search_cache import search_cache, normalize_term
+from .search_index import search_index, SearchIndex
+from .dataset_version import dataset_version
+from .operator_service import parse_cnpj
 
 logger = getLogger(__name__)
 
+# --- Search Routing Configuration ---
+SEARCH_TERM_REGISTRO_ANS = "registro_ans"  # Up to 6 digits
+SEARCH_TERM_CNPJ = "cnpj"  # 14 digits, optionally formatted as 12.345.678/0001-90
+SEARCH_TERM_TEXT = "text"  # Anything else: full-text search
+EXACT_MATCH_RANK = 1.0  # Rank reported for Registro ANS / CNPJ equality matches
+# Engine that issued a search cursor. Rank and name ties are ordered by the
+# database collation in Postgres but by code point in memory, so a cursor is
+# only continued by the engine that issued it.
+SEARCH_ENGINE_DATABASE = "db"
+SEARCH_ENGINE_MEMORY = "memory"
+# ---
+
+# Rank of a full-text match. Repeated in WHERE by the keyset seek, which
+# cannot refer to the select-list alias.
+TEXT_SEARCH_RANK = "COALESCE(ts_rank_cd(fts_document, query), 0)"
+
+# Total matches of a text search for cursor pages, whose keyset seek leaves
+# out the earlier matches a count(*) OVER () would need (see _count_text_matches)
+TEXT_SEARCH_COUNT_QUERY = """
+    SELECT COUNT(*)
+    FROM operadoras, plainto_tsquery('portuguese', $1) query
+    WHERE query @@ fts_document;
+"""
+
+_REGISTRO_ANS_TERM = re.compile(r"^\d{1,6}$")
+_CNPJ_TERM = re.compile(r"^\d{2}\.?\d{3}\.?\d{3}/?\d{4}-?\d{2}$")
+
+# Equality lookup for ID / CNPJ shaped terms, served by the primary key or
+# the CNPJ unique index instead of the FTS index
+EXACT_SEARCH_QUERY = """
+    SELECT
+        "registro_ans", "cnpj"::text AS "cnpj", "razao_social", "nome_fantasia",
+        "modalidade", "cidade", "uf"
+    FROM operadoras
+    WHERE "{column}" = $1;
+"""
+
+# Typeahead over the pg_trgm indexes from sql/05_fts_setup.sql. Names that
+# start with the typed text come first, then the best word-similarity
+# matches ($1 <% name), which also catch partial and slightly misspelled words.
+SUGGEST_QUERY = """
+    SELECT
+        registro_ans, razao_social, nome_fantasia,
+        GREATEST(
+            word_similarity($1, razao_social),
+            COALESCE(word_similarity($1, nome_fantasia), 0)
+        ) AS score
+    FROM operadoras
+    WHERE razao_social ILIKE $2 OR nome_fantasia ILIKE $2
+       OR $1 <% razao_social OR $1 <% nome_fantasia
+    ORDER BY
+        COALESCE(razao_social ILIKE $3 OR nome_fantasia ILIKE $3, false) DESC, -- Prefix matches first
+        score DESC, razao_social ASC
+    LIMIT $4;
+"""
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def classify_search_term(term: str) -> Tuple[str, Optional[int]]:
+    """
+    Shape of a search term: (SEARCH_TERM_REGISTRO_ANS, id), (SEARCH_TERM_CNPJ,
+    cnpj as stored) or (SEARCH_TERM_TEXT, None).
+    """
+    term = term.strip()
+    if _REGISTRO_ANS_TERM.match(term):
+        return SEARCH_TERM_REGISTRO_ANS, int(term)
+    if _CNPJ_TERM.match(term):
+        return SEARCH_TERM_CNPJ, parse_cnpj(term)
+    return SEARCH_TERM_TEXT, None
+
+
+def _exact_page(
+    row: Optional[dict], offset: int, after: Optional[Tuple]
+) -> Tuple[int, List[OperatorSearchResult], Optional[str]]:
+    """Search response for an equality lookup: at most one row, on the first page."""
+    if row is None:
+        return 0, [], None
+    if offset or after:
+        return 1, [], None
+    return 1, [OperatorSearchResult.model_validate({**row, "rank": EXACT_MATCH_RANK})], None
+
+
+def _decode_search_cursor(cursor: str) -> Tuple[str, Tuple[float, str, int]]:
+    """(engine, (rank, razao_social, registro_ans)) of a search cursor."""
+    engine, last_rank, last_name, last_id = decode_cursor(cursor, 4)
+    if not (
+        engine in (SEARCH_ENGINE_DATABASE, SEARCH_ENGINE_MEMORY)
+        and isinstance(last_rank, (int, float))
+        and isinstance(last_name, str)
+        and isinstance(last_id, int)
+    ):
+        raise ValueError("Invalid cursor.")
+    return engine, (float(last_rank), last_name, last_id)
+
+
+def _search_after(
+    engine: str, offset: int, cursor: Optional[str]
+) -> Optional[Tuple[float, str, int]]:
+    """Keyset of a cursor to be continued by engine; None on the first page."""
+    if not cursor:
+        return None
+    if offset:
+        raise ValueError("cursor and offset cannot be combined.")
+    issued_by, after = _decode_search_cursor(cursor)
+    if issued_by != engine:
+        raise ValueError("The cursor has expired; repeat the search from the first page.")
+    return after
+
+
+async def _count_text_matches(
+    pool: asyncpg.Pool, search_term: str, known: Optional[int] = None
+) -> int:
+    """
+    Total full-text matches of a term, kept in the search cache since it
+    does not depend on the page. known is a total the caller already has
+    (the window count of an offset page); it is stored so that cursor pages
+    reuse it instead of counting again.
+    """
+
+    async def compute():
+        if known is not None:
+            return known
+        try:
+            return await pool.fetchval(TEXT_SEARCH_COUNT_QUERY, search_term) or 0
+        except Exception as e:
+            logger.exception(f"Database error counting matches for term '{search_term}': {e}")
+            raise RuntimeError(f"Database error during search: {e}")
+
+    return await search_cache.get_or_compute(pool, ("search_count", search_term), compute)
+
 
 async def search_operators_db(
-    pool: asyncpg.Pool, search_term: str, limit: int, offset: int
-) -> Tuple[int, List[OperatorSearchResult]]:
+    pool: asyncpg.Pool,
+    search_term: str,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[int, List[OperatorSearchResult], Optional[str]]:
     """
     Performs a full-text search on the operadoras table.
-    Returns total count and a list of results.
+    Returns total count, a list of results and the cursor of the next page.
+    Pages are selected either by offset or, with cursor, by seeking past the
+    (rank, razao_social, registro_ans) of the previous page's last row inside
+    the ranked scan, so deep pages only sort the matches after it and cut
+    them at LIMIT with a top-N sort. Offset pages get the total from the
+    same statement (count(*) OVER () over the full match set before the
+    page is cut) and leave it in the search cache; cursor pages, whose scan
+    skips the earlier matches, reuse that total or count once per term.
+    Terms shaped like a Registro ANS or a CNPJ are equality
+    lookups on the primary key or the CNPJ unique index; an ID that matches
+    no operator is then searched as text. Raises ValueError for a malformed
+    cursor, a cursor issued by the in-memory engine or a cursor combined
+    with an offset.
     """
+    after = _search_after(SEARCH_ENGINE_DATABASE, offset, cursor)
+
+    kind, value = classify_search_term(search_term)
+    if kind != SEARCH_TERM_TEXT:
+        try:
+            record = await pool.fetchrow(EXACT_SEARCH_QUERY.format(column=kind), value)
+        except Exception as e:
+            logger.exception(f"Database error during operator lookup by {kind} {value}: {e}")
+            raise RuntimeError(f"Database error during search: {e}")
+        if record is not None or kind == SEARCH_TERM_CNPJ:
+            return _exact_page(dict(record) if record else None, offset, after)
+        # No operator has that ID; the digits may still occur in the indexed text
+
+    args = [search_term]
+
+    def bind(value):
+        args.append(value)
+        return f"${len(args)}"
+
+    keyset = ""
+    window_count = "count(*) OVER () AS total_count, -- Total matches, computed before the page is cut"
+    if after is not None:
+        window_count = ""
+        last_rank, last_name, last_id = after
+        # ORDER BY mixes DESC and ASC, so the seek is spelled out instead of a row
+        # comparison. It filters the scan itself, so only later matches are sorted.
+        rank_param = bind(last_rank)
+        keyset = f"""AND ({TEXT_SEARCH_RANK} < {rank_param}
+               OR ({TEXT_SEARCH_RANK} = {rank_param}
+                   AND ("razao_social", "registro_ans") > ({bind(last_name)}, {bind(last_id)})))"""
 
-    search_query = """
+    search_query = f"""
         SELECT
             "registro_ans", "cnpj"::text AS "cnpj", "razao_social", "nome_fantasia",
-            "modalidade", "cidade", "uf",
-            COALESCE(ts_rank_cd(fts_document, query), 0) AS rank
+            "modalidade", "cidade", "uf", {window_count}
+            {TEXT_SEARCH_RANK} AS rank
         FROM operadoras, plainto_tsquery('portuguese', $1) query
-        WHERE query @@ fts_document OR "registro_ans"::text = $1 -- Allow searching by exact ANS ID too
-        ORDER BY rank DESC, "razao_social" ASC -- Primary sort by rank, secondary by name
-        LIMIT $2 OFFSET $3;
-    """
-
-    # Query to get the total count matching the search term
-    count_query = """
-        SELECT COUNT(*)
-        FROM operadoras, plainto_tsquery('portuguese', $1) query
-        WHERE query @@ fts_document OR "registro_ans"::text = $1;
+        WHERE query @@ fts_document
+          {keyset}
+        ORDER BY rank DESC, "razao_social" ASC, "registro_ans" ASC -- Rank first, then name; ID breaks ties
+        LIMIT {bind(limit + 1)} OFFSET {bind(offset)};
     """
 
     try:
-        async with pool.acquire() as connection:
-            # Execute count query first
-            total_count_record = await connection.fetchrow(count_query, search_term)
-            total_count = total_count_record["count"] if total_count_record else 0
+        records = await pool.fetch(search_query, *args)
+    except Exception as e:
+        logger.exception(
+            f"Database error during operator search for term '{search_term}': {e}"
+        )
+        raise RuntimeError(f"Database error during search: {e}")
 
-            if total_count == 0:
-                return 0, []
+    if after is None and records:
+        total_count = await _count_text_matches(pool, search_term, records[0]["total_count"])
+    elif after is None and not offset:
+        total_count = 0
+    else:
+        # Cursor page, or an offset past every match (no row carries the total)
+        total_count = await _count_text_matches(pool, search_term)
 
-            # Execute search query
-            records = await connection.fetch(search_query, search_term, limit, offset)
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        last = records[-1]
+        next_cursor = encode_cursor(
+            [SEARCH_ENGINE_DATABASE, last["rank"], last["razao_social"], last["registro_ans"]]
+        )
 
-            # Convert asyncpg Records to Pydantic models
-            results = []
-            for record in records:
-                record_dict = dict(record)
+    # Convert asyncpg Records to Pydantic models
+    results = []
+    for record in records:
+        record_dict = dict(record)
+        record_dict.pop("total_count", None)
+        results.append(OperatorSearchResult.model_validate(record_dict))
 
-                if record_dict.get("CNPJ") is not None:
-                    record_dict["CNPJ"] = str(record_dict["CNPJ"])
-                results.append(OperatorSearchResult.model_validate(record_dict))
+    return total_count, results, next_cursor
 
-            return total_count, results
 
-    except Exception as e:
-        logger.exception(
-            f"Database error during operator search for term '{search_term}': {e}"
+def search_operators_memory(
+    index: SearchIndex,
+    search_term: str,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[int, List[OperatorSearchResult], Optional[str]]:
+    """
+    search_operators_db answered from the in-memory inverted index, with the
+    same routing, matching, ranking and errors. Rows tied on rank are ordered
+    by razao_social code points rather than the database collation, so the
+    order of ties can differ from Postgres and cursors issued here are only
+    accepted here (and vice versa).
+    """
+    after = _search_after(SEARCH_ENGINE_MEMORY, offset, cursor)
+    kind, value = classify_search_term(search_term)
+    if kind != SEARCH_TERM_TEXT:
+        row = index.lookup(kind, value)
+        if row is not None or kind == SEARCH_TERM_CNPJ:
+            return _exact_page(row, offset, after)
+    total_count, page, has_more = index.search(search_term, limit, offset, after)
+    results = [OperatorSearchResult.model_validate({**row, "rank": rank}) for row, rank in page]
+    next_cursor = None
+    if has_more:
+        last = results[-1]
+        next_cursor = encode_cursor(
+            [SEARCH_ENGINE_MEMORY, last.rank, last.razao_social, last.registro_ans]
         )
-        raise RuntimeError(f"Database error during search: {e}")
+    return total_count, results, next_cursor
+
+
+async def search_operators_cached(
+    pool: asyncpg.Pool,
+    search_term: str,
+    limit: int,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+) -> Tuple[int, List[OperatorSearchResult], Optional[str]]:
+    """
+    Operator search behind the in-process search cache, keyed by the
+    normalized term and the page parameters. Repeated searches are served
+    from memory until they expire or the importer bumps the dataset version.
+    Misses use the in-memory index when it holds the current dataset
+    version (SEARCH_IN_MEMORY), otherwise Postgres; a cursor goes back to
+    the engine that issued it. Raises ValueError for an in-memory cursor
+    once that index is no longer current.
+    """
+    term = normalize_term(search_term)
+
+    async def compute():
+        index = search_index.current(await dataset_version.current(pool))
+        engine = SEARCH_ENGINE_MEMORY if index is not None else SEARCH_ENGINE_DATABASE
+        if cursor and not offset:
+            engine = _decode_search_cursor(cursor)[0]
+        if engine == SEARCH_ENGINE_MEMORY and index is not None:
+            return search_operators_memory(index, term, limit, offset, cursor=cursor)
+        return await search_operators_db(pool, term, limit, offset, cursor=cursor)
+
+    return await search_cache.get_or_compute(pool, (term, limit, offset, cursor), compute)
+
+
+async def suggest_operators(
+    pool: asyncpg.Pool, prefix: str, limit: int
+) -> List[OperatorSuggestion]:
+    """
+    Top operator names for a partially typed text, by prefix and trigram
+    similarity on razao_social/nome_fantasia. Served from the search cache,
+    so repeated keystroke prefixes do not reach the database.
+    """
+    term = normalize_term(prefix)
+    escaped = _like_escape(term)
+
+    async def compute():
+        try:
+            records = await pool.fetch(
+                SUGGEST_QUERY, term, f"%{escaped}%", f"{escaped}%", limit
+            )
+        except Exception as e:
+            logger.exception(f"Database error during operator suggest for '{term}': {e}")
+            raise RuntimeError(f"Database error during suggest: {e}")
+        return [OperatorSuggestion.model_validate(dict(record)) for record in records]
+
+    return await search_cache.get_or_compute(pool, ("suggest", term, limit), compute)
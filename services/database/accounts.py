@@ -0,0 +1,89 @@
+import logging
+
+# --- Chart of Accounts Configuration ---
+ACCOUNTS_TABLE = "contas_contabeis"
+# ---
+
+
+def normalize_account(conta_contabil, descricao):
+    """Dimension key for an account: code and description without surrounding whitespace."""
+    return conta_contabil.strip(), descricao.strip()
+
+
+class AccountCache:
+    """
+    In-memory map of (CONTA_CONTABIL, DESCRICAO) to contas_contabeis.CONTA_ID.
+
+    The table is read once on first use; accounts not seen yet are inserted
+    on a dedicated autocommit connection (from connect()), so new ids are
+    visible to other import workers right away instead of waiting for the
+    commit of the file that introduced them. Raw CSV values are cached
+    alongside their normalized form so the hot path is one dict lookup.
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._conn = None
+        self._ids = None
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = self._connect()
+            self._conn.autocommit = True
+        return self._conn
+
+    def _fetch_accounts(self):
+        with self._connection().cursor() as cursor:
+            cursor.execute(
+                f"SELECT CONTA_CONTABIL, DESCRICAO, CONTA_ID FROM {ACCOUNTS_TABLE};"
+            )
+            return cursor.fetchall()
+
+    def load(self):
+        self._ids = {
+            (conta, descricao): conta_id
+            for conta, descricao, conta_id in self._fetch_accounts()
+        }
+        logging.info(f"Loaded {len(self._ids)} accounts from {ACCOUNTS_TABLE}.")
+        return self
+
+    def _insert(self, key):
+        with self._connection().cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {ACCOUNTS_TABLE} (CONTA_CONTABIL, DESCRICAO)
+                VALUES (%s, %s)
+                ON CONFLICT (CONTA_CONTABIL, DESCRICAO) DO NOTHING
+                RETURNING CONTA_ID;
+                """,
+                key,
+            )
+            row = cursor.fetchone()
+            if row is None:
+                # Inserted concurrently by another worker
+                cursor.execute(
+                    f"SELECT CONTA_ID FROM {ACCOUNTS_TABLE} "
+                    "WHERE CONTA_CONTABIL = %s AND DESCRICAO = %s;",
+                    key,
+                )
+                row = cursor.fetchone()
+        return row[0]
+
+    def resolve(self, conta_contabil, descricao):
+        """Returns the CONTA_ID for an account, registering it if it is new."""
+        if self._ids is None:
+            self.load()
+        conta_id = self._ids.get((conta_contabil, descricao))
+        if conta_id is None:
+            key = normalize_account(conta_contabil, descricao)
+            conta_id = self._ids.get(key)
+            if conta_id is None:
+                conta_id = self._ids[key] = self._insert(key)
+                logging.debug(f"Registered account {key} as CONTA_ID {conta_id}.")
+            self._ids[(conta_contabil, descricao)] = conta_id
+        return conta_id
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
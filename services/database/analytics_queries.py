@@ -0,0 +1,389 @@
+import os
+import re
+import sys
+import json
+import glob
+import logging
+import argparse
+from datetime import date
+
+try:
+    from .partitions import PARENT_TABLE, PARTITION_PREFIX, quarter_bounds
+    from .rollup import ROLLUP_TABLE
+    from .accounts import ACCOUNTS_TABLE
+except ImportError:
+    # Fallback for running script directly
+    from partitions import PARENT_TABLE, PARTITION_PREFIX, quarter_bounds
+    from rollup import ROLLUP_TABLE
+    from accounts import ACCOUNTS_TABLE
+
+# --- Analytics Query Configuration ---
+PLAN_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_fixtures")
+SOURCE_ROLLUP = "rollup"  # saldos_trimestrais: one row per account x quarter x operator
+SOURCE_FACTS = "facts"  # demonstracoes_contabeis, pruned to the period's partitions
+SOURCE_TABLES = {SOURCE_ROLLUP: ROLLUP_TABLE, SOURCE_FACTS: PARENT_TABLE}
+MEASURES = ("VL_SALDO_FINAL", "VL_SALDO_INICIAL")
+# Output columns per grouping; operadoras is only joined when a grouping needs it
+GROUPINGS = {
+    "operator": ("f.REGISTRO_ANS", "op.Razao_Social"),
+    "uf": ("op.UF",),
+    "modalidade": ("op.Modalidade",),
+}
+LATEST_QUARTER = "latest_quarter"  # Period placeholders resolved against the loaded data
+LATEST_YEAR = "latest_year"
+# ---
+
+_QUARTER_PATTERNS = (
+    re.compile(r"^(?P<year>\d{4})-?Q(?P<quarter>[1-4])$", re.IGNORECASE),  # 2023Q1
+    re.compile(r"^(?P<quarter>[1-4])T(?P<year>\d{4})$", re.IGNORECASE),  # 1T2023, as the ANS files
+)
+
+
+def parse_period(period):
+    """
+    Half-open [start, end) DATA range of a period: a year ("2023") or a
+    quarter ("2023Q1", "2023-Q1" or the ANS file style "1T2023").
+    """
+    period = period.strip()
+    if re.fullmatch(r"\d{4}", period):
+        return date(int(period), 1, 1), date(int(period) + 1, 1, 1)
+    for pattern in _QUARTER_PATTERNS:
+        match = pattern.match(period)
+        if match:
+            quarter = date(int(match["year"]), 3 * (int(match["quarter"]) - 1) + 1, 1)
+            return quarter_bounds(quarter)
+    raise ValueError(f"Unrecognized period '{period}' (expected YYYY, YYYYQn or nTYYYY).")
+
+
+def period_range(first, last=None):
+    """Half-open range from the start of period first to the end of period last."""
+    start, end = parse_period(first)
+    if last is not None:
+        end = parse_period(last)[1]
+    if end <= start:
+        raise ValueError(f"Empty period range {first}..{last}.")
+    return start, end
+
+
+def latest_period(cursor, placeholder):
+    """
+    Resolves LATEST_QUARTER (the latest loaded quarter) or LATEST_YEAR (the
+    last complete year before it, as sql/04_analysis_year.sql) to a period.
+    """
+    cursor.execute(f"SELECT MAX(DATA) FROM {ROLLUP_TABLE};")
+    latest = cursor.fetchone()[0]
+    if latest is None:
+        raise LookupError(f"{ROLLUP_TABLE} is empty; import some data first.")
+    if placeholder == LATEST_YEAR:
+        return str(latest.year - 1)
+    return f"{latest.year}Q{(latest.month - 1) // 3 + 1}"
+
+
+def normalize_description(text):
+    """Comparison form of an account description: trimmed, upper case, single spaces."""
+    return re.sub(r"\s+", " ", text.strip()).upper()
+
+
+def resolve_account_ids(cursor, account, include_subaccounts=False):
+    """
+    CONTA_IDs matching an account code or description. Descriptions are
+    compared in normalized form against the (small) contas_contabeis table,
+    so the fact side is filtered by integer ids only. With
+    include_subaccounts a code also matches every code it prefixes (e.g.
+    "41" matches "411" and "4111").
+    """
+    code = account.strip()
+    conditions = [
+        "CONTA_CONTABIL = %s",
+        r"regexp_replace(upper(DESCRICAO), '\s+', ' ', 'g') = %s",
+    ]
+    params = [code, normalize_description(account)]
+    if include_subaccounts:
+        conditions.append("CONTA_CONTABIL LIKE %s")
+        params.append(code.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    cursor.execute(
+        f"SELECT CONTA_ID FROM {ACCOUNTS_TABLE} WHERE {' OR '.join(conditions)} ORDER BY CONTA_ID;",
+        params,
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def build_top_query(
+    account_ids,
+    start,
+    end,
+    group_by="operator",
+    top_n=10,
+    source=SOURCE_ROLLUP,
+    measure="VL_SALDO_FINAL",
+):
+    """
+    Returns (sql, params) summing measure for the given account ids over
+    [start, end), grouped by operator, UF or modalidade, top_n rows.
+
+    Every predicate is on a bare indexed column: DATA against a half-open
+    range (partition pruning on the facts, a range scan of the rollup key)
+    and CONTA_ID against a constant id array. No function wraps a column and
+    no text is compared on the fact side.
+    """
+    if group_by not in GROUPINGS:
+        raise ValueError(f"group_by must be one of {sorted(GROUPINGS)}.")
+    if source not in SOURCE_TABLES:
+        raise ValueError(f"source must be one of {sorted(SOURCE_TABLES)}.")
+    if measure not in MEASURES:
+        raise ValueError(f"measure must be one of {MEASURES}.")
+    group_columns = GROUPINGS[group_by]
+    needs_operators = any(column.startswith("op.") for column in group_columns)
+    join = "JOIN operadoras op ON op.Registro_ANS = f.REGISTRO_ANS" if needs_operators else ""
+    sql = f"""
+        SELECT {', '.join(group_columns)}, SUM(f.{measure}) AS total
+        FROM {SOURCE_TABLES[source]} f
+        {join}
+        WHERE f.CONTA_ID = ANY(%s)
+          AND f.DATA >= %s AND f.DATA < %s
+        GROUP BY {', '.join(group_columns)}
+        ORDER BY total DESC NULLS LAST
+        LIMIT %s;
+    """
+    return sql, [list(account_ids), start, end, top_n]
+
+
+def prepare_query(cursor, spec):
+    """
+    Turns a query spec (the dicts of the CLI and the plan fixtures) into
+    (sql, params): account, period (or period_from/period_to), group_by,
+    top_n, source, measure and include_subaccounts.
+    """
+    first = spec.get("period_from", spec.get("period"))
+    last = spec.get("period_to")
+    if first in (LATEST_QUARTER, LATEST_YEAR):
+        first = latest_period(cursor, first)
+    if last in (LATEST_QUARTER, LATEST_YEAR):
+        last = latest_period(cursor, last)
+    start, end = period_range(first, last)
+    account_ids = resolve_account_ids(
+        cursor, spec["account"], spec.get("include_subaccounts", False)
+    )
+    if not account_ids:
+        logging.warning(f"No account matches '{spec['account']}'.")
+    return build_top_query(
+        account_ids,
+        start,
+        end,
+        group_by=spec.get("group_by", "operator"),
+        top_n=spec.get("top_n", 10),
+        source=spec.get("source", SOURCE_ROLLUP),
+        measure=spec.get("measure", "VL_SALDO_FINAL"),
+    )
+
+
+def run_query(conn, spec):
+    """Runs a query spec and returns its rows."""
+    with conn.cursor() as cursor:
+        sql, params = prepare_query(cursor, spec)
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def explain_query(conn, spec):
+    """Runs EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) for a spec and returns the plan dict."""
+    with conn.cursor() as cursor:
+        sql, params = prepare_query(cursor, spec)
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    conn.rollback()  # EXPLAIN ANALYZE executed the query; leave no transaction open
+    return plan[0] if isinstance(plan, list) else plan
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def summarize_plan(plan):
+    """
+    Node types, scanned relations/indexes, buffers and timings of an EXPLAIN
+    plan. Bitmap index scans name only the index, so they have no relation.
+    """
+    root = plan["Plan"]
+    nodes = list(_plan_nodes(root))
+    return {
+        "scans": [
+            {
+                "node": node["Node Type"],
+                "relation": node.get("Relation Name"),
+                "index": node.get("Index Name"),
+            }
+            for node in nodes
+            if "Relation Name" in node or "Index Name" in node
+        ],
+        "shared_blocks": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "execution_ms": plan.get("Execution Time"),
+        "planning_ms": plan.get("Planning Time"),
+    }
+
+
+def resolve_parent_indexes(conn, summary):
+    """
+    Adds to every index scan of a plan summary the partitioned index its
+    index belongs to (parent_index), e.g. idx_demonstracoes_conta for
+    demonstracoes_2023_q1_conta_id_idx, so fixtures can name the parent's
+    indexes whatever the partitions' index names are.
+    """
+    names = sorted({scan["index"] for scan in summary["scans"] if scan["index"]})
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_partition_root(c.oid)::regclass::text
+            FROM pg_class c
+            WHERE c.relkind IN ('i', 'I') AND c.relname = ANY(%s);
+            """,
+            (names,),
+        )
+        parents = dict(cursor.fetchall())
+    conn.rollback()
+    for scan in summary["scans"]:
+        scan["parent_index"] = parents.get(scan["index"])
+    return summary
+
+
+def check_plan(summary, expect):
+    """
+    Compares a plan summary with a fixture's expectations and returns the
+    list of violations (empty when the plan is fine):
+      forbid_seq_scan: relation name prefixes that must not be sequentially scanned
+      require_index: index name prefixes that must appear in the plan, matched
+        against the scanned index or its partitioned parent index
+      max_partitions: most demonstracoes_contabeis partitions the plan may touch
+      max_shared_blocks: buffer budget (shared hit + read) of the whole query
+    """
+    violations = []
+    scans = summary["scans"]
+    for prefix in expect.get("forbid_seq_scan", []):
+        for scan in scans:
+            if scan["node"] == "Seq Scan" and scan["relation"].startswith(prefix):
+                violations.append(f"sequential scan on {scan['relation']}")
+    for prefix in expect.get("require_index", []):
+        if not any(
+            name and name.startswith(prefix)
+            for scan in scans
+            for name in (scan["index"], scan.get("parent_index"))
+        ):
+            violations.append(f"no scan uses an index named {prefix}*")
+    max_partitions = expect.get("max_partitions")
+    if max_partitions is not None:
+        partitions = {
+            scan["relation"]
+            for scan in scans
+            if scan["relation"]
+            and re.fullmatch(rf"{PARTITION_PREFIX}_\d{{4}}_q[1-4]", scan["relation"])
+        }
+        if len(partitions) > max_partitions:
+            violations.append(
+                f"{len(partitions)} partitions scanned (max {max_partitions}): {sorted(partitions)}"
+            )
+    max_blocks = expect.get("max_shared_blocks")
+    if max_blocks is not None and summary["shared_blocks"] > max_blocks:
+        violations.append(f"{summary['shared_blocks']} shared blocks (max {max_blocks})")
+    return violations
+
+
+def check_plan_fixtures(conn, fixtures_dir=PLAN_FIXTURES_DIR):
+    """
+    Runs every <fixtures_dir>/*.json fixture ({'query': spec, 'expect': {...}})
+    through EXPLAIN (ANALYZE, BUFFERS) and logs its verdict. Returns the
+    number of fixtures whose plan regressed.
+    """
+    failures = 0
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.json"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as fixture_file:
+            fixture = json.load(fixture_file)
+        try:
+            summary = resolve_parent_indexes(
+                conn, summarize_plan(explain_query(conn, fixture["query"]))
+            )
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"[FAIL] {name}: could not explain the query: {e}")
+            failures += 1
+            continue
+        violations = check_plan(summary, fixture.get("expect", {}))
+        if violations:
+            failures += 1
+            logging.error(f"[FAIL] {name}: {'; '.join(violations)}")
+            logging.error(f"       scans: {summary['scans']}")
+        else:
+            logging.info(
+                f"[ OK ] {name}: {summary['shared_blocks']} blocks, "
+                f"{summary['execution_ms']} ms"
+            )
+    return failures
+
+
+def parse_args():
+    """Parses command-line options for ad-hoc analytics queries and plan checks."""
+    parser = argparse.ArgumentParser(
+        description="Runs top-N account aggregations over the ANS accounting data with "
+        "index-friendly SQL, or checks the EXPLAIN plans of the regression fixtures."
+    )
+    parser.add_argument("--account", help="Account code or description.")
+    parser.add_argument(
+        "--from",
+        dest="period_from",
+        default=LATEST_QUARTER,
+        help="First period: YYYY, YYYYQn, nTYYYY, latest_quarter (default) or latest_year.",
+    )
+    parser.add_argument("--to", dest="period_to", help="Last period (default: same as --from).")
+    parser.add_argument("--group-by", choices=sorted(GROUPINGS), default="operator")
+    parser.add_argument("--top", dest="top_n", type=int, default=10)
+    parser.add_argument("--source", choices=sorted(SOURCE_TABLES), default=SOURCE_ROLLUP)
+    parser.add_argument("--measure", choices=MEASURES, default="VL_SALDO_FINAL")
+    parser.add_argument(
+        "--include-subaccounts", action="store_true", help="Also sum accounts whose code starts with --account."
+    )
+    parser.add_argument(
+        "--explain", action="store_true", help="Print the EXPLAIN (ANALYZE, BUFFERS) summary instead of rows."
+    )
+    parser.add_argument(
+        "--check-plans",
+        nargs="?",
+        const=PLAN_FIXTURES_DIR,
+        metavar="DIR",
+        help=f"Check the plan regression fixtures in DIR (default: {PLAN_FIXTURES_DIR}).",
+    )
+    args = parser.parse_args()
+    if not args.check_plans and not args.account:
+        parser.error("--account is required unless --check-plans is given.")
+    return args
+
+
+if __name__ == "__main__":
+    try:
+        from .importer import get_db_connection
+    except ImportError:
+        from importer import get_db_connection
+
+    args = parse_args()
+    connection = get_db_connection()
+    try:
+        if args.check_plans:
+            sys.exit(1 if check_plan_fixtures(connection, args.check_plans) else 0)
+        query_spec = {
+            "account": args.account,
+            "period_from": args.period_from,
+            "period_to": args.period_to,
+            "group_by": args.group_by,
+            "top_n": args.top_n,
+            "source": args.source,
+            "measure": args.measure,
+            "include_subaccounts": args.include_subaccounts,
+        }
+        if args.explain:
+            print(json.dumps(summarize_plan(explain_query(connection, query_spec)), indent=2))
+        else:
+            for row in run_query(connection, query_spec):
+                print(*row, sep="\t")
+    finally:
+        connection.close()
@@ -0,0 +1,383 @@
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+
+import asyncpg
+
+try:
+    from .importer import (
+        open_demonstracoes_rows,
+        DEMONSTRACOES_COLUMNS,
+        COPY_CHUNK_ROWS,
+        FILE_ENCODING,
+        DELIMITER,
+    )
+    from .accounts import AccountCache, ACCOUNTS_TABLE
+    from .partitions import PARENT_TABLE, create_partition_sql, quarters_of
+    from .manifest import (
+        file_fingerprint,
+        record_manifest_entry_async,
+        bump_dataset_version_async,
+    )
+    from .rollup import refresh_rollup_async
+    from .sources import source_name
+    from .parsing import parse_date, cents_to_decimal
+except ImportError:
+    # Fallback for running script directly
+    from importer import (
+        open_demonstracoes_rows,
+        DEMONSTRACOES_COLUMNS,
+        COPY_CHUNK_ROWS,
+        FILE_ENCODING,
+        DELIMITER,
+    )
+    from accounts import AccountCache, ACCOUNTS_TABLE
+    from partitions import PARENT_TABLE, create_partition_sql, quarters_of
+    from manifest import (
+        file_fingerprint,
+        record_manifest_entry_async,
+        bump_dataset_version_async,
+    )
+    from rollup import refresh_rollup_async
+    from sources import source_name
+    from parsing import parse_date, cents_to_decimal
+
+# --- Async Engine Configuration ---
+SERVICES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUEUE_CHUNKS = 4  # Parsed chunks held between a file's producer and its consumer
+DEFAULT_CONCURRENT_FILES = 2
+COPY_COLUMNS = [column.lower() for column in DEMONSTRACOES_COLUMNS]
+# ---
+
+_DONE = object()  # Queue sentinel: the producer finished (or failed)
+
+
+class _ProducerStopped(Exception):
+    """Raised in the producer thread once its consumer gave up on the file."""
+
+
+def load_database_settings():
+    """
+    Returns the API's DatabaseSettings (services/api/database.py), so the
+    engine connects with the same configuration as the API process.
+    """
+    try:
+        from api.database import settings
+    except ImportError:
+        # Running from services/database: make the sibling api package importable
+        sys.path.insert(0, SERVICES_DIR)
+        from api.database import settings
+    return settings
+
+
+class PoolAccountCache(AccountCache):
+    """
+    AccountCache backed by an asyncpg pool. resolve() is called from producer
+    threads; lookups that miss the in-memory map are run on the event loop.
+    """
+
+    def __init__(self, pool, loop):
+        super().__init__(connect=None)
+        self._pool = pool
+        self._loop = loop
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def _fetch_accounts(self):
+        return self._run(
+            self._pool.fetch(
+                f"SELECT CONTA_CONTABIL, DESCRICAO, CONTA_ID FROM {ACCOUNTS_TABLE};"
+            )
+        )
+
+    async def _insert_async(self, key):
+        async with self._pool.acquire() as connection:
+            conta_id = await connection.fetchval(
+                f"""
+                INSERT INTO {ACCOUNTS_TABLE} (CONTA_CONTABIL, DESCRICAO)
+                VALUES ($1, $2)
+                ON CONFLICT (CONTA_CONTABIL, DESCRICAO) DO NOTHING
+                RETURNING CONTA_ID;
+                """,
+                *key,
+            )
+            if conta_id is None:
+                # Inserted concurrently by another import
+                conta_id = await connection.fetchval(
+                    f"SELECT CONTA_ID FROM {ACCOUNTS_TABLE} "
+                    "WHERE CONTA_CONTABIL = $1 AND DESCRICAO = $2;",
+                    *key,
+                )
+            return conta_id
+
+    def _insert(self, key):
+        return self._run(self._insert_async(key))
+
+    def close(self):
+        pass  # Connections belong to the pool
+
+
+def _produce(
+    file_path, valid_ans_set, accounts, queue, loop, stop, stats, chunk_rows, quarantine_options
+):
+    """
+    Producer thread: parses the file with open_demonstracoes_rows and puts
+    lists of COPY records on the queue. queue.put blocks while the queue is
+    full, so parsing never runs more than QUEUE_CHUNKS chunks ahead of COPY.
+    """
+
+    def put(item):
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    try:
+        with open_demonstracoes_rows(
+            file_path,
+            valid_ans_set,
+            stats,
+            quarantine_options=quarantine_options,
+            accounts=accounts,
+        ) as rows:
+            records = []
+            for _, data_tuple in rows:
+                *fields, vl_saldo_inicial, vl_saldo_final = data_tuple
+                records.append(
+                    (
+                        *fields,
+                        cents_to_decimal(vl_saldo_inicial),
+                        cents_to_decimal(vl_saldo_final),
+                    )
+                )
+                if len(records) >= chunk_rows:
+                    if stop.is_set():
+                        raise _ProducerStopped()
+                    put(records)
+                    records = []
+            if records and not stop.is_set():
+                put(records)
+    finally:
+        put(_DONE)
+
+
+async def file_quarters_async(file_path):
+    """DATA values in a file, scanned off the event loop."""
+    _, _, quarters = await asyncio.to_thread(
+        file_fingerprint,
+        file_path,
+        key_column="DATA",
+        parse_key=parse_date,
+        delimiter=DELIMITER,
+        encoding=FILE_ENCODING,
+    )
+    return quarters
+
+
+async def ensure_partitions_async(pool, file_path, quarters=None):
+    """
+    Creates the quarter partitions a file needs before its load transaction
+    starts (CREATE TABLE ... PARTITION OF would wait on that transaction's
+    own lock on the parent). quarters defaults to a scan of the file's DATA
+    column.
+    """
+    if quarters is None:
+        quarters = await file_quarters_async(file_path)
+    async with pool.acquire() as connection:
+        for quarter in quarters_of(quarters):
+            await connection.execute(create_partition_sql(quarter))
+
+
+async def _discard_until_done(queue, producer):
+    """Drains the queue so a producer blocked on put() can reach its end."""
+    while not producer.done():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            await asyncio.sleep(0.01)
+    if not producer.cancelled():
+        producer.exception()  # Already reported by the consumer; mark it retrieved
+
+
+async def import_file_async(
+    pool,
+    file_path,
+    valid_ans_set,
+    accounts=None,
+    replace_quarters=None,
+    manifest_entry=None,
+    quarters=None,
+    quarantine_options=None,
+    chunk_rows=COPY_CHUNK_ROWS,
+    queue_chunks=QUEUE_CHUNKS,
+    partitioned=None,
+):
+    """
+    Imports one accounting file: a producer thread parses CSV chunks into a
+    bounded queue while this coroutine pushes them with
+    copy_records_to_table on one pooled connection. The whole file is one
+    transaction; replace_quarters and manifest_entry behave as in
+    import_demonstracoes_copy, and the saldos_trimestrais rollup of the
+    file's and the replaced quarters is refreshed in it. Rows go to the
+    parent table, whose missing quarter partitions are created first, not
+    through the partition swap. Returns True on success.
+    """
+    base_filename = source_name(file_path)
+    loop = asyncio.get_running_loop()
+    if accounts is None:
+        accounts = PoolAccountCache(pool, loop)
+    if partitioned is None:
+        partitioned = await _is_partitioned(pool)
+    if quarters is None:
+        quarters = await file_quarters_async(file_path)
+    if partitioned:
+        await ensure_partitions_async(pool, file_path, quarters)
+
+    queue = asyncio.Queue(maxsize=queue_chunks)
+    stop = threading.Event()
+    stats = {"skipped_invalid_ans": 0, "skipped_other": 0}
+    inserted_count = 0
+    start_time = time.perf_counter()
+    logging.info(
+        f"Importing demonstracoes (async COPY) from: {base_filename}, "
+        f"checking against {len(valid_ans_set)} valid ANS."
+    )
+
+    producer = asyncio.ensure_future(
+        asyncio.to_thread(
+            _produce,
+            file_path,
+            valid_ans_set,
+            accounts,
+            queue,
+            loop,
+            stop,
+            stats,
+            chunk_rows,
+            quarantine_options,
+        )
+    )
+    try:
+        async with pool.acquire() as connection:
+            async with connection.transaction():
+                if replace_quarters:
+                    await connection.execute(
+                        f"DELETE FROM {PARENT_TABLE} WHERE DATA = ANY($1::date[]);",
+                        list(replace_quarters),
+                    )
+                while True:
+                    item = await queue.get()
+                    if item is _DONE:
+                        break
+                    await connection.copy_records_to_table(
+                        PARENT_TABLE, records=item, columns=COPY_COLUMNS
+                    )
+                    inserted_count += len(item)
+                await producer  # Re-raises parse errors, rolling the file back
+                await refresh_rollup_async(
+                    connection, set(quarters) | set(replace_quarters or [])
+                )
+                if manifest_entry:
+                    await record_manifest_entry_async(connection, **manifest_entry)
+                await bump_dataset_version_async(connection)
+        succeeded = True
+    except Exception as e:
+        stop.set()
+        await _discard_until_done(queue, producer)
+        logging.error(f"Async import of {base_filename} failed: {e}")
+        inserted_count = 0
+        succeeded = False
+    finally:
+        if not producer.done():
+            stop.set()
+            await _discard_until_done(queue, producer)
+
+    elapsed = time.perf_counter() - start_time
+    logging.log(
+        logging.INFO if succeeded else logging.ERROR,
+        f"Finished processing {base_filename}. Success: {succeeded}. "
+        f"Inserted: {inserted_count}, Skipped (Invalid ANS): {stats['skipped_invalid_ans']}, "
+        f"Skipped (Other): {stats['skipped_other']}, Elapsed: {elapsed:.2f}s "
+        f"({inserted_count / elapsed if elapsed > 0 else 0.0:,.0f} rows/sec)",
+    )
+    return succeeded
+
+
+async def _is_partitioned(pool):
+    return await pool.fetchval(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table
+            WHERE partrelid = to_regclass($1)
+        );
+        """,
+        PARENT_TABLE,
+    )
+
+
+async def fetch_valid_ans_set(pool):
+    """Registro_ANS values of the loaded operadoras."""
+    rows = await pool.fetch('SELECT "registro_ans" FROM operadoras')
+    return frozenset(row[0] for row in rows)
+
+
+async def import_accounting_files_async(
+    pool,
+    accounting_files,
+    valid_ans_set=None,
+    concurrent_files=DEFAULT_CONCURRENT_FILES,
+    file_options=None,
+):
+    """
+    Imports accounting files over an asyncpg pool (e.g. the API's
+    get_db_pool()) and returns (successful_files, failed_files). Up to
+    concurrent_files files are loaded at once, each with its own producer
+    thread and pooled connection; file_options maps a file path to extra
+    import_file_async keyword arguments. The pool needs concurrent_files + 1
+    connections (new accounts are registered on a second one).
+    """
+    file_options = file_options or {}
+    if valid_ans_set is None:
+        valid_ans_set = await fetch_valid_ans_set(pool)
+    accounts = PoolAccountCache(pool, asyncio.get_running_loop())
+    partitioned = await _is_partitioned(pool)
+    semaphore = asyncio.Semaphore(max(concurrent_files, 1))
+
+    async def run(file_path):
+        async with semaphore:
+            return await import_file_async(
+                pool,
+                file_path,
+                valid_ans_set,
+                accounts=accounts,
+                partitioned=partitioned,
+                **file_options.get(file_path, {}),
+            )
+
+    results = await asyncio.gather(*(run(path) for path in sorted(accounting_files)))
+    successful_files = sum(1 for succeeded in results if succeeded)
+    return successful_files, len(results) - successful_files
+
+
+async def import_with_settings(
+    accounting_files,
+    valid_ans_set=None,
+    concurrent_files=DEFAULT_CONCURRENT_FILES,
+    file_options=None,
+):
+    """CLI entry point: runs import_accounting_files_async on a pool built from DatabaseSettings."""
+    settings = load_database_settings()
+    pool = await asyncpg.create_pool(
+        settings.database_url, min_size=1, max_size=max(concurrent_files, 1) + 1
+    )
+    try:
+        return await import_accounting_files_async(
+            pool,
+            accounting_files,
+            valid_ans_set=valid_ans_set,
+            concurrent_files=concurrent_files,
+            file_options=file_options,
+        )
+    finally:
+        await pool.close()
@@ -7,6 +7,7 @@ from datetime import datetime
 import re
 import zipfile
 import io
+import argparse
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -80,8 +81,12 @@ def unzip_file(zip_path, extract_to_dir):
         return False
 
 
-def download_accounting_data(base_url, target_dir, years_to_download):
-    """Downloads and unzips quarterly accounting data for specified years."""
+def download_accounting_data(base_url, target_dir, years_to_download, extract=True):
+    """
+    Downloads and unzips quarterly accounting data for specified years.
+    With extract=False the ZIPs are kept as downloaded; importer.py streams
+    the CSVs straight out of them.
+    """
     logging.info(f"Starting download of accounting data for years: {years_to_download}")
     downloaded_count = 0
 
@@ -119,7 +124,12 @@ def download_accounting_data(base_url, target_dir, years_to_download):
 
                 logging.info(f"Attempting to download {zip_filename}...")
                 if download_file(zip_url, zip_path):
-                    if unzip_file(zip_path, target_dir):
+                    if not extract:
+                        logging.info(
+                            f"Keeping {zip_filename} compressed (extraction disabled)."
+                        )
+                        year_downloaded_successfully = True
+                    elif unzip_file(zip_path, target_dir):
                         year_downloaded_successfully = (
                             True  # Mark success if at least one file is processed
                         )
@@ -200,13 +210,29 @@ def download_operator_data(base_url, target_dir):
         )
 
 
+def parse_args():
+    """Parses command-line options for the downloader."""
+    parser = argparse.ArgumentParser(
+        description="Downloads ANS accounting statements and the active operators file."
+    )
+    parser.add_argument(
+        "--no-extract",
+        action="store_true",
+        help="Keep the accounting ZIPs compressed; the importer reads them directly.",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
     os.makedirs(DOWNLOAD_DIR, exist_ok=True)
     logging.info(f"Ensured download directory exists: {DOWNLOAD_DIR}")
 
     # Task 3.1: Download Accounting Data (Specific Years: 2023, 2024)
     # Pass the list of target years directly
-    download_accounting_data(ACCOUNTING_DATA_URL, DOWNLOAD_DIR, TARGET_YEARS)
+    download_accounting_data(
+        ACCOUNTING_DATA_URL, DOWNLOAD_DIR, TARGET_YEARS, extract=not args.no_extract
+    )
 
     # Task 3.2: Download Operator Data
     download_operator_data(OPERATORS_DATA_URL, DOWNLOAD_DIR)
@@ -0,0 +1,197 @@
+import re
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Full Rebuild Configuration ---
+TARGET_TABLE = "demonstracoes_contabeis"
+MAINTENANCE_WORK_MEM = "1GB"  # Per index build session
+PARALLEL_MAINTENANCE_WORKERS = 4  # Postgres workers per CREATE INDEX
+MAX_CONCURRENT_INDEX_BUILDS = 4  # Sessions building different indexes at once
+# ---
+
+
+class PhaseTimer:
+    """Collects wall-clock durations of the named phases of a run."""
+
+    def __init__(self):
+        self.phases = []
+
+    def phase(self, name):
+        return _TimedPhase(self, name)
+
+    def report(self):
+        """Logs one line per phase plus the total."""
+        total = sum(seconds for _, seconds in self.phases)
+        logging.info("Full rebuild timing report:")
+        for name, seconds in self.phases:
+            share = (seconds / total * 100) if total else 0.0
+            logging.info(f"  {name:<12} {seconds:10.2f}s  ({share:5.1f}%)")
+        logging.info(f"  {'total':<12} {total:10.2f}s")
+
+
+class _TimedPhase:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        logging.info(f"Full rebuild phase '{self.name}' started.")
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        self.timer.phases.append((self.name, elapsed))
+        logging.info(f"Full rebuild phase '{self.name}' finished in {elapsed:.2f}s.")
+        return False
+
+
+def capture_definitions(cursor):
+    """
+    Records the DDL needed to recreate the target table's secondary indexes,
+    primary key and foreign keys. Returns a dict with 'indexes',
+    'primary_keys' and 'foreign_keys' lists of (name, definition).
+    """
+    cursor.execute(
+        """
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+        ORDER BY c.relname;
+        """,
+        (TARGET_TABLE,),
+    )
+    # On a partitioned table the definition reads "ON ONLY ..."; recreate on all partitions
+    indexes = [
+        (name, re.sub(r" ON ONLY ", " ON ", definition, count=1))
+        for name, definition in cursor.fetchall()
+    ]
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'f')
+        ORDER BY conname;
+        """,
+        (TARGET_TABLE,),
+    )
+    constraints = cursor.fetchall()
+    return {
+        "indexes": indexes,
+        "primary_keys": [(name, d) for name, kind, d in constraints if kind == "p"],
+        "foreign_keys": [(name, d) for name, kind, d in constraints if kind == "f"],
+    }
+
+
+def drop_definitions(cursor, definitions):
+    """Drops the captured foreign keys, primary key and secondary indexes."""
+    for name, _ in definitions["foreign_keys"] + definitions["primary_keys"]:
+        cursor.execute(f"ALTER TABLE {TARGET_TABLE} DROP CONSTRAINT IF EXISTS {name};")
+    for name, _ in definitions["indexes"]:
+        cursor.execute(f"DROP INDEX IF EXISTS {name};")
+    logging.info(
+        f"Dropped {len(definitions['indexes'])} indexes and "
+        f"{len(definitions['primary_keys']) + len(definitions['foreign_keys'])} constraints "
+        f"on {TARGET_TABLE}."
+    )
+
+
+def _configure_maintenance_session(cursor):
+    cursor.execute(f"SET maintenance_work_mem = '{MAINTENANCE_WORK_MEM}';")
+    cursor.execute(
+        f"SET max_parallel_maintenance_workers = {PARALLEL_MAINTENANCE_WORKERS};"
+    )
+
+
+def _build_index(connect, name, definition):
+    """Builds one index on its own connection (run from a worker thread)."""
+    conn = connect()
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            _configure_maintenance_session(cursor)
+            start = time.perf_counter()
+            cursor.execute(definition)
+        logging.info(f"Built index {name} in {time.perf_counter() - start:.2f}s.")
+    finally:
+        conn.close()
+
+
+def recreate_indexes(conn, connect, definitions):
+    """
+    Recreates the primary key on conn, then builds the secondary indexes
+    concurrently, one connection (from connect()) per index. CREATE INDEX
+    only takes a SHARE lock, so builds on the same table do not block each
+    other, and each one may use parallel maintenance workers.
+    """
+    with conn.cursor() as cursor:
+        _configure_maintenance_session(cursor)
+        for name, definition in definitions["primary_keys"]:
+            cursor.execute(
+                f"ALTER TABLE {TARGET_TABLE} ADD CONSTRAINT {name} {definition};"
+            )
+    conn.commit()
+
+    indexes = definitions["indexes"]
+    if not indexes:
+        return
+    with ThreadPoolExecutor(
+        max_workers=min(MAX_CONCURRENT_INDEX_BUILDS, len(indexes))
+    ) as executor:
+        futures = [
+            executor.submit(_build_index, connect, name, definition)
+            for name, definition in indexes
+        ]
+        for future in futures:
+            future.result()  # Re-raise the first build failure
+
+
+def _partitions(cursor):
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname;
+        """,
+        (TARGET_TABLE,),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def restore_foreign_keys(conn, definitions, partitioned):
+    """
+    Re-adds the foreign keys as NOT VALID (no scan, brief lock) and then
+    runs VALIDATE CONSTRAINT, which checks existing rows under a weaker lock.
+    Partitioned tables do not accept NOT VALID foreign keys, so each
+    partition gets a validated copy first and the parent constraint then
+    adopts them instead of rescanning.
+    """
+    with conn.cursor() as cursor:
+        _configure_maintenance_session(cursor)
+        partitions = _partitions(cursor) if partitioned else [TARGET_TABLE]
+        for name, definition in definitions["foreign_keys"]:
+            for table in partitions:
+                constraint = name if table == TARGET_TABLE else f"{table}_{name}"
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {constraint} {definition} NOT VALID;"
+                )
+                conn.commit()
+                cursor.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint};")
+                conn.commit()
+            if partitioned:
+                cursor.execute(
+                    f"ALTER TABLE {TARGET_TABLE} ADD CONSTRAINT {name} {definition};"
+                )
+                conn.commit()
+
+
+def analyze(conn):
+    """Refreshes planner statistics after the bulk load."""
+    with conn.cursor() as cursor:
+        cursor.execute(f"ANALYZE {TARGET_TABLE};")
+    conn.commit()
@@ -1,13 +1,104 @@
 import os
+import io
+import re
 import csv
 import glob
+import time
+import asyncio
+import argparse
+import cProfile
+from datetime import datetime
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import psycopg2
 from psycopg2.extras import execute_batch
-from decimal import Decimal, InvalidOperation
-from datetime import datetime
 import logging
 from dotenv import load_dotenv
 
+try:
+    from .manifest import (
+        ensure_manifest_table,
+        ensure_dataset_version_table,
+        bump_dataset_version,
+        load_manifest,
+        file_fingerprint,
+        is_unchanged,
+        record_manifest_entry,
+        delete_manifest_entries,
+    )
+    from .partitions import (
+        is_partitioned,
+        quarters_of,
+        ensure_quarter_partitions,
+        drop_quarter_partitions,
+        create_load_table,
+        build_partition_indexes,
+        swap_in_partition,
+    )
+    from .sources import open_source, source_name, source_size, discover_sources
+    from .profiling import ImportProfile, MEMORY_RSS, MEMORY_TRACEMALLOC, stage
+    from .quarantine import RejectQuarantine, RejectRateExceeded, MAX_REJECT_RATE
+    from .accounts import AccountCache
+    from .rollup import ensure_rollup_table, refresh_rollup, ROLLUP_TABLE
+    from .parquet_cache import (
+        cached_parquet,
+        iter_cached_batches,
+        ACCOUNTING_COLUMNS,
+        RAW_COLUMNS,
+        RAW_SUFFIX,
+    )
+    from .parsing import parse_date, parse_cents_column, format_cents, cents_to_decimal
+    from .full_rebuild import (
+        PhaseTimer,
+        capture_definitions,
+        drop_definitions,
+        recreate_indexes,
+        restore_foreign_keys,
+        analyze,
+    )
+except ImportError:
+    # Fallback for running script directly
+    from manifest import (
+        ensure_manifest_table,
+        ensure_dataset_version_table,
+        bump_dataset_version,
+        load_manifest,
+        file_fingerprint,
+        is_unchanged,
+        record_manifest_entry,
+        delete_manifest_entries,
+    )
+    from partitions import (
+        is_partitioned,
+        quarters_of,
+        ensure_quarter_partitions,
+        drop_quarter_partitions,
+        create_load_table,
+        build_partition_indexes,
+        swap_in_partition,
+    )
+    from sources import open_source, source_name, source_size, discover_sources
+    from profiling import ImportProfile, MEMORY_RSS, MEMORY_TRACEMALLOC, stage
+    from quarantine import RejectQuarantine, RejectRateExceeded, MAX_REJECT_RATE
+    from accounts import AccountCache
+    from rollup import ensure_rollup_table, refresh_rollup, ROLLUP_TABLE
+    from parquet_cache import (
+        cached_parquet,
+        iter_cached_batches,
+        ACCOUNTING_COLUMNS,
+        RAW_COLUMNS,
+        RAW_SUFFIX,
+    )
+    from parsing import parse_date, parse_cents_column, format_cents, cents_to_decimal
+    from full_rebuild import (
+        PhaseTimer,
+        capture_definitions,
+        drop_definitions,
+        recreate_indexes,
+        restore_foreign_keys,
+        analyze,
+    )
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
@@ -41,6 +132,53 @@ FILE_ENCODING = "utf-8"
 DELIMITER = ";"
 # ---
 
+# --- Operadoras Staging Configuration ---
+OPERADORAS_STAGING_TABLE = "operadoras_staging"
+OPERADORAS_COLUMNS = (
+    "Registro_ANS",
+    "CNPJ",
+    "Razao_Social",
+    "Nome_Fantasia",
+    "Modalidade",
+    "Logradouro",
+    "Numero",
+    "Complemento",
+    "Bairro",
+    "Cidade",
+    "UF",
+    "CEP",
+    "DDD",
+    "Telefone",
+    "Fax",
+    "Endereco_eletronico",
+    "Representante",
+    "Cargo_Representante",
+    "Data_Registro_ANS",
+)
+INT_MAX = 2147483647  # Registro_ANS is INT
+BIGINT_MAX = 9223372036854775807  # CNPJ is BIGINT
+# ---
+
+# --- Loader Configuration ---
+LOADER_COPY = "copy"
+LOADER_BATCH = "batch"
+DEFAULT_LOADER = LOADER_COPY
+ENGINE_SYNC = "sync"
+ENGINE_ASYNC = "async"
+COPY_CHUNK_ROWS = 50000  # Rows buffered in memory before each COPY flush
+PARSE_CHUNK_ROWS = 10000  # Rows whose balances are parsed together by parse_cents_column
+PROFILE_REPORT_DIR = os.path.join(BASE_DIR, "data", "reports", "import")
+REJECT_DIR = os.path.join(BASE_DIR, "data", "rejects")
+REJECT_CHECK_INTERVAL = 1000  # Rows between reject-rate checks while reading a file
+DEMONSTRACOES_COLUMNS = (
+    "DATA",
+    "REGISTRO_ANS",
+    "CONTA_ID",
+    "VL_SALDO_INICIAL",
+    "VL_SALDO_FINAL",
+)
+# ---
+
 
 def get_db_connection():
     """Establishes a connection to the PostgreSQL database."""
@@ -68,154 +206,272 @@ def get_db_connection():
         raise
 
 
-def parse_date(date_str, formats=["%Y-%m-%d", "%d/%m/%Y"]):
-    """Tries multiple formats to parse a date string."""
-    if not date_str:
-        return None
-    for fmt in formats:
-        try:
-            # Handle potential extra whitespace
-            return datetime.strptime(date_str.strip(), fmt).date()
-        except ValueError:
-            continue
-    logging.warning(f"Could not parse date: '{date_str}' with formats {formats}")
-    return None
+# Chart-of-accounts cache, created on first use; each worker process gets its own
+_account_cache = None
 
 
-def parse_decimal(decimal_str):
-    """Safely parses a string to a Decimal, handling pt-BR format."""
-    if not decimal_str:
-        return None
-    try:
-        # Handle potential thousands separators ('.') and decimal comma (',')
-        cleaned_str = decimal_str.strip().replace(".", "").replace(",", ".")
-        # Handle potential negative signs represented by parentheses
-        if cleaned_str.startswith("(") and cleaned_str.endswith(")"):
-            cleaned_str = "-" + cleaned_str[1:-1]
-        return Decimal(cleaned_str)
-    except InvalidOperation:
-        logging.warning(f"Could not parse decimal: '{decimal_str}'")
-        return None
-
-
-def import_operadoras(conn, file_path):
-    """Imports operadoras data, truncating the table first."""
+def get_account_cache():
+    """Returns this process's AccountCache (contas_contabeis ids by account)."""
+    global _account_cache
+    if _account_cache is None:
+        _account_cache = AccountCache(get_db_connection)
+    return _account_cache
+
+
+def _normalize_header(name):
+    """Turns a CSV header (e.g. 'Registro ANS') into a staging column name ('registro_ans')."""
+    cleaned = re.sub(r"[^0-9a-z]+", "_", name.replace("\ufeff", "").strip().lower())
+    cleaned = cleaned.strip("_") or "col"
+    return f"c_{cleaned}" if cleaned[0].isdigit() else cleaned
+
+
+def _operadoras_fts_expression(alias):
+    """Bulk equivalent of operadoras_trigger() from 05_fts_setup.sql."""
+    return f"""
+        setweight(to_tsvector('pg_catalog.portuguese', coalesce({alias}.razao_social,'')), 'A') ||
+        setweight(to_tsvector('pg_catalog.portuguese', coalesce({alias}.nome_fantasia,'')), 'A') ||
+        setweight(to_tsvector('pg_catalog.portuguese', coalesce({alias}.cnpj::text,'')), 'B') ||
+        setweight(to_tsvector('pg_catalog.portuguese', coalesce({alias}.cidade,'')), 'C')
+    """
+
+
+def _impossible_date_condition(column):
+    """
+    SQL condition that is true for a YYYY-MM-DD or DD/MM/YYYY text value that
+    is not a calendar date (e.g. 2023-02-30), which to_date() would raise on.
+    Nested CASEs keep make_date() from seeing an invalid year or month.
+    """
+    value = f"trim({column})"
+    iso = f"{value} ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$'"
+    br = f"{value} ~ '^[0-9]{{2}}/[0-9]{{2}}/[0-9]{{4}}$'"
+    year = f"(CASE WHEN {iso} THEN substr({value}, 1, 4) ELSE substr({value}, 7, 4) END)::int"
+    month = f"(CASE WHEN {iso} THEN substr({value}, 6, 2) ELSE substr({value}, 4, 2) END)::int"
+    day = f"(CASE WHEN {iso} THEN substr({value}, 9, 2) ELSE substr({value}, 1, 2) END)::int"
+    return f"""CASE
+        WHEN NOT ({iso} OR {br}) THEN false
+        WHEN {year} < 1 OR {month} NOT BETWEEN 1 AND 12 THEN true
+        ELSE {day} NOT BETWEEN 1 AND
+            extract(day FROM make_date({year}, {month}, 1) + interval '1 month' - interval '1 day')
+    END"""
+
+
+def new_quarantine(name, fieldnames, quarantine_options=None):
+    """
+    RejectQuarantine for one input file. quarantine_options ({'reject_dir',
+    'max_reject_rate'}) comes from the CLI; without it rejects are only
+    counted and sampled in the log.
+    """
+    options = quarantine_options or {}
+    return RejectQuarantine(
+        name,
+        fieldnames,
+        reject_dir=options.get("reject_dir"),
+        max_reject_rate=options.get("max_reject_rate", MAX_REJECT_RATE),
+        delimiter=DELIMITER,
+        encoding=FILE_ENCODING,
+    )
+
+
+def import_operadoras(conn, file_path, quarantine_options=None):
+    """
+    Imports operadoras data through an unlogged staging table, truncating the
+    target table first.
+
+    The raw CSV is COPY'd into OPERADORAS_STAGING_TABLE as text, rows are
+    validated and deduplicated with set-based UPDATEs, and the survivors are
+    cast and loaded with a single INSERT ... SELECT. When the FTS column from
+    05_fts_setup.sql exists, fts_document is computed in that same statement
+    and the per-row trigger is disabled for the load.
+
+    Rejected rows go to a RejectQuarantine; if their share exceeds the
+    reject-rate threshold the import is rolled back before the TRUNCATE.
+
+    Returns the rejected rows as a list of (line_number, registro_ans,
+    razao_social, reason) tuples, or None if the import failed.
+    """
     logging.info(f"Importing operadoras from: {file_path}")
-    inserted_count = 0
-    skipped_count = 0
     cursor = None
     try:
         cursor = conn.cursor()
 
-        # --- Truncate table before import ---
-        logging.warning("Truncating operadoras table (CASCADE)...")
-        cursor.execute("TRUNCATE TABLE operadoras CASCADE;")
-        logging.info("Operadoras table truncated.")
-        # ---
-
-        with open(file_path, mode="r", encoding=FILE_ENCODING) as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=DELIMITER)
-            sql_columns = [
-                "Registro_ANS",
-                "CNPJ",
-                "Razao_Social",
-                "Nome_Fantasia",
-                "Modalidade",
-                "Logradouro",
-                "Numero",
-                "Complemento",
-                "Bairro",
-                "Cidade",
-                "UF",
-                "CEP",
-                "DDD",
-                "Telefone",
-                "Fax",
-                "Endereco_eletronico",
-                "Representante",
-                "Cargo_Representante",
-                "Data_Registro_ANS",
-            ]
-            placeholders = ", ".join(["%s"] * len(sql_columns))
-            sql = f"""
-                INSERT INTO operadoras ({', '.join(sql_columns)})
-                VALUES ({placeholders})
-                ON CONFLICT (Registro_ANS) DO NOTHING;
+        # --- Target column metadata (lengths drive validation, fts_document is optional) ---
+        cursor.execute(
+            """
+            SELECT column_name, character_maximum_length
+            FROM information_schema.columns
+            WHERE table_name = 'operadoras'
             """
+        )
+        column_limits = {name: limit for name, limit in cursor.fetchall()}
+        has_fts = "fts_document" in column_limits
 
-            for row_num, row in enumerate(reader, 1):
-                try:
-                    # Prepare data tuple in the correct order for sql_columns
-                    data_tuple = []
-                    # Clean and prepare data - use .get() with defaults for safety
-                    reg_ans_str = row.get(
-                        "Registro ANS"
-                    )  # Handle potential space in header
-                    if reg_ans_str is None:
-                        reg_ans_str = row.get("Registro_ANS")  # Fallback
-
-                    reg_ans = (
-                        int(reg_ans_str)
-                        if reg_ans_str and reg_ans_str.isdigit()
-                        else None
-                    )
-                    data_reg_ans = parse_date(row.get("Data_Registro_ANS"))
+        with open(file_path, mode="r", encoding=FILE_ENCODING, newline="") as csvfile:
+            header = next(csv.reader([csvfile.readline()], delimiter=DELIMITER))
+            staging_columns = [_normalize_header(name) for name in header]
 
-                    if reg_ans is None:
-                        logging.warning(
-                            f"Skipping row {row_num} due to missing or invalid Registro_ANS: {row}"
-                        )
-                        skipped_count += 1
-                        continue
+            # --- Stage raw CSV as text ---
+            cursor.execute(f"DROP TABLE IF EXISTS {OPERADORAS_STAGING_TABLE};")
+            column_defs = ", ".join(f"{col} TEXT" for col in staging_columns)
+            cursor.execute(
+                f"""
+                CREATE UNLOGGED TABLE {OPERADORAS_STAGING_TABLE} (
+                    _line BIGSERIAL,
+                    {column_defs},
+                    reject_reason TEXT
+                );
+                """
+            )
+            cursor.copy_expert(
+                f"COPY {OPERADORAS_STAGING_TABLE} ({', '.join(staging_columns)}) "
+                f"FROM STDIN WITH (FORMAT csv, DELIMITER '{DELIMITER}')",
+                csvfile,
+            )
+        cursor.execute(f"SELECT count(*) FROM {OPERADORAS_STAGING_TABLE};")
+        staged_count = cursor.fetchone()[0]
+        logging.info(f"Staged {staged_count} operadoras rows.")
 
-                    data_tuple = (
-                        reg_ans,
-                        row.get("CNPJ"),
-                        row.get("Razao_Social"),
-                        row.get("Nome_Fantasia"),
-                        row.get("Modalidade"),
-                        row.get("Logradouro"),
-                        row.get("Numero"),
-                        row.get("Complemento"),
-                        row.get("Bairro"),
-                        row.get("Cidade"),
-                        row.get("UF"),
-                        row.get("CEP"),
-                        row.get("DDD"),
-                        row.get("Telefone"),
-                        row.get("Fax"),
-                        row.get("Endereco_eletronico"),
-                        row.get("Representante"),
-                        row.get("Cargo_Representante"),
-                        data_reg_ans,
-                    )
+        def source(column):
+            return f"s.{column}" if column in staging_columns else "NULL"
 
-                    if len(data_tuple) != len(sql_columns):
-                        raise ValueError(
-                            f"Row {row_num}: Mismatch between data tuple size ({len(data_tuple)}) and expected columns ({len(sql_columns)})"
-                        )
+        # --- Validate ---
+        checks = [
+            (
+                f"{source('registro_ans')} IS NULL OR trim({source('registro_ans')}) !~ '^[0-9]+$'",
+                "invalid_registro_ans",
+            ),
+            (
+                f"{source('cnpj')} IS NOT NULL AND trim({source('cnpj')}) !~ '^[0-9]+$'",
+                "invalid_cnpj",
+            ),
+            # Digits-only by now; numeric casts cannot overflow, unlike ::int / ::bigint
+            (f"trim({source('registro_ans')})::numeric > {INT_MAX}", "registro_ans_out_of_range"),
+            (f"trim({source('cnpj')})::numeric > {BIGINT_MAX}", "cnpj_out_of_range"),
+            (
+                _impossible_date_condition(source("data_registro_ans")),
+                "invalid_data_registro_ans",
+            ),
+            (
+                f"{source('razao_social')} IS NULL OR trim({source('razao_social')}) = ''",
+                "missing_razao_social",
+            ),
+        ]
+        length_checks = [
+            f"length({source(col.lower())}) > {column_limits[col.lower()]}"
+            for col in OPERADORAS_COLUMNS
+            if column_limits.get(col.lower()) and col.lower() in staging_columns
+        ]
+        if length_checks:
+            checks.append((" OR ".join(length_checks), "value_too_long"))
+        case_branches = "\n".join(
+            f"WHEN {condition} THEN '{reason}'" for condition, reason in checks
+        )
+        cursor.execute(
+            f"""
+            UPDATE {OPERADORAS_STAGING_TABLE} s
+            SET reject_reason = CASE {case_branches} END;
+            """
+        )
 
-                    cursor.execute(sql, data_tuple)
-                    inserted_count += 1
-                except (ValueError, TypeError, KeyError) as data_error:
-                    logging.error(
-                        f"Error processing row {row_num}: {row} - {data_error}"
-                    )
-                    skipped_count += 1
+        # --- Deduplicate (first occurrence in the file wins) ---
+        for key_column, reason in (
+            ("registro_ans", "duplicate_registro_ans"),
+            ("cnpj", "duplicate_cnpj"),
+        ):
+            if key_column not in staging_columns:
+                continue
+            cursor.execute(
+                f"""
+                UPDATE {OPERADORAS_STAGING_TABLE} s
+                SET reject_reason = '{reason}'
+                FROM (
+                    SELECT _line,
+                           row_number() OVER (
+                               PARTITION BY trim({key_column})::numeric ORDER BY _line
+                           ) AS rn
+                    FROM {OPERADORAS_STAGING_TABLE}
+                    WHERE reject_reason IS NULL AND {key_column} IS NOT NULL
+                ) d
+                WHERE s._line = d._line AND d.rn > 1;
+                """
+            )
 
-                except Exception as row_error:
-                    logging.error(
-                        f"Unexpected error processing row {row_num}: {row} - {row_error}"
-                    )
-                    skipped_count += 1
+        # --- Quarantine rejects; bail out before touching operadoras if too many ---
+        cursor.execute(
+            f"""
+            SELECT _line, reject_reason, {source('registro_ans')}, {source('razao_social')},
+                   {', '.join(staging_columns)}
+            FROM {OPERADORAS_STAGING_TABLE} s
+            WHERE reject_reason IS NOT NULL
+            ORDER BY _line;
+            """
+        )
+        rejected_rows = []
+        with new_quarantine(
+            os.path.basename(file_path), header, quarantine_options
+        ) as quarantine:
+            for line, reason, reg_ans, razao_social, *values in cursor.fetchall():
+                quarantine.reject(reason, line, dict(zip(header, values)))
+                rejected_rows.append((line, reg_ans, razao_social, reason))
+            quarantine.check_rate(staged_count, final=True)
 
-            conn.commit()
-            logging.info(
-                f"Finished importing operadoras. Inserted: {inserted_count}, Skipped: {skipped_count}"
-            )
+        # --- Truncate table before import ---
+        logging.warning("Truncating operadoras table (CASCADE)...")
+        cursor.execute("TRUNCATE TABLE operadoras CASCADE;")
+        logging.info("Operadoras table truncated.")
+        # ---
+
+        # --- Cast and load in one statement ---
+        data_registro = source("data_registro_ans")
+        select_expressions = {
+            "Registro_ANS": f"trim({source('registro_ans')})::int",
+            "CNPJ": f"trim({source('cnpj')})::bigint",
+            "Data_Registro_ANS": f"""CASE
+                WHEN trim({data_registro}) ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$'
+                    THEN to_date(trim({data_registro}), 'YYYY-MM-DD')
+                WHEN trim({data_registro}) ~ '^[0-9]{{2}}/[0-9]{{2}}/[0-9]{{4}}$'
+                    THEN to_date(trim({data_registro}), 'DD/MM/YYYY')
+            END""",
+        }
+        select_list = ", ".join(
+            f"{select_expressions.get(col, source(col.lower()))} AS {col.lower()}"
+            for col in OPERADORAS_COLUMNS
+        )
+        insert_columns = list(OPERADORAS_COLUMNS)
+        outer_list = [f"t.{col.lower()}" for col in OPERADORAS_COLUMNS]
+        if has_fts:
+            # fts_document is built from the cast rows in bulk instead of per-row by the trigger
+            insert_columns.append("fts_document")
+            outer_list.append(_operadoras_fts_expression("t"))
+            cursor.execute("ALTER TABLE operadoras DISABLE TRIGGER USER;")
+        insert_sql = f"""
+            INSERT INTO operadoras ({', '.join(insert_columns)})
+            SELECT {', '.join(outer_list)}
+            FROM (
+                SELECT {select_list}
+                FROM {OPERADORAS_STAGING_TABLE} s
+                WHERE s.reject_reason IS NULL
+            ) t;
+        """
+        cursor.execute(insert_sql)
+        inserted_count = cursor.rowcount
+        if has_fts:
+            cursor.execute("ALTER TABLE operadoras ENABLE TRIGGER USER;")
+
+        cursor.execute(f"DROP TABLE IF EXISTS {OPERADORAS_STAGING_TABLE};")
+        conn.commit()
+
+        logging.info(
+            f"Finished importing operadoras. Inserted: {inserted_count}, "
+            f"Skipped: {len(rejected_rows)}"
+        )
+        return rejected_rows
 
     except FileNotFoundError:
         logging.error(f"Operator file not found: {file_path}")
+    except RejectRateExceeded as rate_err:
+        logging.error(f"Operadoras import aborted: {rate_err}")
+        if conn:
+            conn.rollback()
     except Exception as e:
         logging.error(f"Error importing operadoras: {e}")
         if conn:
@@ -223,104 +479,313 @@ def import_operadoras(conn, file_path):
     finally:
         if cursor:
             cursor.close()
+    return None
+
+
+def _parse_pending_balances(pending, profile=None):
+    """Parses the buffered balance strings column-wise and yields complete rows."""
+    with stage(profile, "parse_fields"):
+        saldos_iniciais = parse_cents_column([item[2] for item in pending])
+        saldos_finais = parse_cents_column([item[3] for item in pending])
+    for (row_num, head, _, _), vl_saldo_inicial, vl_saldo_final in zip(
+        pending, saldos_iniciais, saldos_finais
+    ):
+        yield row_num, head + (vl_saldo_inicial, vl_saldo_final)
+
+
+def iter_demonstracoes_rows(
+    reader,
+    valid_ans_set,
+    base_filename,
+    stats,
+    chunk_rows=PARSE_CHUNK_ROWS,
+    profile=None,
+    quarantine=None,
+    accounts=None,
+):
+    """
+    Yields (row_num, data_tuple) for every accounting row whose REG_ANS is in
+    valid_ans_set. CD_CONTA_CONTABIL and DESCRICAO are replaced by their
+    CONTA_ID from accounts (default: get_account_cache()). Skipped rows are
+    counted in the provided stats dict ('skipped_invalid_ans' and
+    'skipped_other') and, with a quarantine,
+    written to its reject file with a reason code; the reject rate is checked
+    every REJECT_CHECK_INTERVAL rows and at the end of the file, raising
+    RejectRateExceeded when it is too high.
+
+    Balances are parsed chunk_rows at a time with parse_cents_column and
+    yielded as integer cents (None when missing or unparseable). With a
+    profile, time is charged to the csv_decode, reg_ans_filter,
+    parse_fields and account_lookup stages.
+    """
+    pending = []
+    perf_counter = time.perf_counter
+    row_num = 0
+    resolve_account = (accounts or get_account_cache()).resolve
+    if profile:
+        reader = profile.timed(reader, "csv_decode")
+    for row_num, row in enumerate(reader, 1):
+        reg_ans = None
+        reject = None
+        try:
+            if profile:
+                stage_start = perf_counter()
+            reg_ans_str = row.get("REG_ANS")
+            reg_ans = (
+                int(reg_ans_str) if reg_ans_str and reg_ans_str.isdigit() else None
+            )
+            is_valid_ans = reg_ans in valid_ans_set
+            if profile:
+                profile.add("reg_ans_filter", perf_counter() - stage_start)
+
+            if not is_valid_ans:
+                stats["skipped_invalid_ans"] += 1
+                reject = ("unknown_registro_ans", None)
+            else:
+                # --- If REG_ANS is valid, proceed with parsing other fields ---
+                if profile:
+                    stage_start = perf_counter()
+                data_dt = parse_date(row.get("DATA"))  # Memoized: few distinct DATA values per file
+                conta_contabil = row.get("CD_CONTA_CONTABIL")
+                descricao = row.get("DESCRICAO")
+                if profile:
+                    profile.add("parse_fields", perf_counter() - stage_start)
+
+                # Check other required fields (excluding reg_ans as it's already validated)
+                if data_dt is None or conta_contabil is None or descricao is None:
+                    stats["skipped_other"] += 1
+                    reject = ("missing_required_field", None)
+                else:
+                    if profile:
+                        stage_start = perf_counter()
+                    conta_id = resolve_account(conta_contabil, descricao)
+                    if profile:
+                        profile.add("account_lookup", perf_counter() - stage_start)
+                    # Tuple order matches DEMONSTRACOES_COLUMNS once the balances are appended
+                    pending.append(
+                        (
+                            row_num,
+                            (data_dt, reg_ans, conta_id),
+                            row.get("VL_SALDO_INICIAL"),
+                            row.get("VL_SALDO_FINAL"),
+                        )
+                    )
+
+        except (ValueError, TypeError, KeyError) as data_error:
+            stats["skipped_other"] += 1
+            reject = ("data_error", str(data_error))
+        except Exception as proc_error:
+            stats["skipped_other"] += 1
+            reject = ("unexpected_error", str(proc_error))
+
+        if quarantine:
+            if reject:
+                quarantine.reject(reject[0], row_num, row, detail=reject[1])
+            if row_num % REJECT_CHECK_INTERVAL == 0:
+                quarantine.check_rate(row_num)
+
+        if len(pending) >= chunk_rows:
+            yield from _parse_pending_balances(pending, profile)
+            pending = []
+
+    if quarantine:
+        quarantine.check_rate(row_num, final=True)
+    if pending:
+        yield from _parse_pending_balances(pending, profile)
+
+
+def iter_parquet_demonstracoes_rows(
+    batches,
+    valid_ans_set,
+    stats,
+    profile=None,
+    quarantine=None,
+    accounts=None,
+):
+    """
+    Counterpart of iter_demonstracoes_rows for a Parquet cache file
+    (parquet_cache.py): dates, REG_ANS and balances (in cents) are already
+    typed, so rows are only filtered, checked and mapped to their CONTA_ID.
+    Yields the same (row_num, data_tuple) pairs and applies the same skip
+    counting, reject reasons and quarantine. Rejected rows hold the CSV text
+    of the cells that did not parse (kept by the cache in <name>_RAW) and
+    the typed values of the others.
+    """
+    resolve_account = (accounts or get_account_cache()).resolve
+    raw_positions = [ACCOUNTING_COLUMNS.index(name) for name in RAW_COLUMNS]
+    row_num = 0
+    if profile:
+        batches = profile.timed(batches, "parquet_read")
+    for batch in batches:
+        columns = batch.to_pydict()
+        raw_columns = [columns[f"{name}{RAW_SUFFIX}"] for name in RAW_COLUMNS]
+        for index, values in enumerate(zip(*(columns[name] for name in ACCOUNTING_COLUMNS))):
+            row_num += 1
+            data_dt, reg_ans, conta_contabil, descricao, vl_saldo_inicial, vl_saldo_final = values
+            reject = None
+            loaded = None
+            try:
+                if reg_ans not in valid_ans_set:
+                    stats["skipped_invalid_ans"] += 1
+                    reject = ("unknown_registro_ans", None)
+                elif data_dt is None or conta_contabil is None or descricao is None:
+                    stats["skipped_other"] += 1
+                    reject = ("missing_required_field", None)
+                else:
+                    loaded = (
+                        data_dt,
+                        reg_ans,
+                        resolve_account(conta_contabil, descricao),
+                        vl_saldo_inicial,
+                        vl_saldo_final,
+                    )
+            except (ValueError, TypeError, KeyError) as data_error:
+                stats["skipped_other"] += 1
+                reject = ("data_error", str(data_error))
+            except Exception as proc_error:
+                stats["skipped_other"] += 1
+                reject = ("unexpected_error", str(proc_error))
+
+            if quarantine:
+                if reject:
+                    row = list(values)
+                    for position, raw_column in zip(raw_positions, raw_columns):
+                        raw = raw_column[index]
+                        if raw is not None:
+                            row[position] = raw
+                    quarantine.reject(reject[0], row_num, row, detail=reject[1])
+                if row_num % REJECT_CHECK_INTERVAL == 0:
+                    quarantine.check_rate(row_num)
+            if loaded:
+                yield row_num, loaded
+
+    if quarantine:
+        quarantine.check_rate(row_num, final=True)
+
+
+@contextmanager
+def open_demonstracoes_rows(
+    file_path, valid_ans_set, stats, profile=None, quarantine_options=None, accounts=None
+):
+    """
+    Opens an accounting file and yields its (row_num, data_tuple) iterator,
+    with rejects going to the file's quarantine. An up-to-date Parquet cache
+    of the file is read instead of the CSV when one exists.
+    """
+    base_filename = source_name(file_path)
+    parquet_path = cached_parquet(file_path)
+    if parquet_path:
+        logging.info(f"Reading {base_filename} from Parquet cache {parquet_path}.")
+        with new_quarantine(
+            base_filename, ACCOUNTING_COLUMNS, quarantine_options
+        ) as quarantine:
+            yield iter_parquet_demonstracoes_rows(
+                iter_cached_batches(parquet_path),
+                valid_ans_set,
+                stats,
+                profile=profile,
+                quarantine=quarantine,
+                accounts=accounts,
+            )
+        return
+
+    with open_source(file_path, encoding=FILE_ENCODING) as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=DELIMITER)
+        with new_quarantine(
+            base_filename, reader.fieldnames, quarantine_options
+        ) as quarantine:
+            yield iter_demonstracoes_rows(
+                reader,
+                valid_ans_set,
+                base_filename,
+                stats,
+                profile=profile,
+                quarantine=quarantine,
+                accounts=accounts,
+            )
+
+
+def _log_file_summary(
+    base_filename, file_succeeded, inserted_count, stats, elapsed, profile=None
+):
+    """Logs the final status for an accounting file, including skip counts and throughput."""
+    if profile:
+        profile.count("rows_loaded", inserted_count)
+        for counter, value in stats.items():
+            profile.count(counter, value)
+    skipped_invalid_ans = stats["skipped_invalid_ans"]
+    skipped_other = stats["skipped_other"]
+    total_skipped = skipped_invalid_ans + skipped_other
+    rows_per_sec = inserted_count / elapsed if elapsed > 0 else 0.0
+    log_level = logging.INFO if file_succeeded else logging.ERROR
+    logging.log(
+        log_level,
+        f"Finished processing {base_filename}. Success: {file_succeeded}. "
+        f"Inserted: {inserted_count}, Skipped (Invalid ANS): {skipped_invalid_ans}, "
+        f"Skipped (Other): {skipped_other}, Total Skipped: {total_skipped}, "
+        f"Elapsed: {elapsed:.2f}s ({rows_per_sec:,.0f} rows/sec)",
+    )
 
 
 def import_demonstracoes_batch(
-    conn, file_path, valid_ans_set, batch_size=1000
+    conn,
+    file_path,
+    valid_ans_set,
+    batch_size=1000,
+    profile=None,
+    quarantine_options=None,
 ):  # Added valid_ans_set parameter
     """
     Imports demonstracoes contabeis data, skipping rows where REG_ANS
     is not found in the provided valid_ans_set. Includes VL_SALDO_INICIAL.
+    Batches are committed as they go, so a file aborted for its reject rate
+    keeps the rows committed before the abort.
     """
-    global FILE_ENCODING, DELIMITER, parse_date, parse_decimal
-
-    base_filename = os.path.basename(file_path)
+    base_filename = source_name(file_path)
     logging.info(
         f"Importing demonstracoes from: {base_filename}, checking against {len(valid_ans_set)} valid ANS."
     )
     inserted_count = 0
-    skipped_invalid_ans = 0
-    skipped_other = 0
+    stats = {"skipped_invalid_ans": 0, "skipped_other": 0}
     batch = []
     cursor = None
     file_succeeded = True
+    start_time = time.perf_counter()
 
     try:
         cursor = conn.cursor()
-        with open(file_path, mode="r", encoding=FILE_ENCODING) as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=DELIMITER)
+        with open_demonstracoes_rows(
+            file_path,
+            valid_ans_set,
+            stats,
+            profile=profile,
+            quarantine_options=quarantine_options,
+        ) as rows:
 
-            sql = """
+            sql = f"""
                 INSERT INTO demonstracoes_contabeis (
-                    DATA, REGISTRO_ANS, CONTA_CONTABIL, DESCRICAO,
-                    VL_SALDO_INICIAL, VL_SALDO_FINAL
+                    {', '.join(DEMONSTRACOES_COLUMNS)}
                 ) VALUES (
-                    %s, %s, %s, %s, %s, %s
+                    {', '.join(['%s'] * len(DEMONSTRACOES_COLUMNS))}
                 );
             """
 
-            for row_num, row in enumerate(reader, 1):
-                # --- Process Row Data ---
-                try:
-                    reg_ans_str = row.get("REG_ANS")
-                    reg_ans = (
-                        int(reg_ans_str)
-                        if reg_ans_str and reg_ans_str.isdigit()
-                        else None
-                    )
-
-                    if reg_ans not in valid_ans_set:
-                        if skipped_invalid_ans % 1000 == 0:  # Log every 1000 skips
-                            logging.debug(
-                                f"Skipping row {row_num} in {base_filename}: REG_ANS {reg_ans} not in valid set. (Sample log)"
-                            )
-                        skipped_invalid_ans += 1
-                        continue
-
-                    # --- If REG_ANS is valid, proceed with parsing other fields ---
-                    data_dt = parse_date(row.get("DATA"))
-                    conta_contabil = row.get("CD_CONTA_CONTABIL")
-                    descricao = row.get("DESCRICAO")
-                    vl_saldo_inicial = parse_decimal(row.get("VL_SALDO_INICIAL"))
-                    vl_saldo_final = parse_decimal(row.get("VL_SALDO_FINAL"))
-
-                    # Check other required fields (excluding reg_ans as it's already validated)
-                    if data_dt is None or conta_contabil is None or descricao is None:
-                        logging.warning(
-                            f"Skipping row {row_num} in {base_filename} due to missing required fields (DATA, CD_CONTA_CONTABIL, or DESCRICAO): {row}"
-                        )
-                        skipped_other += 1
-                        continue
-
-                    # Prepare tuple if all checks pass
-                    data_tuple = (
-                        data_dt,
-                        reg_ans,
-                        conta_contabil,
-                        descricao,
-                        vl_saldo_inicial,
-                        vl_saldo_final,
-                    )
-                    batch.append(data_tuple)
-
-                except (ValueError, TypeError, KeyError) as data_error:
-                    logging.error(
-                        f"Data processing error on row {row_num} in {base_filename} (REG_ANS: {reg_ans}): {row} - Error: {data_error}"
-                    )
-                    skipped_other += 1
-                    continue  # Skip this row
-                except Exception as proc_error:
-                    logging.error(
-                        f"Unexpected row processing error on row {row_num} in {base_filename} (REG_ANS: {reg_ans}): {row} - Error: {proc_error}"
-                    )
-                    skipped_other += 1
-                    continue  # Skip this row
+            for row_num, data_tuple in rows:
+                batch.append(
+                    data_tuple[:-2]
+                    + (cents_to_decimal(data_tuple[-2]), cents_to_decimal(data_tuple[-1]))
+                )
 
                 # --- Execute Batch when Full ---
                 if len(batch) >= batch_size:
                     try:
-                        execute_batch(cursor, sql, batch)
-                        conn.commit()
+                        with stage(profile, "db_write"):
+                            execute_batch(cursor, sql, batch)
+                        with stage(profile, "db_commit"):
+                            conn.commit()
+                        if profile:
+                            profile.count("db_batches")
+                            profile.count("db_commits")
                         inserted_count += len(batch)
                         logging.debug(
                             f"Committed batch of {len(batch)} rows for {base_filename}"
@@ -351,8 +816,13 @@ def import_demonstracoes_batch(
             # --- Process Final Batch ---
             if file_succeeded and batch:
                 try:
-                    execute_batch(cursor, sql, batch)
-                    conn.commit()
+                    with stage(profile, "db_write"):
+                        execute_batch(cursor, sql, batch)
+                    with stage(profile, "db_commit"):
+                        conn.commit()
+                    if profile:
+                        profile.count("db_batches")
+                        profile.count("db_commits")
                     inserted_count += len(batch)
                     logging.debug(
                         f"Committed final batch of {len(batch)} rows for {base_filename}"
@@ -376,21 +846,193 @@ def import_demonstracoes_batch(
                     )
                     file_succeeded = False
 
-        # Log final status for the file including skip counts
-        total_skipped = skipped_invalid_ans + skipped_other
-        log_level = logging.INFO if file_succeeded else logging.ERROR
-        logging.log(
-            log_level,
-            f"Finished processing {base_filename}. Success: {file_succeeded}. "
-            f"Inserted: {inserted_count}, Skipped (Invalid ANS): {skipped_invalid_ans}, "
-            f"Skipped (Other): {skipped_other}, Total Skipped: {total_skipped}",
+        _log_file_summary(
+            base_filename,
+            file_succeeded,
+            inserted_count,
+            stats,
+            time.perf_counter() - start_time,
+            profile,
+        )
+        return file_succeeded
+
+    except FileNotFoundError:
+        logging.error(f"Accounting file not found: {file_path}")
+        return False
+    except RejectRateExceeded as rate_err:
+        logging.error(f"Import of {base_filename} aborted: {rate_err}")
+        conn.rollback()
+        return False
+    except Exception as e:
+        logging.error(f"General error processing file {base_filename}: {e}")
+        if conn and not conn.autocommit:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+        return False
+    finally:
+        if cursor:
+            cursor.close()
+
+
+def _copy_text_value(value):
+    """Formats a single value for PostgreSQL's COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
         )
+    return str(value)
+
+
+def _copy_text_line(data_tuple):
+    """Formats a parsed row (balances in cents) as one COPY text line."""
+    *fields, vl_saldo_inicial, vl_saldo_final = data_tuple
+    values = [_copy_text_value(value) for value in fields]
+    values.append(_copy_text_value(format_cents(vl_saldo_inicial)))
+    values.append(_copy_text_value(format_cents(vl_saldo_final)))
+    return "\t".join(values) + "\n"
+
+
+def _flush_copy_buffer(cursor, buffer, copy_sql, profile=None):
+    """Streams the buffered rows to the server with COPY and resets the buffer."""
+    buffer.seek(0)
+    with stage(profile, "db_write"):
+        cursor.copy_expert(copy_sql, buffer)
+    if profile:
+        profile.count("db_copies")
+    buffer.seek(0)
+    buffer.truncate(0)
+
+
+def import_demonstracoes_copy(
+    conn,
+    file_path,
+    valid_ans_set,
+    chunk_rows=COPY_CHUNK_ROWS,
+    replace_quarters=None,
+    manifest_entry=None,
+    rollup_quarters=None,
+    target_table="demonstracoes_contabeis",
+    before_commit=None,
+    profile=None,
+    quarantine_options=None,
+):
+    """
+    Imports demonstracoes contabeis data using COPY FROM STDIN.
+    Parsed rows are written to an in-memory text buffer that is flushed every
+    chunk_rows rows. The whole file is loaded in a single transaction, so a
+    failed COPY leaves no partial data behind. REG_ANS filtering and skip
+    counts are the same as import_demonstracoes_batch.
+
+    replace_quarters lists DATA values whose existing rows are deleted in the
+    same transaction before loading, rollup_quarters lists the quarters whose
+    saldos_trimestrais rows are recomputed once the rows are in place, and
+    manifest_entry (kwargs for record_manifest_entry) is written just before
+    the commit together with a dataset version bump. target_table
+    redirects the COPY (e.g. to a detached partition load table), and
+    before_commit(cursor) runs after the data is loaded, in the same
+    transaction.
+    """
+    base_filename = source_name(file_path)
+    logging.info(
+        f"Importing demonstracoes (COPY) from: {base_filename}, checking against {len(valid_ans_set)} valid ANS."
+    )
+    inserted_count = 0
+    buffered_rows = 0
+    stats = {"skipped_invalid_ans": 0, "skipped_other": 0}
+    buffer = io.StringIO()
+    cursor = None
+    file_succeeded = True
+    start_time = time.perf_counter()
+
+    copy_sql = (
+        f"COPY {target_table} ({', '.join(DEMONSTRACOES_COLUMNS)}) "
+        "FROM STDIN WITH (FORMAT text)"
+    )
 
+    try:
+        cursor = conn.cursor()
+        with open_demonstracoes_rows(
+            file_path,
+            valid_ans_set,
+            stats,
+            profile=profile,
+            quarantine_options=quarantine_options,
+        ) as rows:
+
+            try:
+                if replace_quarters:
+                    cursor.execute(
+                        "DELETE FROM demonstracoes_contabeis WHERE DATA = ANY(%s::date[]);",
+                        (list(replace_quarters),),
+                    )
+                    logging.info(
+                        f"Replacing {cursor.rowcount} existing rows for quarters "
+                        f"{[str(q) for q in replace_quarters]} from {base_filename}."
+                    )
+
+                for row_num, data_tuple in rows:
+                    buffer.write(_copy_text_line(data_tuple))
+                    buffered_rows += 1
+
+                    if buffered_rows >= chunk_rows:
+                        _flush_copy_buffer(cursor, buffer, copy_sql, profile)
+                        inserted_count += buffered_rows
+                        logging.debug(
+                            f"Flushed COPY chunk of {buffered_rows} rows for {base_filename} (near row {row_num})"
+                        )
+                        buffered_rows = 0
+
+                if buffered_rows:
+                    _flush_copy_buffer(cursor, buffer, copy_sql, profile)
+                    inserted_count += buffered_rows
+                    buffered_rows = 0
+
+                with stage(profile, "db_commit"):
+                    if before_commit:
+                        before_commit(cursor)
+                    if rollup_quarters:
+                        refresh_rollup(cursor, rollup_quarters)
+                    if manifest_entry:
+                        record_manifest_entry(cursor, **manifest_entry)
+                    bump_dataset_version(cursor)
+                    conn.commit()
+                if profile:
+                    profile.count("db_commits")
+            except (psycopg2.DatabaseError, psycopg2.InterfaceError) as db_err:
+                logging.error(
+                    f"Database error during COPY for {base_filename}: {db_err}"
+                )
+                conn.rollback()
+                logging.warning(
+                    f"Transaction rolled back for {base_filename} due to COPY error."
+                )
+                inserted_count = 0
+                file_succeeded = False
+
+        _log_file_summary(
+            base_filename,
+            file_succeeded,
+            inserted_count,
+            stats,
+            time.perf_counter() - start_time,
+            profile,
+        )
         return file_succeeded
 
     except FileNotFoundError:
         logging.error(f"Accounting file not found: {file_path}")
         return False
+    except RejectRateExceeded as rate_err:
+        logging.error(f"Import of {base_filename} aborted: {rate_err}")
+        conn.rollback()
+        return False
     except Exception as e:
         logging.error(f"General error processing file {base_filename}: {e}")
         if conn and not conn.autocommit:
@@ -400,21 +1042,442 @@ def import_demonstracoes_batch(
                 pass
         return False
     finally:
+        buffer.close()
         if cursor:
             cursor.close()
 
 
+def import_demonstracoes_partition(
+    conn,
+    file_path,
+    valid_ans_set,
+    quarter,
+    replace_quarters=None,
+    manifest_entry=None,
+    rollup_quarters=None,
+    profile=None,
+    quarantine_options=None,
+):
+    """
+    Loads a single-quarter accounting file with a load-and-attach swap: rows
+    are COPY'd into a detached table, the parent's indexes are built there
+    in bulk, and the table replaces the quarter's partition via
+    ATTACH PARTITION. Load, swap, rollup refresh and manifest update share
+    one transaction, so readers see either the old or the new quarter.
+
+    The load table is created and committed first: CREATE TABLE ... LIKE
+    takes a lock on the parent, and holding it until the swap's DROP would
+    make concurrent workers (--workers) deadlock on their swaps. The load
+    transaction then locks the parent only at the swap, so overlapping
+    workers queue there instead.
+    """
+    with conn.cursor() as cursor:
+        load_table = create_load_table(cursor, quarter)
+    conn.commit()
+
+    def attach(cursor):
+        build_partition_indexes(cursor, quarter, load_table)
+        # Quarters the file no longer covers (incremental re-imports) are dropped
+        stale_quarters = [q for q in quarters_of(replace_quarters or []) if q != quarter]
+        drop_quarter_partitions(cursor, stale_quarters)
+        swap_in_partition(cursor, quarter, load_table)
+
+    succeeded = import_demonstracoes_copy(
+        conn,
+        file_path,
+        valid_ans_set=valid_ans_set,
+        manifest_entry=manifest_entry,
+        rollup_quarters=rollup_quarters,
+        target_table=load_table,
+        before_commit=attach,
+        profile=profile,
+        quarantine_options=quarantine_options,
+    )
+    if not succeeded:
+        # The load table was committed on its own, so the rollback leaves it behind
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {load_table};")
+        conn.commit()
+    return succeeded
+
+
+def import_demonstracoes(
+    conn,
+    file_path,
+    valid_ans_set,
+    loader=DEFAULT_LOADER,
+    replace_quarters=None,
+    manifest_entry=None,
+    quarters=None,
+    profile=None,
+    quarantine_options=None,
+):
+    """
+    Dispatches an accounting file to the right loader.
+
+    On a partitioned demonstracoes_contabeis, a single-quarter file (quarters
+    holds the DATA values it contains) loaded with COPY goes through the
+    load-and-attach partition swap. Otherwise the missing partitions are
+    created and rows go to the parent through the COPY loader or the batch
+    INSERT fallback. Quarter replacement needs a single transaction per
+    file, so it is only available with the COPY loader. quarantine_options
+    is forwarded to the loader (see new_quarantine).
+
+    The saldos_trimestrais rollup is refreshed for the file's quarters and
+    the replaced ones: with the load for COPY, after the last batch for the
+    batch loader.
+    """
+    with conn.cursor() as cursor:
+        partitioned = is_partitioned(cursor)
+        if quarters is None:
+            _, _, quarters = file_fingerprint(
+                file_path,
+                key_column="DATA",
+                parse_key=parse_date,
+                delimiter=DELIMITER,
+                encoding=FILE_ENCODING,
+            )
+        file_quarters = quarters_of(quarters) if partitioned else []
+        if partitioned and (loader == LOADER_BATCH or len(file_quarters) != 1):
+            ensure_quarter_partitions(cursor, quarters)
+            conn.commit()
+    rollup_quarters = quarters_of(set(quarters) | set(replace_quarters or []))
+
+    if partitioned and loader == LOADER_COPY and len(file_quarters) == 1:
+        return import_demonstracoes_partition(
+            conn,
+            file_path,
+            valid_ans_set=valid_ans_set,
+            quarter=file_quarters[0],
+            replace_quarters=replace_quarters,
+            manifest_entry=manifest_entry,
+            rollup_quarters=rollup_quarters,
+            profile=profile,
+            quarantine_options=quarantine_options,
+        )
+
+    if loader == LOADER_BATCH:
+        if replace_quarters:
+            raise ValueError("Replacing quarters requires the COPY loader.")
+        succeeded = import_demonstracoes_batch(
+            conn,
+            file_path,
+            valid_ans_set=valid_ans_set,
+            profile=profile,
+            quarantine_options=quarantine_options,
+        )
+        # The batch loader commits per batch, so the rollup, the manifest and the
+        # version bump get their own transaction (the rollup also after a
+        # failure, which keeps the batches committed before it)
+        with conn.cursor() as cursor:
+            refresh_rollup(cursor, rollup_quarters)
+            if succeeded and manifest_entry:
+                record_manifest_entry(cursor, **manifest_entry)
+            bump_dataset_version(cursor)
+        conn.commit()
+        return succeeded
+    return import_demonstracoes_copy(
+        conn,
+        file_path,
+        valid_ans_set=valid_ans_set,
+        replace_quarters=replace_quarters,
+        manifest_entry=manifest_entry,
+        rollup_quarters=rollup_quarters,
+        profile=profile,
+        quarantine_options=quarantine_options,
+    )
+
+
+def import_demonstracoes_profiled(
+    conn, file_path, valid_ans_set, loader, file_options, profiling=None
+):
+    """
+    Runs import_demonstracoes for one file. When profiling is set
+    ({'report_dir', 'memory_mode'}) the file is instrumented with an
+    ImportProfile whose JSON report is written to report_dir.
+    """
+    if not profiling:
+        return import_demonstracoes(
+            conn, file_path, valid_ans_set=valid_ans_set, loader=loader, **file_options
+        )
+
+    profile = ImportProfile(
+        file_path,
+        source_name(file_path),
+        source_size(file_path),
+        memory_mode=profiling["memory_mode"],
+    ).start()
+    succeeded = False
+    try:
+        succeeded = import_demonstracoes(
+            conn,
+            file_path,
+            valid_ans_set=valid_ans_set,
+            loader=loader,
+            profile=profile,
+            **file_options,
+        )
+        return succeeded
+    finally:
+        profile.finish(succeeded).write(profiling["report_dir"])
+
+
+# --- Parallel accounting import ---
+# Set once per worker process by _init_import_worker so the REG_ANS set is
+# pickled a single time per worker instead of once per submitted file.
+_worker_valid_ans_set = frozenset()
+_worker_loader = DEFAULT_LOADER
+_worker_profiling = None
+
+
+def _init_import_worker(valid_ans_set, loader, profiling=None):
+    """ProcessPoolExecutor initializer: stores the shared, read-only import state."""
+    global _worker_valid_ans_set, _worker_loader, _worker_profiling, _account_cache
+    _worker_valid_ans_set = valid_ans_set
+    _worker_loader = loader
+    _worker_profiling = profiling
+    # A forked worker must not reuse the parent's account cache connection
+    _account_cache = None
+
+
+def _import_file_worker(file_path, file_options):
+    """Imports one accounting file in a worker process on its own connection."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        conn.autocommit = False
+        return import_demonstracoes_profiled(
+            conn,
+            file_path,
+            _worker_valid_ans_set,
+            _worker_loader,
+            file_options,
+            profiling=_worker_profiling,
+        )
+    except Exception as e:
+        logging.error(f"Worker failed to import {source_name(file_path)}: {e}")
+        return False
+    finally:
+        if conn:
+            conn.close()
+        if _account_cache is not None:
+            _account_cache.close()
+
+
+def import_accounting_files(
+    conn,
+    accounting_files,
+    valid_ans_set,
+    loader=DEFAULT_LOADER,
+    workers=1,
+    file_options=None,
+    profiling=None,
+):
+    """
+    Imports the given accounting files and returns (successful_files, failed_files).
+    With workers > 1 the files are loaded concurrently by a process pool, one
+    database connection per worker; otherwise they run sequentially on conn.
+    file_options optionally maps a file path to extra import_demonstracoes
+    keyword arguments (replace_quarters, manifest_entry, quarantine_options).
+    profiling is forwarded to import_demonstracoes_profiled.
+    """
+    successful_files = 0
+    failed_files = 0
+    ordered_files = sorted(accounting_files)  # Sort ensures some order if needed
+    file_options = file_options or {}
+
+    if workers <= 1 or len(ordered_files) <= 1:
+        results = (
+            import_demonstracoes_profiled(
+                conn,
+                acc_file,
+                valid_ans_set,
+                loader,
+                file_options.get(acc_file, {}),
+                profiling=profiling,
+            )
+            for acc_file in ordered_files
+        )
+    else:
+        pool_size = min(workers, len(ordered_files))
+        logging.info(f"Importing accounting files with {pool_size} worker processes.")
+        executor = ProcessPoolExecutor(
+            max_workers=pool_size,
+            initializer=_init_import_worker,
+            initargs=(frozenset(valid_ans_set), loader, profiling),
+        )
+        with executor:
+            futures = {
+                executor.submit(
+                    _import_file_worker, acc_file, file_options.get(acc_file, {})
+                ): acc_file
+                for acc_file in ordered_files
+            }
+            results = []
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as worker_err:
+                    logging.error(
+                        f"Worker crashed importing {source_name(futures[future])}: {worker_err}"
+                    )
+                    results.append(False)
+
+    for succeeded in results:
+        if succeeded:
+            successful_files += 1
+        else:
+            failed_files += 1
+    return successful_files, failed_files
+
+
+def parse_args():
+    """Parses command-line options for the importer."""
+    parser = argparse.ArgumentParser(
+        description="Imports ANS operadoras and demonstracoes contabeis CSVs into PostgreSQL."
+    )
+    parser.add_argument(
+        "--loader",
+        choices=[LOADER_COPY, LOADER_BATCH],
+        default=DEFAULT_LOADER,
+        help="Accounting loader: streaming COPY (default) or the execute_batch INSERT fallback.",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=[ENGINE_SYNC, ENGINE_ASYNC],
+        default=ENGINE_SYNC,
+        help="Accounting import engine: psycopg2 loaders (default) or the asyncio engine "
+        "(async_importer.py: threaded CSV parsing feeding asyncpg copy_records_to_table, "
+        "connecting with the API's DatabaseSettings).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes (or, with --engine async, concurrent files) "
+        "importing accounting files (default: 1).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip files unchanged since the last import (per the import manifest) and "
+        "replace only the quarters of changed or new accounting files.",
+    )
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Drop demonstracoes_contabeis indexes and constraints before loading, "
+        "rebuild them in parallel afterwards, revalidate the FK, ANALYZE, and "
+        "print a per-phase timing report.",
+    )
+    parser.add_argument(
+        "--profile-report",
+        nargs="?",
+        const=PROFILE_REPORT_DIR,
+        metavar="DIR",
+        help="Write a JSON profiling report per accounting file (stage timings, "
+        f"rows/sec, bytes read, peak memory) under DIR (default: {PROFILE_REPORT_DIR}).",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        choices=[MEMORY_RSS, MEMORY_TRACEMALLOC],
+        default=MEMORY_RSS,
+        help="Peak memory measurement for --profile-report: sampled RSS (default) "
+        "or tracemalloc (more precise for Python objects, but slows the import).",
+    )
+    parser.add_argument(
+        "--reject-dir",
+        default=REJECT_DIR,
+        metavar="DIR",
+        help="Write rejected rows, with a reason code, to a gzip-compressed CSV per input "
+        f"file under DIR/<run> (default: {REJECT_DIR}).",
+    )
+    parser.add_argument(
+        "--max-reject-rate",
+        type=float,
+        default=MAX_REJECT_RATE,
+        metavar="RATE",
+        help="Abort (and roll back) a file once more than this share of its rows was "
+        f"rejected (default: {MAX_REJECT_RATE}; 1 disables the check).",
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="Dump cProfile stats of the main process to PATH (inspect with pstats).",
+    )
+    args = parser.parse_args()
+    if args.incremental and args.loader == LOADER_BATCH:
+        parser.error("--incremental requires the COPY loader.")
+    if args.incremental and args.full_rebuild:
+        parser.error("--incremental and --full-rebuild are mutually exclusive.")
+    if args.engine == ENGINE_ASYNC and (
+        args.loader == LOADER_BATCH or args.profile_report
+    ):
+        parser.error("--engine async does not support --loader batch or --profile-report.")
+    if not 0 <= args.max_reject_rate <= 1:
+        parser.error("--max-reject-rate must be between 0 and 1.")
+    return args
+
+
 if __name__ == "__main__":
+    args = parse_args()
     connection = None
     valid_ans_set = set()
+    profiling = None
+    run_id = datetime.now().strftime("%Y%m%dT%H%M%S")
+    quarantine_options = {
+        "reject_dir": os.path.join(args.reject_dir, run_id),
+        "max_reject_rate": args.max_reject_rate,
+    }
+    if args.profile_report:
+        profiling = {
+            "report_dir": os.path.join(args.profile_report, run_id),
+            "memory_mode": args.profile_memory,
+        }
+    profiler = None
+    if args.cprofile:
+        profiler = cProfile.Profile()
+        profiler.enable()
     try:
         connection = get_db_connection()
         connection.autocommit = False  # Ensure transactions are managed explicitly
 
+        # --- Import manifest (file name, size, hash) drives incremental runs ---
+        ensure_manifest_table(connection)
+        ensure_rollup_table(connection)
+        ensure_dataset_version_table(connection)
+        if args.incremental:
+            manifest = load_manifest(connection)
+            logging.info(f"Incremental import: {len(manifest)} files in the import manifest.")
+        else:
+            # Full reload: every file is re-imported and re-recorded below
+            with connection.cursor() as cursor:
+                delete_manifest_entries(cursor)
+            connection.commit()
+            manifest = {}
+
         # --- Import Operadoras (Truncates inside function) ---
         operator_files = glob.glob(os.path.join(DATA_DIR, OPERATOR_FILE_PATTERN))
         if operator_files:
-            import_operadoras(connection, operator_files[0])
+            operator_file = operator_files[0]
+            operator_name = os.path.basename(operator_file)
+            op_size, op_hash, _ = file_fingerprint(operator_file)
+            if args.incremental and is_unchanged(manifest, operator_name, op_size, op_hash):
+                logging.info(f"{operator_name} unchanged since last import, skipping.")
+            elif (
+                import_operadoras(connection, operator_file, quarantine_options)
+                is not None
+            ):
+                with connection.cursor() as cursor:
+                    # TRUNCATE operadoras CASCADE also emptied demonstracoes_contabeis
+                    # (and saldos_trimestrais),
+                    # so every accounting file has to be reloaded.
+                    delete_manifest_entries(cursor)
+                    record_manifest_entry(cursor, operator_name, op_size, op_hash)
+                    bump_dataset_version(cursor)
+                connection.commit()
+                manifest = {}
         else:
             logging.warning(
                 f"No operator file matching '{OPERATOR_FILE_PATTERN}' found in {DATA_DIR}"
@@ -442,43 +1505,130 @@ if __name__ == "__main__":
             raise SystemExit("Cannot proceed without valid ANS list.")
 
         # --- Import Demonstracoes Contabeis ---
-        accounting_files = glob.glob(os.path.join(DATA_DIR, ACCOUNTING_FILE_PATTERN))
+        # Plain CSVs plus matching members of downloaded ZIPs (read without extracting)
+        accounting_files = discover_sources(DATA_DIR, ACCOUNTING_FILE_PATTERN)
         if accounting_files:
-            logging.info(f"Found {len(accounting_files)} accounting files to import.")
+            logging.info(
+                f"Found {len(accounting_files)} accounting files to import (loader: {args.loader})."
+            )
+
+            # --- Full rebuild: drop indexes and constraints before loading ---
+            timer = PhaseTimer() if args.full_rebuild else None
+            definitions = None
+            if args.full_rebuild:
+                with timer.phase("drop"):
+                    with connection.cursor() as cursor:
+                        partitioned = is_partitioned(cursor)
+                        definitions = capture_definitions(cursor)
+                        drop_definitions(cursor, definitions)
+                    connection.commit()
 
-            # --- Truncate demonstracoes_contabeis table before importing ANY accounting files ---
-            cursor = connection.cursor()
             try:
-                logging.warning("Truncating demonstracoes_contabeis table...")
-                cursor.execute("TRUNCATE TABLE demonstracoes_contabeis;")
-                connection.commit()  # Commit the truncate before starting file imports
-                logging.info("Demonstracoes_contabeis table truncated.")
-            except Exception as trunc_error:
-                logging.error(
-                    f"Failed to truncate demonstracoes_contabeis: {trunc_error}"
-                )
-                connection.rollback()  # Rollback if truncate fails
-                raise  # Stop the import if we can't truncate
+                with timer.phase("load") if timer else nullcontext():
+                    if not args.incremental:
+                        # --- Truncate demonstracoes_contabeis table before importing ANY accounting files ---
+                        cursor = connection.cursor()
+                        try:
+                            logging.warning("Truncating demonstracoes_contabeis table...")
+                            cursor.execute(
+                                f"TRUNCATE TABLE demonstracoes_contabeis, {ROLLUP_TABLE};"
+                            )
+                            bump_dataset_version(cursor)
+                            connection.commit()  # Commit the truncate before starting file imports
+                            logging.info(
+                                f"Demonstracoes_contabeis and {ROLLUP_TABLE} tables truncated."
+                            )
+                        except Exception as trunc_error:
+                            logging.error(
+                                f"Failed to truncate demonstracoes_contabeis: {trunc_error}"
+                            )
+                            connection.rollback()  # Rollback if truncate fails
+                            raise  # Stop the import if we can't truncate
+                        finally:
+                            if cursor:
+                                cursor.close()
+                        # ---
+
+                    # --- Fingerprint files; in incremental mode keep only new or changed ones ---
+                    files_to_import = []
+                    file_options = {}
+                    unchanged_files = 0
+                    for acc_file in accounting_files:
+                        acc_name = source_name(acc_file)
+                        acc_size, acc_hash, quarters = file_fingerprint(
+                            acc_file,
+                            key_column="DATA",
+                            parse_key=parse_date,
+                            delimiter=DELIMITER,
+                            encoding=FILE_ENCODING,
+                        )
+                        if args.incremental and is_unchanged(
+                            manifest, acc_name, acc_size, acc_hash
+                        ):
+                            unchanged_files += 1
+                            continue
+                        options = {
+                            "quarters": quarters,
+                            "quarantine_options": quarantine_options,
+                            "manifest_entry": {
+                                "file_name": acc_name,
+                                "file_size": acc_size,
+                                "content_hash": acc_hash,
+                                "quarters": quarters,
+                            },
+                        }
+                        if args.incremental:
+                            # Drop both the quarters the file covers now and those it covered before
+                            previous_quarters = manifest.get(acc_name, {}).get(
+                                "quarters", set()
+                            )
+                            options["replace_quarters"] = sorted(
+                                quarters | previous_quarters
+                            )
+                        files_to_import.append(acc_file)
+                        file_options[acc_file] = options
+
+                    if unchanged_files:
+                        logging.info(f"Skipping {unchanged_files} unchanged accounting files.")
+
+                    if args.engine == ENGINE_ASYNC:
+                        try:
+                            from .async_importer import import_with_settings
+                        except ImportError:
+                            from async_importer import import_with_settings
+                        successful_files, failed_files = asyncio.run(
+                            import_with_settings(
+                                files_to_import,
+                                valid_ans_set=frozenset(valid_ans_set),
+                                concurrent_files=args.workers,
+                                file_options=file_options,
+                            )
+                        )
+                    else:
+                        successful_files, failed_files = import_accounting_files(
+                            connection,
+                            files_to_import,
+                            valid_ans_set,
+                            loader=args.loader,
+                            workers=args.workers,
+                            file_options=file_options,
+                            profiling=profiling,
+                        )
+                    logging.info(
+                        f"Accounting file import summary: Successful={successful_files}, "
+                        f"Failed={failed_files}, Unchanged={unchanged_files}"
+                    )
             finally:
-                if cursor:
-                    cursor.close()
-            # ---
-
-            # Import files one by one
-            successful_files = 0
-            failed_files = 0
-            for acc_file in sorted(
-                accounting_files
-            ):  # Sort ensures some order if needed
-                if import_demonstracoes_batch(
-                    connection, acc_file, valid_ans_set=valid_ans_set
-                ):  # Use batch import
-                    successful_files += 1
-                else:
-                    failed_files += 1
-            logging.info(
-                f"Accounting file import summary: Successful={successful_files}, Failed={failed_files}"
-            )
+                # --- Full rebuild: restore indexes and constraints even if the load failed ---
+                if definitions is not None:
+                    connection.rollback()
+                    with timer.phase("indexes"):
+                        recreate_indexes(connection, get_db_connection, definitions)
+                    with timer.phase("constraints"):
+                        restore_foreign_keys(connection, definitions, partitioned)
+                    with timer.phase("analyze"):
+                        analyze(connection)
+                    timer.report()
 
         else:
             logging.warning(
@@ -490,6 +1640,12 @@ if __name__ == "__main__":
     except Exception as e:
         logging.error(f"An critical error occurred during the import process: {e}")
     finally:
+        if _account_cache is not None:
+            _account_cache.close()
         if connection:
             connection.close()
             logging.info("Database connection closed.")
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            logging.info(f"cProfile stats written to {args.cprofile}")
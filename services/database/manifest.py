@@ -0,0 +1,189 @@
+import csv
+import hashlib
+import logging
+
+try:
+    from .sources import open_source, source_size
+except ImportError:
+    # Fallback for running script directly
+    from sources import open_source, source_size
+
+# --- Manifest Configuration ---
+MANIFEST_TABLE = "import_manifest"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Mirrors the definition in sql/01_schema.sql so databases created before the
+# manifest existed get the table on their first incremental run.
+MANIFEST_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+        file_name TEXT PRIMARY KEY,
+        file_size BIGINT NOT NULL,
+        content_hash TEXT NOT NULL,
+        quarters DATE[] NOT NULL DEFAULT '{{}}',
+        imported_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+"""
+
+# Single-row counter bumped by every committed load; the API keys its
+# in-process caches on it (see services/api/services/dataset_version.py).
+DATASET_VERSION_TABLE = "dataset_version"
+DATASET_VERSION_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {DATASET_VERSION_TABLE} (
+        id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    INSERT INTO {DATASET_VERSION_TABLE} (id) VALUES (TRUE) ON CONFLICT DO NOTHING;
+"""
+BUMP_DATASET_VERSION_SQL = f"""
+    UPDATE {DATASET_VERSION_TABLE}
+    SET version = version + 1, updated_at = now()
+    RETURNING version;
+"""
+# ---
+
+
+def ensure_manifest_table(conn):
+    """Creates the import manifest table if it does not exist yet."""
+    with conn.cursor() as cursor:
+        cursor.execute(MANIFEST_DDL)
+    conn.commit()
+
+
+def ensure_dataset_version_table(conn):
+    """Creates the dataset version table (and its single row) if it does not exist yet."""
+    with conn.cursor() as cursor:
+        cursor.execute(DATASET_VERSION_DDL)
+    conn.commit()
+
+
+def bump_dataset_version(cursor):
+    """
+    Increments the dataset version on the caller's cursor, so the bump
+    becomes visible together with the data it announces. Returns the new version.
+    """
+    cursor.execute(BUMP_DATASET_VERSION_SQL)
+    version = cursor.fetchone()[0]
+    logging.debug(f"Dataset version bumped to {version}.")
+    return version
+
+
+async def bump_dataset_version_async(connection):
+    """bump_dataset_version for an asyncpg connection (joins its current transaction)."""
+    version = await connection.fetchval(BUMP_DATASET_VERSION_SQL)
+    logging.debug(f"Dataset version bumped to {version}.")
+    return version
+
+
+def load_manifest(conn):
+    """Returns the manifest as {file_name: {'file_size', 'content_hash', 'quarters'}}."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT file_name, file_size, content_hash, quarters FROM {MANIFEST_TABLE}"
+        )
+        return {
+            file_name: {
+                "file_size": file_size,
+                "content_hash": content_hash,
+                "quarters": set(quarters or []),
+            }
+            for file_name, file_size, content_hash, quarters in cursor.fetchall()
+        }
+
+
+def file_fingerprint(file_path, key_column=None, parse_key=None, delimiter=";", encoding="utf-8"):
+    """
+    Computes (file_size, sha256_hex, keys) for a file or ZIP member source in
+    a single pass (sizes and hashes are of the uncompressed content).
+    When key_column is given, keys is the set of distinct values of that CSV
+    column passed through parse_key (e.g. the quarter dates in DATA);
+    otherwise it is an empty set.
+    """
+    digest = hashlib.sha256()
+    file_size = source_size(file_path)
+    keys = set()
+
+    with open_source(file_path) as raw_file:
+        if key_column is None:
+            for chunk in iter(lambda: raw_file.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+            return file_size, digest.hexdigest(), keys
+
+        header_line = raw_file.readline()
+        digest.update(header_line)
+        header = next(csv.reader([header_line.decode(encoding)], delimiter=delimiter))
+        header = [name.replace("\ufeff", "").strip().strip('"') for name in header]
+        key_index = header.index(key_column)
+
+        raw_values = set()
+        for line in raw_file:
+            digest.update(line)
+            fields = line.split(delimiter.encode(encoding), key_index + 1)
+            if len(fields) > key_index:
+                raw_values.add(fields[key_index])
+
+    for raw_value in raw_values:
+        parsed = raw_value.decode(encoding).strip().strip('"')
+        parsed = parse_key(parsed) if parse_key else parsed
+        if parsed is not None:
+            keys.add(parsed)
+    return file_size, digest.hexdigest(), keys
+
+
+def is_unchanged(manifest, file_name, file_size, content_hash):
+    """True when the manifest already holds this exact file (same size and hash)."""
+    entry = manifest.get(file_name)
+    return (
+        entry is not None
+        and entry["file_size"] == file_size
+        and entry["content_hash"] == content_hash
+    )
+
+
+def record_manifest_entry(cursor, file_name, file_size, content_hash, quarters=()):
+    """Upserts a manifest row. Runs on the caller's cursor so it joins their transaction."""
+    cursor.execute(
+        f"""
+        INSERT INTO {MANIFEST_TABLE} (file_name, file_size, content_hash, quarters, imported_at)
+        VALUES (%s, %s, %s, %s::date[], now())
+        ON CONFLICT (file_name) DO UPDATE SET
+            file_size = EXCLUDED.file_size,
+            content_hash = EXCLUDED.content_hash,
+            quarters = EXCLUDED.quarters,
+            imported_at = EXCLUDED.imported_at;
+        """,
+        (file_name, file_size, content_hash, sorted(quarters)),
+    )
+
+
+async def record_manifest_entry_async(
+    connection, file_name, file_size, content_hash, quarters=()
+):
+    """record_manifest_entry for an asyncpg connection (joins its current transaction)."""
+    await connection.execute(
+        f"""
+        INSERT INTO {MANIFEST_TABLE} (file_name, file_size, content_hash, quarters, imported_at)
+        VALUES ($1, $2, $3, $4::date[], now())
+        ON CONFLICT (file_name) DO UPDATE SET
+            file_size = EXCLUDED.file_size,
+            content_hash = EXCLUDED.content_hash,
+            quarters = EXCLUDED.quarters,
+            imported_at = EXCLUDED.imported_at;
+        """,
+        file_name,
+        file_size,
+        content_hash,
+        sorted(quarters),
+    )
+
+
+def delete_manifest_entries(cursor, file_names=None):
+    """Removes the given manifest rows, or every row when file_names is None."""
+    if file_names is None:
+        cursor.execute(f"DELETE FROM {MANIFEST_TABLE};")
+    else:
+        cursor.execute(
+            f"DELETE FROM {MANIFEST_TABLE} WHERE file_name = ANY(%s);",
+            (list(file_names),),
+        )
+    logging.debug(f"Removed {cursor.rowcount} import manifest entries.")
@@ -0,0 +1,279 @@
+import os
+import csv
+import glob
+import logging
+import argparse
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; without it the importer keeps reading the CSVs
+    pa = pq = None
+
+try:
+    from .sources import open_source, source_name, source_size, source_stamp, discover_sources
+    from .parsing import parse_date, parse_cents_column
+except ImportError:
+    # Fallback for running script directly
+    from sources import open_source, source_name, source_size, source_stamp, discover_sources
+    from parsing import parse_date, parse_cents_column
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# --- Parquet Cache Configuration ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data", "raw", "db_source")
+CACHE_DIR = os.path.join(BASE_DIR, "data", "cache", "parquet")
+OPERATOR_FILE_PATTERN = "Relatorio_cadop*.csv"
+ACCOUNTING_FILE_PATTERN = "*T*.csv"
+FILE_ENCODING = "utf-8"
+DELIMITER = ";"
+COMPRESSION = "zstd"
+CONVERT_CHUNK_ROWS = 100000  # CSV rows parsed and written per row group
+READ_BATCH_ROWS = 50000  # Rows per record batch when the importer reads a cache file
+STAMP_KEY = b"ans_source_stamp"  # Schema metadata tying a cache file to its source
+FORMAT_KEY = b"ans_cache_format"  # Layout version; caches written by older code are rebuilt
+FORMAT_VERSION = b"2"
+INT32_MAX = 2147483647
+INT64_MAX = 9223372036854775807
+# Accounting columns keep their CSV names; balances are stored as int64 cents
+ACCOUNTING_COLUMNS = (
+    "DATA",
+    "REG_ANS",
+    "CD_CONTA_CONTABIL",
+    "DESCRICAO",
+    "VL_SALDO_INICIAL",
+    "VL_SALDO_FINAL",
+)
+# Typed columns that also keep, in <name>_RAW, the CSV text of the cells that
+# failed to parse (null for every other row), so rejects show what the CSV had
+RAW_SUFFIX = "_RAW"
+RAW_COLUMNS = ("DATA", "REG_ANS", "VL_SALDO_INICIAL", "VL_SALDO_FINAL")
+# ---
+
+
+def cache_path(source, cache_dir=CACHE_DIR):
+    """Cache file for a source: <cache_dir>/<source file name>.parquet."""
+    return os.path.join(cache_dir, f"{os.path.splitext(source_name(source))[0]}.parquet")
+
+
+def cached_parquet(source, cache_dir=CACHE_DIR):
+    """
+    Returns the cache file for source if pyarrow is available and the cache
+    was written from the current version of the source, otherwise None.
+    """
+    if pq is None:
+        return None
+    path = cache_path(source, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowInvalid) as e:
+        logging.warning(f"Ignoring unreadable Parquet cache {path}: {e}")
+        return None
+    if (
+        metadata.get(STAMP_KEY) != source_stamp(source).encode()
+        or metadata.get(FORMAT_KEY) != FORMAT_VERSION
+    ):
+        logging.info(f"Parquet cache {path} is stale, reading {source_name(source)} instead.")
+        return None
+    return path
+
+
+def iter_cached_batches(path, columns=None, batch_size=READ_BATCH_ROWS):
+    """Streams a cache file as pyarrow RecordBatches."""
+    return pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=columns)
+
+
+def _parse_int(value, maximum=INT64_MAX):
+    """Digits as an int, or None when empty, not numeric or above maximum (the column's type)."""
+    value = value.strip() if value else value
+    if not value or not value.isdigit():
+        return None
+    number = int(value)
+    return number if number <= maximum else None
+
+
+def _parse_reg_ans(value):
+    # The importer's rule: digits only, no surrounding whitespace. IDs beyond
+    # INT (the REGISTRO_ANS type) cannot match any operator and are left null.
+    return _parse_int(value, INT32_MAX) if value and value.isdigit() else None
+
+
+def _raw_text(values, parsed):
+    """Source text of the cells that did not parse, None elsewhere (empty cells included)."""
+    return pa.array(
+        [value if value and result is None else None for value, result in zip(values, parsed)],
+        type=pa.string(),
+    )
+
+
+def _strings(values):
+    return pa.array(values, type=pa.string()).dictionary_encode()
+
+
+def _accounting_schema(stamp):
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("DATA", pa.date32()),
+            ("REG_ANS", pa.int32()),
+            ("CD_CONTA_CONTABIL", dictionary),
+            ("DESCRICAO", dictionary),
+            ("VL_SALDO_INICIAL", pa.int64()),
+            ("VL_SALDO_FINAL", pa.int64()),
+        ]
+        + [(f"{name}{RAW_SUFFIX}", pa.string()) for name in RAW_COLUMNS],
+        metadata={
+            STAMP_KEY: stamp.encode(),
+            FORMAT_KEY: FORMAT_VERSION,
+            b"ans_amount_unit": b"cents",
+        },
+    )
+
+
+def _accounting_chunk(rows, schema):
+    text = {name: [row.get(name) for row in rows] for name in RAW_COLUMNS}
+    parsed = {
+        "DATA": [parse_date(value) for value in text["DATA"]],
+        "REG_ANS": [_parse_reg_ans(value) for value in text["REG_ANS"]],
+        "VL_SALDO_INICIAL": parse_cents_column(text["VL_SALDO_INICIAL"]),
+        "VL_SALDO_FINAL": parse_cents_column(text["VL_SALDO_FINAL"]),
+    }
+    return pa.record_batch(
+        [
+            pa.array(parsed["DATA"], type=pa.date32()),
+            pa.array(parsed["REG_ANS"], type=pa.int32()),
+            _strings([row.get("CD_CONTA_CONTABIL") for row in rows]),
+            _strings([row.get("DESCRICAO") for row in rows]),
+            pa.array(parsed["VL_SALDO_INICIAL"], type=pa.int64()),
+            pa.array(parsed["VL_SALDO_FINAL"], type=pa.int64()),
+        ]
+        + [_raw_text(text[name], parsed[name]) for name in RAW_COLUMNS],
+        schema=schema,
+    )
+
+
+def _operadoras_schema(header, stamp):
+    types = {"registro_ans": pa.int32(), "cnpj": pa.int64(), "data_registro_ans": pa.date32()}
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [(name, types.get(name.lower(), dictionary)) for name in header],
+        metadata={STAMP_KEY: stamp.encode(), FORMAT_KEY: FORMAT_VERSION},
+    )
+
+
+def _operadoras_chunk(rows, schema):
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if field.type == pa.date32():
+            arrays.append(pa.array([parse_date(v) for v in values], type=field.type))
+        elif pa.types.is_integer(field.type):
+            # Out-of-range IDs are left null, as the importer quarantines them
+            maximum = INT32_MAX if field.type == pa.int32() else INT64_MAX
+            arrays.append(pa.array([_parse_int(v, maximum) for v in values], type=field.type))
+        else:
+            arrays.append(_strings(values))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def _write_cache(source, target, make_schema, make_chunk):
+    """Converts one CSV source, writing to a temporary file renamed into place."""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp_target = f"{target}.tmp"
+    rows_written = 0
+    with open_source(source, encoding=FILE_ENCODING) as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=DELIMITER)
+        reader.fieldnames = [name.replace("\ufeff", "").strip() for name in reader.fieldnames]
+        schema = make_schema(reader.fieldnames)
+        with pq.ParquetWriter(temp_target, schema, compression=COMPRESSION) as writer:
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) >= CONVERT_CHUNK_ROWS:
+                    writer.write_batch(make_chunk(chunk, schema))
+                    rows_written += len(chunk)
+                    chunk = []
+            if chunk:
+                writer.write_batch(make_chunk(chunk, schema))
+                rows_written += len(chunk)
+    os.replace(temp_target, target)
+    logging.info(
+        f"Cached {source_name(source)} as {target}: {rows_written} rows, "
+        f"{source_size(source) / 1e6:.1f} MB CSV -> {os.path.getsize(target) / 1e6:.1f} MB Parquet."
+    )
+    return target
+
+
+def convert_accounting(source, cache_dir=CACHE_DIR):
+    """Writes the typed Parquet cache of an accounting CSV (or ZIP member)."""
+    stamp = source_stamp(source)
+    return _write_cache(
+        source,
+        cache_path(source, cache_dir),
+        lambda header: _accounting_schema(stamp),
+        _accounting_chunk,
+    )
+
+
+def convert_operadoras(source, cache_dir=CACHE_DIR):
+    """Writes the typed Parquet cache of Relatorio_cadop.csv (for analyses)."""
+    stamp = source_stamp(source)
+    return _write_cache(
+        source,
+        cache_path(source, cache_dir),
+        lambda header: _operadoras_schema(header, stamp),
+        _operadoras_chunk,
+    )
+
+
+def convert_all(data_dir=DATA_DIR, cache_dir=CACHE_DIR, force=False):
+    """Converts every operator and accounting source whose cache is missing or stale."""
+    if pq is None:
+        raise SystemExit("pyarrow is required to build the Parquet cache.")
+    jobs = [(source, convert_operadoras) for source in discover_sources(data_dir, OPERATOR_FILE_PATTERN)]
+    jobs += [
+        (source, convert_accounting)
+        for source in sorted(discover_sources(data_dir, ACCOUNTING_FILE_PATTERN))
+    ]
+    converted = 0
+    for source, convert in jobs:
+        if not force and cached_parquet(source, cache_dir):
+            logging.info(f"{source_name(source)} already cached, skipping.")
+            continue
+        try:
+            convert(source, cache_dir)
+            converted += 1
+        except Exception as e:
+            logging.error(f"Failed to cache {source_name(source)}: {e}")
+    logging.info(f"Parquet cache: converted {converted} of {len(jobs)} files into {cache_dir}.")
+    return converted
+
+
+def read_cached_table(pattern="*T*.parquet", cache_dir=CACHE_DIR, columns=None):
+    """Reads the matching cache files into one pyarrow Table (e.g. for notebook analyses)."""
+    paths = sorted(glob.glob(os.path.join(cache_dir, pattern)))
+    return pa.concat_tables([pq.read_table(path, columns=columns) for path in paths])
+
+
+def parse_args():
+    """Parses command-line options for the Parquet cache conversion."""
+    parser = argparse.ArgumentParser(
+        description="Converts the downloaded ANS CSVs into typed, compressed Parquet files "
+        "that importer.py reads instead of the CSVs."
+    )
+    parser.add_argument("--data-dir", default=DATA_DIR, help=f"CSV/ZIP directory (default: {DATA_DIR}).")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help=f"Output directory (default: {CACHE_DIR}).")
+    parser.add_argument(
+        "--force", action="store_true", help="Rebuild cache files even if they are up to date."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    convert_all(args.data_dir, args.cache_dir, force=args.force)
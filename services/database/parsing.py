@@ -0,0 +1,141 @@
+import logging
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; column parsing falls back to a Python loop
+    np = None
+
+# --- Parsing Configuration ---
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+DATE_CACHE_SIZE = 4096  # Quarter files only carry a handful of distinct DATA values
+CENTS = Decimal("0.01")
+MAX_INTEGER_DIGITS = 16  # NUMERIC(18, 2) holds |value| < 10^16; also keeps cents within int64
+# ---
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_cached(date_str, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    # Logged once per distinct bad value thanks to the cache
+    logging.warning(f"Could not parse date: '{date_str}' with formats {list(formats)}")
+    return None
+
+
+def parse_date(date_str, formats=DATE_FORMATS):
+    """Tries multiple formats to parse a date string. Results are memoized per string."""
+    if not date_str:
+        return None
+    # Handle potential extra whitespace
+    return _parse_date_cached(date_str.strip(), tuple(formats))
+
+
+def _parse_cents_slow(decimal_str):
+    """Decimal-based fallback for values the fast path rejects (e.g. > 2 decimal places)."""
+    try:
+        cleaned_str = decimal_str.strip().replace(".", "").replace(",", ".")
+        if cleaned_str.startswith("(") and cleaned_str.endswith(")"):
+            cleaned_str = "-" + cleaned_str[1:-1]
+        # NUMERIC(18, 2) rounds half away from zero on insert
+        return int(Decimal(cleaned_str).quantize(CENTS, rounding=ROUND_HALF_UP) * 100)
+    except (InvalidOperation, ValueError):
+        logging.warning(f"Could not parse decimal: '{decimal_str}'")
+        return None
+
+
+def _checked_cents(cents, decimal_str):
+    if cents is not None and abs(cents) >= 10 ** (MAX_INTEGER_DIGITS + 2):
+        logging.warning(f"Decimal out of NUMERIC(18, 2) range: '{decimal_str}'")
+        return None
+    return cents
+
+
+def parse_cents(decimal_str):
+    """
+    Parses a pt-BR number ('1.234,56', '(10,00)', '-3,5') into an integer
+    amount of cents. Returns None for empty or unparseable values and for
+    values too large for the NUMERIC(18, 2) balance columns.
+    """
+    if not decimal_str:
+        return None
+    cleaned = decimal_str.strip()
+    negative = False
+    if cleaned.startswith("(") and cleaned.endswith(")"):
+        negative, cleaned = True, cleaned[1:-1]
+    elif cleaned.startswith("-"):
+        negative, cleaned = True, cleaned[1:]
+    integer_part, _, fraction = cleaned.replace(".", "").partition(",")
+    if (
+        not integer_part.isdecimal()
+        or len(fraction) > 2
+        or (fraction and not fraction.isdecimal())
+    ):
+        return _checked_cents(_parse_cents_slow(decimal_str), decimal_str)
+    cents = int(integer_part) * 100 + int(fraction.ljust(2, "0"))
+    return _checked_cents(-cents if negative else cents, decimal_str)
+
+
+def parse_cents_column(values):
+    """
+    Parses a chunk of pt-BR numbers into a list of cents (int or None).
+    With numpy available the well-formed values with at most
+    MAX_INTEGER_DIGITS integer digits are converted in one vectorized pass
+    into an int64 array; the rest go through parse_cents.
+    """
+    if np is None or not values:
+        return [parse_cents(value) for value in values]
+
+    cleaned = np.char.strip(np.array([value or "" for value in values], dtype=str))
+    # Same sign rules as parse_cents: '(x)' or a leading '-' around a plain body
+    body = np.char.strip(cleaned, "()-")
+    parenthesized = np.char.add(np.char.add("(", body), ")") == cleaned
+    minus = np.char.add("-", body) == cleaned
+    negative = parenthesized | minus
+    parts = np.char.partition(np.char.replace(body, ".", ""), ",")
+    integer_part, fraction = parts[:, 0], parts[:, 2]
+    fast = (
+        (negative | (body == cleaned))
+        & np.char.isdecimal(integer_part)
+        # Longer integer parts would overflow int64 cents; parse_cents handles them
+        & (np.char.str_len(integer_part) <= MAX_INTEGER_DIGITS)
+        & (np.char.str_len(fraction) <= 2)
+        & (np.char.isdecimal(fraction) | (fraction == ""))
+    )
+
+    cents = np.zeros(len(values), dtype=np.int64)
+    cents[fast] = integer_part[fast].astype(np.int64) * 100 + np.char.ljust(
+        fraction[fast], 2, "0"
+    ).astype(np.int64)
+    cents[fast & negative] *= -1
+
+    result = cents.tolist()
+    for index in np.flatnonzero(~fast).tolist():
+        result[index] = parse_cents(values[index])
+    return result
+
+
+def format_cents(cents):
+    """Formats cents as a plain decimal string ('-1234.56'), e.g. for COPY."""
+    if cents is None:
+        return None
+    sign = "-" if cents < 0 else ""
+    units, remainder = divmod(abs(cents), 100)
+    return f"{sign}{units}.{remainder:02d}"
+
+
+def cents_to_decimal(cents):
+    """Converts cents back to a Decimal with two decimal places."""
+    if cents is None:
+        return None
+    return Decimal(cents).scaleb(-2)
+
+
+def parse_decimal(decimal_str):
+    """Safely parses a string to a Decimal, handling pt-BR format."""
+    return cents_to_decimal(parse_cents(decimal_str))
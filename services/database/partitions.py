@@ -0,0 +1,160 @@
+import re
+import logging
+from datetime import date
+
+# --- Partition Configuration ---
+PARENT_TABLE = "demonstracoes_contabeis"
+PARTITION_PREFIX = "demonstracoes"
+LOAD_SUFFIX = "_load"
+# ---
+
+
+def quarter_start(value):
+    """Returns the first day of the quarter containing the given date."""
+    return date(value.year, 3 * ((value.month - 1) // 3) + 1, 1)
+
+
+def quarter_bounds(quarter):
+    """Returns the half-open [start, end) range of the quarter starting at `quarter`."""
+    start = quarter_start(quarter)
+    if start.month == 10:
+        return start, date(start.year + 1, 1, 1)
+    return start, date(start.year, start.month + 3, 1)
+
+
+def partition_name(quarter):
+    """Canonical partition name for a quarter, e.g. demonstracoes_2023_q1."""
+    start = quarter_start(quarter)
+    return f"{PARTITION_PREFIX}_{start.year}_q{(start.month - 1) // 3 + 1}"
+
+
+def quarters_of(dates):
+    """Maps a collection of DATA values to the sorted set of quarter starts they fall in."""
+    return sorted({quarter_start(value) for value in dates})
+
+
+def is_partitioned(cursor):
+    """True when demonstracoes_contabeis is a range-partitioned table (01_schema.sql)."""
+    cursor.execute(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table
+            WHERE partrelid = to_regclass(%s)
+        );
+        """,
+        (PARENT_TABLE,),
+    )
+    return cursor.fetchone()[0]
+
+
+def create_partition_sql(quarter):
+    """CREATE TABLE IF NOT EXISTS statement for a quarter's partition."""
+    start, end = quarter_bounds(quarter)
+    return f"""
+        CREATE TABLE IF NOT EXISTS {partition_name(quarter)}
+        PARTITION OF {PARENT_TABLE}
+        FOR VALUES FROM ('{start}') TO ('{end}');
+    """
+
+
+def ensure_quarter_partitions(cursor, dates):
+    """Creates any missing quarter partitions needed to insert rows with these DATA values."""
+    for quarter in quarters_of(dates):
+        cursor.execute(create_partition_sql(quarter))
+
+
+def drop_quarter_partitions(cursor, quarters):
+    """Drops the partitions for the given quarters, if they exist."""
+    for quarter in quarters_of(quarters):
+        cursor.execute(f"DROP TABLE IF EXISTS {partition_name(quarter)};")
+
+
+def create_load_table(cursor, quarter):
+    """
+    Creates the detached table a quarter is loaded into before being attached.
+    The CHECK constraint matches the partition bound, so ATTACH PARTITION
+    can skip its validation scan. Returns the load table name.
+    """
+    start, end = quarter_bounds(quarter)
+    load_table = f"{partition_name(quarter)}{LOAD_SUFFIX}"
+    cursor.execute(f"DROP TABLE IF EXISTS {load_table};")
+    cursor.execute(
+        f"""
+        CREATE TABLE {load_table} (
+            LIKE {PARENT_TABLE} INCLUDING DEFAULTS,
+            CONSTRAINT {load_table}_data_range
+                CHECK (DATA >= '{start}' AND DATA < '{end}')
+        );
+        """
+    )
+    return load_table
+
+
+def build_partition_indexes(cursor, quarter, load_table):
+    """
+    Builds the parent's indexes on the filled load table, so that
+    ATTACH PARTITION adopts them instead of building them itself. They are
+    named after the load table, since the old partition still owns the
+    partition's names; swap_in_partition renames them.
+    """
+    cursor.execute(
+        """
+        SELECT c.relname, i.indisprimary, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(%s);
+        """,
+        (PARENT_TABLE,),
+    )
+    for index_name, is_primary, index_def in cursor.fetchall():
+        columns = re.search(r"\((.*)\)\s*$", index_def).group(1)
+        if is_primary:
+            # Constraint indexes only attach to a matching constraint on the partition
+            cursor.execute(
+                f"ALTER TABLE {load_table} ADD CONSTRAINT {load_table}_pkey PRIMARY KEY ({columns});"
+            )
+            continue
+        local_def = re.sub(
+            r"^CREATE (UNIQUE )?INDEX \S+ ON ONLY \S+",
+            lambda m: f"CREATE {m.group(1) or ''}INDEX {load_table}_{index_name} ON {load_table}",
+            index_def,
+        )
+        cursor.execute(local_def)
+
+
+def swap_in_partition(cursor, quarter, load_table):
+    """
+    Replaces the quarter's partition with the loaded table: drops the old
+    partition, renames the load table and its indexes and attaches it. Runs
+    on the caller's cursor so the swap commits (or rolls back) with the load
+    itself.
+    """
+    start, end = quarter_bounds(quarter)
+    partition = partition_name(quarter)
+    cursor.execute(f"DROP TABLE IF EXISTS {partition};")
+    cursor.execute(f"ALTER TABLE {load_table} RENAME TO {partition};")
+    # Indexes from build_partition_indexes take the names the old partition released
+    # (renaming a constraint's index renames the constraint too)
+    cursor.execute(
+        """
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = to_regclass(%s) AND starts_with(c.relname, %s);
+        """,
+        (partition, f"{load_table}_"),
+    )
+    for (index_name,) in cursor.fetchall():
+        new_name = partition + index_name[len(load_table):]
+        cursor.execute(f"ALTER INDEX {index_name} RENAME TO {new_name};")
+    cursor.execute(
+        f"""
+        ALTER TABLE {PARENT_TABLE}
+        ATTACH PARTITION {partition} FOR VALUES FROM ('{start}') TO ('{end}');
+        """
+    )
+    # The partition bound now enforces the range; the load-time CHECK is redundant
+    cursor.execute(
+        f"ALTER TABLE {partition} DROP CONSTRAINT {load_table}_data_range;"
+    )
+    logging.info(f"Attached partition {partition} for [{start}, {end}).")
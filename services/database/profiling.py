@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import logging
+import resource
+import threading
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# --- Profiling Configuration ---
+MEMORY_RSS = "rss"
+MEMORY_TRACEMALLOC = "tracemalloc"
+RSS_SAMPLE_INTERVAL = 0.05  # Seconds between resident set size samples
+STATM_PATH = "/proc/self/statm"
+# ---
+
+
+def _current_rss():
+    """Current resident set size in bytes (falls back to the lifetime peak off Linux)."""
+    try:
+        with open(STATM_PATH) as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is reported in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _RssSampler(threading.Thread):
+    """Background thread that keeps the peak RSS seen while a file is imported."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = _current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_INTERVAL):
+            self.peak = max(self.peak, _current_rss())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.peak = max(self.peak, _current_rss())
+        return self.peak
+
+
+class ImportProfile:
+    """
+    Per-file instrumentation for the importer: accumulated seconds per stage,
+    counters (rows, round-trips, commits), bytes read and peak memory.
+    """
+
+    def __init__(self, source, source_name, bytes_read, memory_mode=MEMORY_RSS):
+        self.source = source
+        self.source_name = source_name
+        self.bytes_read = bytes_read
+        self.memory_mode = memory_mode
+        self.stages = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.succeeded = None
+        self._sampler = None
+
+    def add(self, stage, seconds):
+        self.stages[stage] += seconds
+
+    def count(self, counter, amount=1):
+        self.counters[counter] += amount
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - started
+
+    def timed(self, iterable, stage):
+        """Yields from iterable, charging the time spent producing each item to stage."""
+        iterator = iter(iterable)
+        perf_counter = time.perf_counter
+        while True:
+            started = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.stages[stage] += perf_counter() - started
+                return
+            self.stages[stage] += perf_counter() - started
+            yield item
+
+    def start(self):
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._wall_start = time.perf_counter()
+        self._sampler = _RssSampler()
+        self._sampler.start()
+        if self.memory_mode == MEMORY_TRACEMALLOC:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        return self
+
+    def finish(self, succeeded):
+        self.succeeded = succeeded
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.peak_rss_bytes = self._sampler.stop()
+        self.peak_traced_bytes = (
+            tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        )
+        return self
+
+    def to_dict(self):
+        rows_loaded = self.counters.get("rows_loaded", 0)
+        accounted = sum(self.stages.values())
+        stages = dict(self.stages)
+        stages["other"] = max(self.wall_seconds - accounted, 0.0)
+        return {
+            "source": self.source,
+            "file": self.source_name,
+            "started_at": self.started_at,
+            "succeeded": self.succeeded,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "rows_per_sec": round(rows_loaded / self.wall_seconds, 1)
+            if self.wall_seconds
+            else 0.0,
+            "bytes_read": self.bytes_read,
+            "mb_per_sec": round(self.bytes_read / 1e6 / self.wall_seconds, 2)
+            if self.wall_seconds
+            else 0.0,
+            "stages_seconds": {name: round(value, 4) for name, value in stages.items()},
+            "counters": dict(self.counters),
+            "peak_rss_bytes": self.peak_rss_bytes,
+            "peak_traced_bytes": self.peak_traced_bytes,
+        }
+
+    def write(self, report_dir):
+        """Writes the report as <report_dir>/<file name>.json and returns its path."""
+        os.makedirs(report_dir, exist_ok=True)
+        report_path = os.path.join(report_dir, f"{self.source_name}.json")
+        with open(report_path, "w", encoding="utf-8") as report_file:
+            json.dump(self.to_dict(), report_file, indent=2)
+        logging.info(f"Wrote import profile for {self.source_name} to {report_path}")
+        return report_path
+
+
+def stage(profile, name):
+    """profile.stage(name), or a no-op context when profiling is off."""
+    return profile.stage(name) if profile else nullcontext()
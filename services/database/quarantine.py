@@ -0,0 +1,124 @@
+import io
+import os
+import csv
+import gzip
+import logging
+
+# --- Quarantine Configuration ---
+REJECT_FILE_SUFFIX = ".rejects.csv.gz"
+REJECT_BUFFER_SIZE = 1024 * 1024  # Bytes buffered before hitting the gzip stream
+REJECT_SAMPLE_SIZE = 5  # Rejected rows echoed to the log per file
+MAX_REJECT_RATE = 0.95  # Abort a file once this share of its rows was rejected...
+REJECT_RATE_MIN_ROWS = 10000  # ...after at least this many rows were read
+# ---
+
+
+class RejectRateExceeded(Exception):
+    """Raised when a file's reject rate crosses the configured threshold."""
+
+
+class RejectQuarantine:
+    """
+    Collects rejected rows for one input file. Rows are appended, with a
+    reason code and their line number, to a gzip-compressed CSV
+    (<reject_dir>/<file name>.rejects.csv.gz) through a buffered writer; the
+    log only gets per-reason counts and the first few rows as samples.
+    Without reject_dir rows are only counted and sampled.
+    """
+
+    def __init__(
+        self,
+        source_name,
+        fieldnames,
+        reject_dir=None,
+        max_reject_rate=MAX_REJECT_RATE,
+        min_rows=REJECT_RATE_MIN_ROWS,
+        sample_size=REJECT_SAMPLE_SIZE,
+        delimiter=";",
+        encoding="utf-8",
+    ):
+        self.source_name = source_name
+        self.fieldnames = list(fieldnames or [])
+        self.reject_dir = reject_dir
+        self.max_reject_rate = max_reject_rate
+        self.min_rows = min_rows
+        self.sample_size = sample_size
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.counts = {}
+        self.total = 0
+        self.reject_path = None
+        self._stream = None
+        self._writer = None
+
+    def _open(self):
+        os.makedirs(self.reject_dir, exist_ok=True)
+        self.reject_path = os.path.join(
+            self.reject_dir, f"{self.source_name}{REJECT_FILE_SUFFIX}"
+        )
+        gzip_stream = gzip.open(self.reject_path, "wb")
+        self._stream = io.TextIOWrapper(
+            io.BufferedWriter(gzip_stream, buffer_size=REJECT_BUFFER_SIZE),
+            encoding=self.encoding,
+            newline="",
+        )
+        self._writer = csv.writer(self._stream, delimiter=self.delimiter)
+        self._writer.writerow(["reject_reason", "line", "detail", *self.fieldnames])
+
+    def reject(self, reason, line, row, detail=None):
+        """Records one rejected row (a dict keyed by fieldnames, or a sequence)."""
+        self.total += 1
+        self.counts[reason] = self.counts.get(reason, 0) + 1
+
+        if self.counts[reason] <= self.sample_size:
+            logging.warning(
+                f"Rejected row (sample) in {self.source_name} at line {line}: "
+                f"reason={reason}{f' ({detail})' if detail else ''} - {row}"
+            )
+
+        if self.reject_dir is None:
+            return
+        if self._writer is None:
+            self._open()
+        if isinstance(row, dict):
+            values = [row.get(name) for name in self.fieldnames]
+        else:
+            values = list(row)
+        self._writer.writerow([reason, line, detail or "", *values])
+
+    def check_rate(self, rows_seen, final=False):
+        """
+        Raises RejectRateExceeded when the reject rate is pathological. While
+        a file is still being read the check waits for min_rows rows; the
+        final check applies to files of any size.
+        """
+        if self.max_reject_rate is None or not rows_seen:
+            return
+        if not final and rows_seen < self.min_rows:
+            return
+        rate = self.total / rows_seen
+        if rate > self.max_reject_rate:
+            raise RejectRateExceeded(
+                f"{self.source_name}: {self.total} of {rows_seen} rows rejected "
+                f"({rate:.1%} > {self.max_reject_rate:.1%}), aborting file. "
+                f"Reasons: {self.counts}"
+            )
+
+    def close(self):
+        """Flushes the reject file and logs the per-reason summary."""
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+            self._writer = None
+        if self.total:
+            location = f" Written to {self.reject_path}." if self.reject_path else ""
+            logging.warning(
+                f"{self.source_name}: {self.total} rejected rows by reason {self.counts}.{location}"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,87 @@
+import logging
+
+try:
+    from .partitions import PARENT_TABLE, quarter_bounds, quarters_of
+except ImportError:
+    # Fallback for running script directly
+    from partitions import PARENT_TABLE, quarter_bounds, quarters_of
+
+# --- Rollup Configuration ---
+ROLLUP_TABLE = "saldos_trimestrais"
+
+# Mirrors the definition in sql/01_schema.sql so databases created before the
+# rollup existed get the table (built from their current rows) on the next run.
+ROLLUP_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+        DATA DATE NOT NULL,
+        REGISTRO_ANS INT NOT NULL REFERENCES operadoras(Registro_ANS) ON DELETE CASCADE,
+        CONTA_ID INT NOT NULL REFERENCES contas_contabeis(CONTA_ID),
+        VL_SALDO_INICIAL NUMERIC(20, 2),
+        VL_SALDO_FINAL NUMERIC(20, 2),
+        QTD_LINHAS INT NOT NULL,
+        PRIMARY KEY (CONTA_ID, DATA, REGISTRO_ANS)
+    );
+    CREATE INDEX IF NOT EXISTS idx_{ROLLUP_TABLE}_data ON {ROLLUP_TABLE} (DATA);
+"""
+# ---
+
+
+def refresh_rollup_sql(quarter):
+    """
+    Statements that recompute a quarter's rollup rows from the fact table.
+    The half-open DATA range lets the executor prune to the quarter's partition.
+    """
+    start, end = quarter_bounds(quarter)
+    return [
+        f"DELETE FROM {ROLLUP_TABLE} WHERE DATA >= '{start}' AND DATA < '{end}';",
+        f"""
+        INSERT INTO {ROLLUP_TABLE} (
+            DATA, REGISTRO_ANS, CONTA_ID, VL_SALDO_INICIAL, VL_SALDO_FINAL, QTD_LINHAS
+        )
+        SELECT
+            DATA, REGISTRO_ANS, CONTA_ID,
+            SUM(VL_SALDO_INICIAL), SUM(VL_SALDO_FINAL), COUNT(*)
+        FROM {PARENT_TABLE}
+        WHERE DATA >= '{start}' AND DATA < '{end}'
+        GROUP BY DATA, REGISTRO_ANS, CONTA_ID;
+        """,
+    ]
+
+
+def refresh_rollup(cursor, quarters):
+    """
+    Recomputes the rollup for the quarters containing the given DATA values.
+    Runs on the caller's cursor so it commits (or rolls back) with the load.
+    """
+    for quarter in quarters_of(quarters):
+        for statement in refresh_rollup_sql(quarter):
+            cursor.execute(statement)
+        logging.info(f"Refreshed {ROLLUP_TABLE} for quarter {quarter}: {cursor.rowcount} rows.")
+
+
+async def refresh_rollup_async(connection, quarters):
+    """refresh_rollup for an asyncpg connection (joins its current transaction)."""
+    for quarter in quarters_of(quarters):
+        for statement in refresh_rollup_sql(quarter):
+            status = await connection.execute(statement)
+        logging.info(f"Refreshed {ROLLUP_TABLE} for quarter {quarter}: {status.split()[-1]} rows.")
+
+
+def ensure_rollup_table(conn):
+    """
+    Creates the rollup table if it does not exist yet and, when it had to be
+    created, fills it from the rows already in demonstracoes_contabeis.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL;", (ROLLUP_TABLE,))
+        existed = cursor.fetchone()[0]
+        cursor.execute(ROLLUP_DDL)
+        if not existed:
+            cursor.execute(f"SELECT DISTINCT DATA FROM {PARENT_TABLE};")
+            existing_dates = [row[0] for row in cursor.fetchall()]
+            logging.info(
+                f"Created {ROLLUP_TABLE}; building it for {len(quarters_of(existing_dates))} "
+                "quarters already loaded."
+            )
+            refresh_rollup(cursor, existing_dates)
+    conn.commit()
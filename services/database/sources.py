@@ -0,0 +1,110 @@
+import os
+import io
+import glob
+import fnmatch
+import zipfile
+import logging
+from contextlib import contextmanager
+
+# --- Source Configuration ---
+# Accounting inputs are either plain CSV paths or members of a downloaded ZIP,
+# addressed as "<zip path>::<member name>" so they can be passed around (and
+# pickled to worker processes) as plain strings.
+ZIP_MEMBER_SEPARATOR = "::"
+# ---
+
+
+def member_source(zip_path, member):
+    """Builds the source string for a member of a ZIP archive."""
+    return f"{zip_path}{ZIP_MEMBER_SEPARATOR}{member}"
+
+
+def split_source(source):
+    """Returns (zip_path, member) for a ZIP member source, or (source, None) for a file."""
+    if ZIP_MEMBER_SEPARATOR in source:
+        zip_path, member = source.split(ZIP_MEMBER_SEPARATOR, 1)
+        return zip_path, member
+    return source, None
+
+
+def source_name(source):
+    """Base file name of a source; a ZIP member is named after the member itself."""
+    path, member = split_source(source)
+    return os.path.basename(member if member is not None else path)
+
+
+def source_size(source):
+    """Uncompressed size in bytes of a source."""
+    path, member = split_source(source)
+    if member is None:
+        return os.path.getsize(path)
+    with zipfile.ZipFile(path) as archive:
+        return archive.getinfo(member).file_size
+
+
+def source_stamp(source):
+    """
+    Cheap change marker for a source: the CRC-32 recorded in the ZIP for a
+    member, size and modification time for a plain file.
+    """
+    path, member = split_source(source)
+    if member is None:
+        stat = os.stat(path)
+        return f"mtime:{stat.st_size}:{stat.st_mtime_ns}"
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(member)
+        return f"crc32:{info.file_size}:{info.CRC}"
+
+
+@contextmanager
+def open_source(source, encoding=None):
+    """
+    Opens a source for reading. Plain files are opened from disk; ZIP members
+    are streamed with ZipFile.open without extracting them. Returns a text
+    stream when encoding is given, a binary stream otherwise.
+    """
+    path, member = split_source(source)
+    if member is None:
+        mode = "r" if encoding else "rb"
+        with open(path, mode=mode, encoding=encoding) as stream:
+            yield stream
+        return
+
+    with zipfile.ZipFile(path) as archive:
+        try:
+            raw_stream = archive.open(member)
+        except KeyError:
+            raise FileNotFoundError(f"{member} not found in {path}")
+        with raw_stream:
+            if encoding:
+                with io.TextIOWrapper(raw_stream, encoding=encoding) as text_stream:
+                    yield text_stream
+            else:
+                yield raw_stream
+
+
+def discover_sources(data_dir, pattern):
+    """
+    Finds inputs matching pattern in data_dir: plain files plus matching
+    members of any *.zip there. A ZIP member is ignored when a file with the
+    same name was already extracted next to it, so nothing is imported twice.
+    """
+    sources = glob.glob(os.path.join(data_dir, pattern))
+    extracted_names = {os.path.basename(path) for path in sources}
+
+    for zip_path in sorted(glob.glob(os.path.join(data_dir, "*.zip"))):
+        try:
+            with zipfile.ZipFile(zip_path) as archive:
+                members = archive.namelist()
+        except zipfile.BadZipFile:
+            logging.error(f"Error: {zip_path} is not a zip file or is corrupted.")
+            continue
+        for member in members:
+            name = os.path.basename(member)
+            if not name or not fnmatch.fnmatch(name, pattern):
+                continue
+            if name in extracted_names:
+                logging.debug(f"Skipping {member} in {zip_path}: already extracted.")
+                continue
+            sources.append(member_source(zip_path, member))
+    return sources
@@ -1,6 +1,10 @@
 -- Schema definition for ANS data
 
+DROP TABLE IF EXISTS import_manifest;
+DROP TABLE IF EXISTS dataset_version;
+DROP TABLE IF EXISTS saldos_trimestrais;
 DROP TABLE IF EXISTS demonstracoes_contabeis;
+DROP TABLE IF EXISTS contas_contabeis;
 DROP TABLE IF EXISTS operadoras;
 
 -- Tabela para os dados cadastrais das operadoras ativas
@@ -27,26 +31,78 @@ CREATE TABLE operadoras (
     Data_Registro_ANS DATE                    -- Date of registration with ANS
 );
 
+-- Plano de contas: cada par (conta, descrição) distinto vira um CONTA_ID inteiro.
+-- Preenchida (e mantida em cache) pelo importer.py durante a carga.
+CREATE TABLE contas_contabeis (
+    CONTA_ID SERIAL PRIMARY KEY,              -- Surrogate key stored in demonstracoes_contabeis
+    CONTA_CONTABIL VARCHAR(50) NOT NULL,      -- Accounting account code
+    DESCRICAO VARCHAR(255) NOT NULL,          -- Description, without surrounding whitespace
+    UNIQUE (CONTA_CONTABIL, DESCRICAO)
+);
+
 -- Tabela para as demonstrações contábeis trimestrais
+-- Particionada por trimestre (RANGE em DATA). As partições (demonstracoes_AAAA_qN)
+-- são criadas pelo importer.py, que carrega cada trimestre numa tabela separada,
+-- cria os índices nela e faz ATTACH PARTITION.
 CREATE TABLE demonstracoes_contabeis (
-    ID BIGSERIAL PRIMARY KEY,                 -- Auto-incrementing ID
+    ID BIGSERIAL,                             -- Auto-incrementing ID
     DATA DATE NOT NULL,                       -- Date of the accounting report (end of quarter)
     REGISTRO_ANS INT NOT NULL,                -- Foreign key linking to operadoras table
-    CONTA_CONTABIL VARCHAR(50) NOT NULL,      -- Accounting account code
-    DESCRICAO VARCHAR(255) NOT NULL,          -- Description of the accounting account
+    CONTA_ID INT NOT NULL,                    -- Account (code + description) in contas_contabeis
     VL_SALDO_FINAL NUMERIC(18, 2),            -- Final balance value 
     VL_SALDO_INICIAL NUMERIC(18, 2),          -- initial balance 
 
-    
+    PRIMARY KEY (ID, DATA),                   -- Partition key must be part of the primary key
     CONSTRAINT fk_operadora
         FOREIGN KEY(REGISTRO_ANS)
         REFERENCES operadoras(Registro_ANS)
-        ON DELETE CASCADE 
-);
+        ON DELETE CASCADE,
+    CONSTRAINT fk_conta
+        FOREIGN KEY(CONTA_ID)
+        REFERENCES contas_contabeis(CONTA_ID)
+) PARTITION BY RANGE (DATA);
 
 CREATE INDEX idx_demonstracoes_data ON demonstracoes_contabeis (DATA);
-CREATE INDEX idx_demonstracoes_reg_ans ON demonstracoes_contabeis (REGISTRO_ANS);
-CREATE INDEX idx_demonstracoes_conta ON demonstracoes_contabeis (CONTA_CONTABIL);
-CREATE INDEX idx_demonstracoes_desc ON demonstracoes_contabeis (DESCRICAO); 
+-- Operator time series (API /operators/{registro_ans}/financials): the key order
+-- matches the keyset pagination ORDER BY, so each page is one index range scan.
+-- The leading REGISTRO_ANS also serves the fk_operadora cascades.
+CREATE INDEX idx_demonstracoes_reg_ans ON demonstracoes_contabeis (REGISTRO_ANS, DATA, CONTA_ID, ID);
+CREATE INDEX idx_demonstracoes_conta ON demonstracoes_contabeis (CONTA_ID);
+
+-- Saldos agregados por conta x trimestre x operadora (lidos pelas análises de top 10).
+-- Mantida pelo importer.py, que recalcula só os trimestres que carregou, na mesma
+-- transação da carga. A chave começa por CONTA_ID, DATA: o ranking de uma conta num
+-- período é uma varredura de intervalo no índice.
+CREATE TABLE saldos_trimestrais (
+    DATA DATE NOT NULL,                       -- Date of the accounting report (as in demonstracoes_contabeis)
+    REGISTRO_ANS INT NOT NULL                 -- Operator; emptied with operadoras (TRUNCATE ... CASCADE)
+        REFERENCES operadoras(Registro_ANS) ON DELETE CASCADE,
+    CONTA_ID INT NOT NULL                     -- Account in contas_contabeis
+        REFERENCES contas_contabeis(CONTA_ID),
+    VL_SALDO_INICIAL NUMERIC(20, 2),          -- SUM of initial balances
+    VL_SALDO_FINAL NUMERIC(20, 2),            -- SUM of final balances
+    QTD_LINHAS INT NOT NULL,                  -- Number of aggregated demonstracoes_contabeis rows
+    PRIMARY KEY (CONTA_ID, DATA, REGISTRO_ANS)
+);
+
+CREATE INDEX idx_saldos_trimestrais_data ON saldos_trimestrais (DATA);
+
+-- Arquivos já importados (usado por importer.py --incremental)
+CREATE TABLE import_manifest (
+    file_name TEXT PRIMARY KEY,               -- Base name of the imported file
+    file_size BIGINT NOT NULL,                -- Size in bytes at import time
+    content_hash TEXT NOT NULL,               -- SHA-256 of the file contents
+    quarters DATE[] NOT NULL DEFAULT '{}',    -- DATA values loaded from the file
+    imported_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Versão dos dados: incrementada pelo importer.py em cada carga confirmada.
+-- A API usa o valor como chave dos seus caches em memória.
+CREATE TABLE dataset_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id), -- Single-row table
+    version BIGINT NOT NULL DEFAULT 0,        -- Bumped in the transaction of every load
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+INSERT INTO dataset_version (id) VALUES (TRUE);
 
 COMMIT; 
\ No newline at end of file
@@ -1,21 +1,23 @@
 -- Top 10 operadoras com maiores despesas em "EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS ..." no último trimestre disponível.
 
--- Find the latest date (end of quarter) available in the data
-WITH LatestQuarter AS (
-    SELECT MAX(DATA) as latest_data
-    FROM demonstracoes_contabeis
-),
--- Calculate total expenses per operator for the target account in the latest quarter
-QuarterlyExpenses AS (
+-- Reads the saldos_trimestrais rollup (one row per account x quarter x operator,
+-- refreshed by importer.py) instead of aggregating demonstracoes_contabeis.
+-- The latest date comes from idx_saldos_trimestrais_data, and the account is
+-- resolved to its integer CONTA_ID(s), so the ranking is a range scan of the
+-- rollup's (CONTA_ID, DATA, REGISTRO_ANS) primary key.
+WITH QuarterlyExpenses AS (
     SELECT
-        dc.REGISTRO_ANS,
-        SUM(dc.VL_SALDO_FINAL) AS total_despesa_trimestre
-    FROM demonstracoes_contabeis dc
-    JOIN LatestQuarter lq ON dc.DATA = lq.latest_data
+        st.REGISTRO_ANS,
+        SUM(st.VL_SALDO_FINAL) AS total_despesa_trimestre
+    FROM saldos_trimestrais st
     WHERE
-        dc.DESCRICAO = 'EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS  DE ASSISTÊNCIA A SAÚDE MEDICO HOSPITALAR '
+        st.DATA = (SELECT MAX(DATA) FROM saldos_trimestrais)
+        AND st.CONTA_ID IN (
+            SELECT CONTA_ID FROM contas_contabeis
+            WHERE DESCRICAO = 'EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS  DE ASSISTÊNCIA A SAÚDE MEDICO HOSPITALAR'
+        )
     GROUP BY
-        dc.REGISTRO_ANS
+        st.REGISTRO_ANS
 )
 -- Select operator details and order by the calculated expense
 SELECT
@@ -1,26 +1,31 @@
 -- Top 10 operadoras com maiores despesas em "EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS ..." no último ano completo disponível.
 
-WITH LatestDataYear AS (
-    -- Find the year of the latest data entry
-    SELECT EXTRACT(YEAR FROM MAX(DATA)) as max_year
-    FROM demonstracoes_contabeis
-),
-TargetYear AS (
-    -- Define the target year as the year before the latest data entry's year
-    SELECT max_year - 1 as analysis_year
-    FROM LatestDataYear
+WITH TargetYear AS (
+    -- The target year is the year before the latest data entry's year,
+    -- expressed as a half-open date range [year_start, year_end)
+    SELECT
+        make_date(EXTRACT(YEAR FROM MAX(DATA))::int - 1, 1, 1) AS year_start,
+        make_date(EXTRACT(YEAR FROM MAX(DATA))::int, 1, 1) AS year_end
+    FROM saldos_trimestrais
 ),
 -- Calculate total expenses per operator for the target account in the target year
+-- from the saldos_trimestrais rollup (refreshed by importer.py). Comparing DATA
+-- against the range (instead of EXTRACT(YEAR FROM DATA)) keeps the lookup a range
+-- scan of the rollup's (CONTA_ID, DATA, REGISTRO_ANS) primary key.
 YearlyExpenses AS (
     SELECT
-        dc.REGISTRO_ANS,
-        SUM(dc.VL_SALDO_FINAL) AS total_despesa_ano
-    FROM demonstracoes_contabeis dc
-    JOIN TargetYear ty ON EXTRACT(YEAR FROM dc.DATA) = ty.analysis_year
+        st.REGISTRO_ANS,
+        SUM(st.VL_SALDO_FINAL) AS total_despesa_ano
+    FROM saldos_trimestrais st
     WHERE
-        dc.DESCRICAO = 'EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS  DE ASSISTÊNCIA A SAÚDE MEDICO HOSPITALAR '
+        st.DATA >= (SELECT year_start FROM TargetYear)
+        AND st.DATA < (SELECT year_end FROM TargetYear)
+        AND st.CONTA_ID IN (
+            SELECT CONTA_ID FROM contas_contabeis
+            WHERE DESCRICAO = 'EVENTOS/ SINISTROS CONHECIDOS OU AVISADOS  DE ASSISTÊNCIA A SAÚDE MEDICO HOSPITALAR'
+        )
     GROUP BY
-        dc.REGISTRO_ANS
+        st.REGISTRO_ANS
 )
 -- Select operator details and order by the calculated expense
 SELECT
@@ -21,6 +21,14 @@ FOR EACH ROW EXECUTE FUNCTION operadoras_trigger();
 -- Create a GIN index on the new tsvector column for fast searching
 CREATE INDEX IF NOT EXISTS idx_operadoras_fts ON operadoras USING GIN (fts_document);
 
+-- Autocomplete (GET /api/v1/operators/suggest): índices de trigramas para
+-- busca por prefixo/parte de palavra, que o FTS não casa ("unim" -> "UNIMED").
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_operadoras_razao_social_trgm
+    ON operadoras USING GIN (razao_social gin_trgm_ops);   -- Serves ILIKE '%x%' and word similarity (<%)
+CREATE INDEX IF NOT EXISTS idx_operadoras_nome_fantasia_trgm
+    ON operadoras USING GIN (nome_fantasia gin_trgm_ops);
+
 UPDATE operadoras SET fts_document =
      setweight(to_tsvector('pg_catalog.portuguese', coalesce(razao_social,'')), 'A') ||
      setweight(to_tsvector('pg_catalog.portuguese', coalesce(nome_fantasia,'')), 'A') ||